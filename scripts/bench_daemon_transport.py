@@ -0,0 +1,137 @@
+"""
+Compares JSON-RPC throughput against a local stub daemon that answers every
+POST after a fixed delay: nerva's DaemonRPC, which opens a client per call,
+PooledDaemonRPC over daemon_transport's shared connection pool, and the same
+with batching, which coalesces concurrent calls into JSON-RPC batches.
+
+    python scripts/bench_daemon_transport.py [calls] [concurrency] [latency ms]
+"""
+
+from typing import Any
+
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from nerva import DaemonRPC  # noqa: E402
+
+from backend.daemon import PooledDaemonRPC, daemon_transport  # noqa: E402
+
+
+class StubDaemon:
+    """
+    Echoes each call's params back, batches included, after ``latency``. It
+    serves from its own thread and event loop, so that it does not compete
+    with the clients being measured.
+    """
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.posts: int = 0
+        self.port: int = 0
+
+        self._runner: web.AppRunner | None = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    @staticmethod
+    def _reply(call: dict[str, Any]) -> dict[str, Any]:
+        return {"jsonrpc": "2.0", "id": call["id"], "result": call["params"]}
+
+    async def json_rpc(self, request: web.Request) -> web.Response:
+        self.posts += 1
+        body = await request.json()
+        await asyncio.sleep(self.latency)
+
+        if isinstance(body, list):
+            return web.json_response([self._reply(call) for call in body])
+
+        return web.json_response(self._reply(body))
+
+    async def _serve(self) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_post("/json_rpc", self.json_rpc)
+
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        self.port = runner.addresses[0][1]
+        return runner
+
+    def start(self) -> None:
+        self._thread.start()
+        self._runner = asyncio.run_coroutine_threadsafe(
+            self._serve(), self._loop
+        ).result()
+
+    def stop(self) -> None:
+        assert self._runner is not None
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+async def _run(client: DaemonRPC, calls: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(height: int) -> None:
+        async with semaphore:
+            reply = await client._request(
+                method="get_block_header_by_height", params={"height": height}
+            )
+            assert reply["result"] == {"height": height}, reply
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(height) for height in range(calls)))
+    return time.perf_counter() - started
+
+
+async def main() -> None:
+    calls, concurrency, latency = (
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 32,
+        float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.001,
+    )
+
+    stub = StubDaemon(latency)
+    stub.start()
+    port = stub.port
+
+    print(f"{calls} calls, {concurrency} at a time, {latency * 1000:g} ms latency")
+
+    try:
+        for name, client, batching in (
+            ("per-call client", DaemonRPC(host="127.0.0.1", port=port), False),
+            ("pooled", PooledDaemonRPC(host="127.0.0.1", port=port), False),
+            ("pooled, batched", PooledDaemonRPC(host="127.0.0.1", port=port), True),
+        ):
+            daemon_transport.configure(
+                url=f"http://127.0.0.1:{port}",
+                auth=None,
+                timeout=10.0,
+                max_connections=concurrency,
+                batching=batching,
+                batch_window=0.002,
+                batch_size=32,
+            )
+            stub.posts = 0
+
+            elapsed = await _run(client, calls, concurrency)
+            await daemon_transport.close()
+
+            print(
+                f"{name + ':':17} {calls / elapsed:8.1f} calls/s, {stub.posts} POSTs"
+            )
+
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
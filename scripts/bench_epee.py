@@ -0,0 +1,89 @@
+"""
+Compares decoding 100 blocks from one /get_blocks_by_height.bin response with
+decoding the JSON-RPC responses the same blocks take over get_block and
+get_transactions.
+
+    python scripts/bench_epee.py
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+from collections.abc import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from backend import epee  # noqa: E402
+
+BLOCKS: int = 100
+
+
+def _bench(func: Callable[[], object], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main() -> None:
+    blocks = [
+        {"block": os.urandom(120), "txs": [os.urandom(1500), os.urandom(2500)]}
+        for _ in range(BLOCKS)
+    ]
+
+    binary = epee.dumps({"blocks": blocks, "status": "OK", "untrusted": False})
+    block_replies = [
+        json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "id": 0,
+                "result": {
+                    "blob": block["block"].hex(),
+                    "json": json.dumps(
+                        {"tx_hashes": [os.urandom(32).hex() for _ in block["txs"]]}
+                    ),
+                    "block_header": {"hash": os.urandom(32).hex()},
+                    "status": "OK",
+                },
+            }
+        )
+        for block in blocks
+    ]
+    tx_reply = json.dumps(
+        {
+            "txs": [
+                {"as_hex": tx.hex(), "tx_hash": os.urandom(32).hex()}
+                for block in blocks
+                for tx in block["txs"]
+            ]
+        }
+    )
+
+    def via_binary() -> None:
+        for entry in epee.loads(binary)["blocks"]:
+            entry["block"].hex()
+            [tx.hex() for tx in entry["txs"]]
+
+    def via_json() -> None:
+        for reply in block_replies:
+            json.loads(json.loads(reply)["result"]["json"])
+
+        json.loads(tx_reply)
+
+    json_size = sum(map(len, block_replies)) + len(tx_reply)
+
+    print(
+        f"binary: {len(binary)} bytes, {_bench(via_binary, 200):.3f} ms (1 response)"
+    )
+    print(
+        f"json:   {json_size} bytes, {_bench(via_json, 200):.3f} ms "
+        f"({BLOCKS + 1} responses)"
+    )
+    print(f"binary, decode only: {_bench(lambda: epee.loads(binary), 2000):.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
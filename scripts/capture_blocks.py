@@ -0,0 +1,51 @@
+"""
+Saves a daemon's raw /get_blocks_by_height.bin response, for use as a test
+fixture.
+
+    python scripts/capture_blocks.py http://127.0.0.1:17566 1000 1002 \
+        tests/fixtures/get_blocks_by_height.bin
+"""
+
+import sys
+import hashlib
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from backend import epee  # noqa: E402
+
+
+def main() -> None:
+    if len(sys.argv) != 5:
+        raise SystemExit(__doc__)
+
+    url, start, end, output = sys.argv[1:]
+    heights = list(range(int(start), int(end) + 1))
+
+    response = httpx.post(
+        f"{url.rstrip('/')}/get_blocks_by_height.bin",
+        content=epee.dumps({"heights": heights}),
+        timeout=30.0,
+    )
+    response.raise_for_status()
+
+    Path(output).write_bytes(response.content)
+
+    # Printed so the expectations in tests/test_epee.py can be updated.
+    data = epee.loads(response.content)
+    print(f"{len(response.content)} bytes, status {bytes(data['status']).decode()}")
+
+    for height, entry in zip(heights, data.get("blocks", [])):
+        txs = [bytes(tx) for tx in entry.get("txs", [])]
+        print(
+            height,
+            len(entry["block"]),
+            hashlib.sha256(entry["block"]).hexdigest()[:16],
+            [(len(tx), hashlib.sha256(tx).hexdigest()[:16]) for tx in txs],
+        )
+
+
+if __name__ == "__main__":
+    main()
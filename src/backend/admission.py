@@ -0,0 +1,217 @@
+from typing import Any, TypeVar, ParamSpec
+
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from functools import wraps
+from contextlib import asynccontextmanager
+from collections.abc import Callable, Awaitable, AsyncIterator
+
+from backend import metrics
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# Lower values are admitted first.
+PRIORITY_HIGH: int = 0
+PRIORITY_NORMAL: int = 1
+PRIORITY_LOW: int = 2
+
+
+class Overloaded(Exception):
+    def __init__(self, upstream: str, retry_after: int) -> None:
+        super().__init__(f"{upstream} is overloaded")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Caps how many requests may be in flight against one upstream, queueing a
+    bounded number of others by priority.
+
+    Requests are shed with ``Overloaded`` rather than queued when the queue is
+    full, when the expected wait (from a moving average of service times)
+    already exceeds their deadline, or when the deadline passes while they
+    wait. A full queue evicts its lowest-priority waiter in favour of a more
+    urgent newcomer.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int = 32,
+        queue_size: int = 128,
+        timeout: float = 5.0,
+    ) -> None:
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active: int = 0
+        self.admitted: int = 0
+        self.shed: int = 0
+        self.service_time: float = 0.05
+
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+
+    def configure(
+        self, *, concurrency: int, queue_size: int, timeout: float
+    ) -> None:
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    def _expected_wait(self, ahead: int) -> float:
+        return (ahead + 1) * self.service_time / max(self.concurrency, 1)
+
+    def _overloaded(self) -> Overloaded:
+        self.shed += 1
+        return Overloaded(
+            self.name, max(1, math.ceil(self._expected_wait(self.waiting)))
+        )
+
+    def _prune(self) -> None:
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+
+    def _evict(self, priority: int) -> bool:
+        live = [waiter for waiter in self._waiters if not waiter[2].done()]
+        if not live:
+            return False
+
+        worst = max(live)
+        if worst[0] <= priority:
+            return False
+
+        worst[2].set_exception(self._overloaded())
+        return True
+
+    async def acquire(self, priority: int) -> None:
+        self._prune()
+
+        if self.active < self.concurrency and not self.waiting:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        ahead = sum(
+            1
+            for level, _, future in self._waiters
+            if level <= priority and not future.done()
+        )
+        if self._expected_wait(ahead) > self.timeout:
+            raise self._overloaded()
+
+        if self.waiting >= self.queue_size and not self._evict(priority):
+            raise self._overloaded()
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+
+        try:
+            # Shielded so a timeout cannot race a slot being handed over; an
+            # eviction surfaces here as the future's Overloaded exception.
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                raise self._overloaded() from None
+
+            future.result()
+
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and not future.exception():
+                self.release()
+
+            future.cancel()
+            raise
+
+        self.admitted += 1
+
+    def release(self) -> None:
+        # Hand the slot straight to the most urgent live waiter, if any.
+        while self._waiters:
+            *_, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_NORMAL) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        started = time.perf_counter()
+
+        try:
+            yield
+
+        finally:
+            elapsed = time.perf_counter() - started
+            self.service_time += (elapsed - self.service_time) * 0.1
+            self.release()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "service_time_ms": round(self.service_time * 1000, 3),
+        }
+
+
+limiters: dict[str, AdmissionController] = {
+    "daemon": AdmissionController("daemon", concurrency=32, queue_size=256),
+    "mongo": AdmissionController("mongo", concurrency=64, queue_size=512),
+    "exchanges": AdmissionController(
+        "exchanges", concurrency=8, queue_size=64, timeout=10.0
+    ),
+}
+
+
+def configure_admission(config: dict[str, Any]) -> None:
+    for name, limits in config.get("ADMISSION_LIMITS", {}).items():
+        limiter = limiters.setdefault(name, AdmissionController(name))
+        limiter.configure(
+            concurrency=limits.get("concurrency", limiter.concurrency),
+            queue_size=limits.get("queue_size", limiter.queue_size),
+            timeout=limits.get("timeout", limiter.timeout),
+        )
+
+
+def admit(
+    upstream: str, priority: int | Callable[[], int] = PRIORITY_NORMAL
+) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+    """
+    Runs the decorated route inside a slot of the ``upstream`` limiter.
+    ``priority`` may be a callable, evaluated per request, for routes whose
+    cost depends on their arguments.
+    """
+
+    def decorator(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+        @wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            level = priority() if callable(priority) else priority
+
+            async with limiters[upstream].slot(level):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+metrics.register(
+    "admission",
+    lambda: {name: limiter.stats() for name, limiter in limiters.items()},
+)
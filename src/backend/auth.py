@@ -0,0 +1,43 @@
+from typing import ParamSpec
+
+import hmac
+from functools import wraps
+from collections.abc import Callable, Awaitable
+
+from quart import Response, abort, jsonify, request, current_app
+
+P = ParamSpec("P")
+
+RouteResult = tuple[Response, int]
+
+
+def check_admin_token() -> RouteResult | None:
+    """
+    ``None`` if the request carries "Authorization: Bearer <ADMIN_TOKEN>",
+    otherwise the 401 to answer with. Without an ADMIN_TOKEN, admin routes do
+    not exist as far as clients can tell, so this aborts with a 404.
+    """
+
+    token: str = current_app.config.get("ADMIN_TOKEN", "")
+    if not token:
+        abort(404)
+
+    provided = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(provided.encode(), f"Bearer {token}".encode()):
+        response = jsonify({"status": "error", "error": "Unauthorized"})
+        response.headers["WWW-Authenticate"] = "Bearer"
+        return response, 401
+
+    return None
+
+
+def admin_only(
+    func: Callable[P, Awaitable[RouteResult]],
+) -> Callable[P, Awaitable[RouteResult]]:
+    """Serves the decorated route only to requests with the admin token."""
+
+    @wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> RouteResult:
+        return check_admin_token() or await func(*args, **kwargs)
+
+    return wrapper
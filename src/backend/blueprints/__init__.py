@@ -1,11 +1,19 @@
 from quart import Blueprint
 
+from .admin import admin_bp
 from .index import index_bp
 from .daemon import daemon_bp
 from .market import market_bp
 from .analytics import analytics_bp
 
-__all__ = ["api_bp", "analytics_bp", "daemon_bp", "index_bp", "market_bp"]
+__all__ = [
+    "api_bp",
+    "admin_bp",
+    "analytics_bp",
+    "daemon_bp",
+    "index_bp",
+    "market_bp",
+]
 
 api_bp: Blueprint = Blueprint("api", __name__, url_prefix="/v1")
 
@@ -13,3 +21,4 @@ api_bp.register_blueprint(index_bp)
 api_bp.register_blueprint(daemon_bp)
 api_bp.register_blueprint(market_bp)
 api_bp.register_blueprint(analytics_bp)
+api_bp.register_blueprint(admin_bp)
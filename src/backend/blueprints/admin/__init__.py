@@ -0,0 +1,5 @@
+from quart import Blueprint
+
+admin_bp: Blueprint = Blueprint("admin", __name__)
+
+from . import routes  # noqa: E402, F401
@@ -0,0 +1,115 @@
+from typing import TypeVar
+
+import os
+import time
+
+from quart import Response, abort, jsonify, request, current_app
+
+from backend.auth import check_admin_token
+from backend.profiling import (
+    GROUPINGS,
+    ProfilingError,
+    loop_monitor,
+    stack_sampler,
+    allocation_tracer,
+)
+
+from . import admin_bp
+
+N = TypeVar("N", int, float)
+
+
+def _arg(name: str, default: N, low: N, high: N) -> N:
+    try:
+        value = type(default)(request.args.get(name, default))
+
+    except ValueError:
+        raise ValueError(f"Invalid {name}") from None
+
+    if not low <= value <= high:
+        raise ValueError(f"Invalid {name} (must be between {low} and {high})")
+
+    return value
+
+
+def _max_seconds() -> float:
+    return float(current_app.config.get("PROFILING_MAX_SECONDS", 60))
+
+
+def _report(body: str, name: str) -> tuple[Response, int]:
+    # Reports are per worker, so the name says which one produced it.
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    response = Response(body, mimetype="text/plain")
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="{name}-{os.getpid()}-{stamp}.txt"'
+    )
+    return response, 200
+
+
+@admin_bp.before_request
+async def _authorize() -> tuple[Response, int] | None:
+    # Without it, the admin routes do not exist as far as clients can tell.
+    if not current_app.config.get("PROFILING_ENABLED", False):
+        abort(404)
+
+    return check_admin_token()
+
+
+@admin_bp.errorhandler(ProfilingError)
+async def _handle_profiling_error(e: ProfilingError) -> tuple[Response, int]:
+    return jsonify({"status": "error", "error": str(e)}), 409
+
+
+@admin_bp.errorhandler(ValueError)
+async def _handle_value_error(e: ValueError) -> tuple[Response, int]:
+    return jsonify({"status": "error", "error": str(e)}), 400
+
+
+@admin_bp.route("/admin/profiling/memory/start", methods=["POST"])
+async def _admin_memory_start() -> tuple[Response, int]:
+    allocation_tracer.start(frames=_arg("frames", 25, 1, 100))
+
+    return jsonify({"status": "success", "result": allocation_tracer.stats()}), 200
+
+
+@admin_bp.route("/admin/profiling/memory/stop", methods=["POST"])
+async def _admin_memory_stop() -> tuple[Response, int]:
+    allocation_tracer.stop()
+
+    return jsonify({"status": "success", "result": allocation_tracer.stats()}), 200
+
+
+@admin_bp.route("/admin/profiling/memory/diff", methods=["GET"])
+async def _admin_memory_diff() -> tuple[Response, int]:
+    group_by: str = request.args.get("group_by", "lineno")
+
+    if group_by not in GROUPINGS:
+        raise ValueError(f"Invalid group_by (must be one of {', '.join(GROUPINGS)})")
+
+    report = allocation_tracer.diff(
+        group_by=group_by,
+        limit=_arg("limit", 50, 1, 1000),
+        rebase=request.args.get("rebase", "false").lower() == "true",
+    )
+
+    return _report(report, "memory")
+
+
+@admin_bp.route("/admin/profiling/cpu", methods=["GET"])
+async def _admin_cpu() -> tuple[Response, int]:
+    report = await stack_sampler.profile(
+        seconds=_arg("seconds", 10.0, 0.1, _max_seconds()),
+        interval=_arg("interval", 0.005, 0.001, 1.0),
+    )
+
+    return _report(report, "cpu")
+
+
+@admin_bp.route("/admin/profiling/loop", methods=["GET"])
+async def _admin_loop() -> tuple[Response, int]:
+    report = await loop_monitor.capture(
+        seconds=_arg("seconds", 10.0, 0.1, _max_seconds()),
+        threshold=_arg("threshold", 0.1, 0.001, 10.0),
+    )
+
+    return _report(report, "loop")
@@ -0,0 +1,157 @@
+from typing import Any
+
+import asyncio
+import logging
+
+from pymongo import UpdateOne
+
+from backend import metrics
+from backend.factory import db
+
+from .rollups import previous_keys, record_upserts
+
+logger = logging.getLogger(__name__)
+
+
+def _located(fields: dict[str, Any]) -> bool:
+    # Full submissions carry the geolocation; refreshes of known nodes do not.
+    return "cc" in fields
+
+
+class WriteBuffer:
+    """
+    Coalesces analytics submissions in memory and writes them to Mongo in bulk.
+
+    Submissions are keyed by IP, so a node that checks in several times within
+    a window only costs one upsert (the last write wins). The buffer is flushed
+    every ``interval`` seconds, as soon as it holds ``max_size`` nodes, and on
+    shutdown, each time as a single unordered ``bulk_write``.
+    """
+
+    def __init__(self, max_size: int = 500, interval: float = 5.0) -> None:
+        self.max_size = max_size
+        self.interval = interval
+        self.flushes: int = 0
+        self.written: int = 0
+        self.coalesced: int = 0
+
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._full = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._flushing: asyncio.Task[None] | None = None
+
+    def configure(self, *, max_size: int, interval: float) -> None:
+        self.max_size = max_size
+        self.interval = interval
+
+    def __contains__(self, ip: str) -> bool:
+        return ip in self._pending
+
+    def add(self, ip: str, fields: dict[str, Any]) -> None:
+        if ip in self._pending:
+            self.coalesced += 1
+
+        self._pending[ip] = {**self._pending.get(ip, {}), **fields}
+
+        if len(self._pending) >= self.max_size:
+            self._full.set()
+
+    async def flush(self) -> None:
+        self._full.clear()
+
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+
+        try:
+            previous = await previous_keys(batch)
+
+            # A refresh for a node pruned since it was accepted has no
+            # location to add it back with, so it is dropped. Refreshes are
+            # never upserted either, in case the prune lands mid-flush.
+            batch = {
+                ip: fields
+                for ip, fields in batch.items()
+                if ip in previous or _located(fields)
+            }
+            if not batch:
+                return
+
+            await db.get_collection("analytics").bulk_write(
+                [
+                    UpdateOne({"ip": ip}, {"$set": fields}, upsert=_located(fields))
+                    for ip, fields in batch.items()
+                ],
+                ordered=False,
+            )
+
+        # Not only PyMongoError: an unencodable document or a dropped
+        # connection must not lose the batch either.
+        except Exception as e:
+            logger.error(f"Failed to flush {len(batch)} analytics submissions: {e}")
+
+            # Keep the batch for the next flush, unless a newer submission for
+            # the same node has arrived in the meantime.
+            for ip, fields in batch.items():
+                self._pending.setdefault(ip, fields)
+
+            return
+
+        self.flushes += 1
+        self.written += len(batch)
+
+        try:
+            await record_upserts(previous, batch)
+
+        except Exception as e:
+            # The nodes themselves are stored; the next rebuild will recount.
+            logger.error(f"Failed to update analytics rollups: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.interval)
+
+            except asyncio.TimeoutError:
+                pass
+
+            # Shielded, so that stopping the loop never abandons a batch that
+            # has already been taken out of the buffer halfway through writing.
+            self._flushing = asyncio.create_task(self.flush())
+
+            try:
+                await asyncio.shield(self._flushing)
+
+            except Exception as e:
+                # flush keeps failed batches itself; the loop must outlive it.
+                logger.error(f"Analytics flush failed: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if self._flushing is not None:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+            self._flushing = None
+
+        await self.flush()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "written": self.written,
+            "coalesced": self.coalesced,
+        }
+
+
+write_buffer: WriteBuffer = WriteBuffer()
+
+metrics.register("analytics_buffer", write_buffer.stats)
@@ -0,0 +1,317 @@
+from typing import Any
+
+import os
+import time
+import asyncio
+import logging
+import ipaddress
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone, timedelta
+from collections import OrderedDict
+
+import aiohttp
+
+from backend import metrics
+from backend.factory import db
+from backend.admission import PRIORITY_LOW, Overloaded, limiters
+
+try:
+    import maxminddb
+
+    HAS_MAXMINDDB: bool = True
+
+except ImportError:
+    HAS_MAXMINDDB = False
+
+logger = logging.getLogger(__name__)
+
+GeoEntry = dict[str, Any]
+
+
+class GeoLookupError(Exception):
+    pass
+
+
+class GeoBackend(ABC):
+    """
+    Resolves an IP to the bogon verdict and the ``lat``/``long``/``cn``/``cc``
+    fields stored with each node.
+
+    ``locate`` returns ``None`` when the IP cannot be placed, and either method
+    raises ``GeoLookupError`` when the lookup itself fails. Backends that are
+    slower than a cache round trip set ``cached`` so results go through
+    ``geo_cache``.
+    """
+
+    cached: bool = False
+
+    @abstractmethod
+    async def is_bogon(self, ip: str) -> bool: ...
+
+    @abstractmethod
+    async def locate(self, ip: str) -> dict[str, Any] | None: ...
+
+
+class HTTPGeoBackend(GeoBackend):
+    """Looks IPs up with ipinfo.io (bogons) and keycdn.com (geolocation)."""
+
+    cached = True
+
+    async def is_bogon(self, ip: str) -> bool:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"https://ipinfo.io/{ip}/json") as res:
+                if res.status != 200:
+                    raise GeoLookupError(f"ipinfo.io returned {res.status}")
+
+                data: dict[str, Any] = await res.json()
+
+        return "bogon" in data
+
+    async def locate(self, ip: str) -> dict[str, Any] | None:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                f"https://tools.keycdn.com/geo.json?host={ip}",
+                headers={"User-Agent": "keycdn-tools:https://map.nerva.one"},
+            ) as res:
+                if res.status != 200:
+                    raise GeoLookupError(f"keycdn.com returned {res.status}")
+
+                geo: dict[str, Any] = (await res.json())["data"]["geo"]
+
+        if geo["ip"] != ip:
+            return None
+
+        return {
+            "lat": geo["latitude"],
+            "long": geo["longitude"],
+            "cn": geo["continent_code"],
+            "cc": geo["country_code"],
+        }
+
+
+class MaxMindGeoBackend(GeoBackend):
+    """
+    Looks IPs up in a local MaxMind-format (GeoIP2/GeoLite2 City) database.
+
+    The database is memory-mapped, so lookups are in-process and make no
+    outbound requests. ``reload`` reopens it off the event loop and swaps the
+    reader in once it is ready.
+    """
+
+    def __init__(self, path: str) -> None:
+        if not HAS_MAXMINDDB:
+            raise RuntimeError("The maxmind geolocation backend requires maxminddb")
+
+        self.path = path
+        self.mtime: float = 0.0
+        self._reader: Any = None
+
+    def _open(self) -> tuple[Any, float]:
+        mtime = os.stat(self.path).st_mtime
+        return maxminddb.open_database(self.path, maxminddb.MODE_MMAP), mtime
+
+    async def reload(self, *, force: bool = False) -> None:
+        try:
+            if not force and os.stat(self.path).st_mtime == self.mtime:
+                return
+
+            reader, mtime = await asyncio.to_thread(self._open)
+
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load GeoIP database {self.path}: {e}")
+            return
+
+        previous, self._reader, self.mtime = self._reader, reader, mtime
+
+        if previous is not None:
+            previous.close()
+
+    async def is_bogon(self, ip: str) -> bool:
+        try:
+            return not ipaddress.ip_address(ip).is_global
+
+        except ValueError:
+            return True
+
+    async def locate(self, ip: str) -> dict[str, Any] | None:
+        if self._reader is None:
+            raise GeoLookupError("GeoIP database is not loaded")
+
+        try:
+            record = self._reader.get(ip)
+
+        except ValueError:
+            return None
+
+        if not record or "location" not in record:
+            return None
+
+        return {
+            "lat": record["location"].get("latitude"),
+            "long": record["location"].get("longitude"),
+            "cn": record.get("continent", {}).get("code"),
+            "cc": record.get("country", {}).get("iso_code"),
+        }
+
+
+class GeoCache:
+    """
+    Two-tier cache of IP lookups: an in-process LRU in front of a Mongo
+    collection whose TTL index expires entries server-side.
+
+    Entries hold the bogon verdict and, once looked up, the geolocation, or
+    ``None`` with ``located`` set when the IP could not be placed, so a node
+    that has been seen before needs no outbound HTTP at all until its entry
+    expires.
+    """
+
+    def __init__(self, size: int = 10_000, ttl: int = 604_800) -> None:
+        self.size = size
+        self.ttl = ttl
+        self.memory_hits: int = 0
+        self.db_hits: int = 0
+        self.misses: int = 0
+
+        self._entries: OrderedDict[str, tuple[float, GeoEntry]] = OrderedDict()
+
+    @property
+    def collection(self) -> Any:
+        return db.get_collection("geo_cache")
+
+    def configure(self, *, size: int, ttl: int) -> None:
+        self.size = size
+        self.ttl = ttl
+        self._entries.clear()
+
+    async def ensure_indexes(self) -> None:
+        # create_index refuses to change the options of an existing index, so
+        # a changed GEO_CACHE_TTL is applied to it in place with collMod.
+        async for index in self.collection.list_indexes():
+            if dict(index["key"]) != {"time": 1}:
+                continue
+
+            if index.get("expireAfterSeconds") != self.ttl:
+                await db.command(
+                    "collMod",
+                    "geo_cache",
+                    index={"name": index["name"], "expireAfterSeconds": self.ttl},
+                )
+
+            return
+
+        await self.collection.create_index(
+            "time", name="time_ttl", expireAfterSeconds=self.ttl
+        )
+
+    def _remember(self, ip: str, entry: GeoEntry, expires: float) -> None:
+        self._entries[ip] = (expires, entry)
+        self._entries.move_to_end(ip)
+
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    async def get(self, ip: str) -> GeoEntry | None:
+        cached = self._entries.get(ip)
+
+        if cached is not None:
+            expires, entry = cached
+            if expires > time.monotonic():
+                self._entries.move_to_end(ip)
+                self.memory_hits += 1
+                return entry
+
+            del self._entries[ip]
+
+        now = datetime.now(timezone.utc)
+        async with limiters["mongo"].slot(PRIORITY_LOW):
+            document = await self.collection.find_one(
+                {"_id": ip, "time": {"$gt": now - timedelta(seconds=self.ttl)}}
+            )
+
+        if document is None:
+            self.misses += 1
+            return None
+
+        entry = {
+            "bogon": document["bogon"],
+            "geo": document.get("geo"),
+            "located": document.get("located", document.get("geo") is not None),
+        }
+        age = (now - document["time"].replace(tzinfo=timezone.utc)).total_seconds()
+        self._remember(ip, entry, time.monotonic() + self.ttl - age)
+        self.db_hits += 1
+        return entry
+
+    async def put(self, ip: str, entry: GeoEntry) -> None:
+        self._remember(ip, entry, time.monotonic() + self.ttl)
+
+        # The lookup has already been paid for; when Mongo is saturated it is
+        # kept in memory only rather than failing the request over it.
+        try:
+            async with limiters["mongo"].slot(PRIORITY_LOW):
+                await self.collection.replace_one(
+                    {"_id": ip},
+                    {**entry, "time": datetime.now(timezone.utc)},
+                    upsert=True,
+                )
+
+        except Overloaded:
+            logger.warning("Skipped storing a location, Mongo is overloaded")
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                round((self.memory_hits + self.db_hits) / lookups, 4)
+                if lookups
+                else 0.0
+            ),
+        }
+
+
+geo_cache: GeoCache = GeoCache()
+
+geo_backend: GeoBackend = HTTPGeoBackend()
+
+
+def configure_backend(config: dict[str, Any]) -> None:
+    global geo_backend
+
+    if config.get("GEOIP_BACKEND", "http") == "maxmind":
+        geo_backend = MaxMindGeoBackend(config["GEOIP_DATABASE"])
+
+    else:
+        geo_backend = HTTPGeoBackend()
+
+
+async def reload_backend(*, force: bool = False) -> None:
+    if isinstance(geo_backend, MaxMindGeoBackend):
+        await geo_backend.reload(force=force)
+
+
+async def resolve(ip: str, *, locate: bool) -> GeoEntry:
+    entry = await geo_cache.get(ip) if geo_backend.cached else None
+    changed = False
+
+    if entry is None:
+        entry = {"bogon": await geo_backend.is_bogon(ip), "geo": None}
+        changed = True
+
+    # An IP that could not be placed is remembered as such, rather than
+    # looked up again on every submission; a failed lookup is not.
+    if locate and not entry["bogon"] and not entry.get("located"):
+        entry["geo"] = await geo_backend.locate(ip)
+        entry["located"] = True
+        changed = True
+
+    if changed and geo_backend.cached:
+        await geo_cache.put(ip, entry)
+
+    return entry
+
+
+metrics.register("geo_cache", geo_cache.stats)
@@ -0,0 +1,202 @@
+from typing import Any
+
+import time
+import logging
+from collections import Counter
+from collections.abc import Iterable
+
+from pymongo import UpdateOne
+
+from backend.factory import db
+
+logger = logging.getLogger(__name__)
+
+# Node fields that are rolled up, with the key each is served under.
+DIMENSIONS: dict[str, str] = {
+    "cc": "countries",
+    "cn": "continents",
+    "version": "versions",
+}
+
+UNKNOWN: str = "unknown"
+
+NodeKeys = dict[str, str]
+
+_cache: tuple[float, dict[str, Any]] | None = None
+
+
+def _rollup_id(dimension: str, key: str) -> str:
+    return f"{dimension}:{key}"
+
+
+def _keys(document: dict[str, Any]) -> NodeKeys:
+    return {
+        dimension: str(document.get(dimension) or UNKNOWN)
+        for dimension in DIMENSIONS
+    }
+
+
+async def _increment(deltas: Counter[tuple[str, str]]) -> None:
+    operations = [
+        UpdateOne(
+            {"_id": _rollup_id(dimension, key)},
+            {
+                "$inc": {"count": delta},
+                "$setOnInsert": {"dimension": dimension, "key": key},
+            },
+            upsert=True,
+        )
+        for (dimension, key), delta in deltas.items()
+        if delta
+    ]
+
+    if not operations:
+        return
+
+    rollups = db.get_collection("analytics_rollups")
+    await rollups.bulk_write(operations, ordered=False)
+
+    # A count can only go negative if the incremental updates have drifted
+    # from the nodes stored; say so rather than dropping the evidence.
+    async for rollup in rollups.find({"count": {"$lt": 0}}):
+        logger.warning(
+            f"Analytics rollup {rollup['_id']} is negative ({rollup['count']}); "
+            "the next rebuild will recount it"
+        )
+
+    await rollups.delete_many({"count": {"$lte": 0}})
+
+
+async def previous_keys(ips: Iterable[str]) -> dict[str, NodeKeys]:
+    return {
+        document["ip"]: _keys(document)
+        async for document in db.get_collection("analytics").find(
+            {"ip": {"$in": list(ips)}},
+            {
+                "_id": False,
+                "ip": True,
+                **{dimension: True for dimension in DIMENSIONS},
+            },
+        )
+    }
+
+
+async def record_upserts(
+    previous: dict[str, NodeKeys], batch: dict[str, dict[str, Any]]
+) -> None:
+    deltas: Counter[tuple[str, str]] = Counter()
+
+    for ip, fields in batch.items():
+        before = previous.get(ip)
+        # A refresh may carry no location; the node keeps its stored one.
+        after = _keys({**(before or {}), **fields})
+
+        for dimension in DIMENSIONS:
+            if before is not None:
+                deltas[(dimension, before[dimension])] -= 1
+
+            deltas[(dimension, after[dimension])] += 1
+
+    await _increment(deltas)
+
+
+async def record_removals(documents: Iterable[dict[str, Any]]) -> None:
+    deltas: Counter[tuple[str, str]] = Counter()
+
+    for document in documents:
+        for dimension, key in _keys(document).items():
+            deltas[(dimension, key)] -= 1
+
+    await _increment(deltas)
+
+
+async def rebuild_rollups() -> None:
+    # Recount everything server-side and atomically swap the result in with
+    # $out. This corrects any drift from concurrent incremental updates.
+    await (
+        db.get_collection("analytics")
+        .aggregate(
+            [
+                {
+                    "$facet": {
+                        dimension: [
+                            {
+                                "$group": {
+                                    # Missing, null and "" are all unknown,
+                                    # as in _keys.
+                                    "_id": {
+                                        "$cond": [
+                                            {
+                                                "$eq": [
+                                                    {
+                                                        "$ifNull": [
+                                                            f"${dimension}",
+                                                            "",
+                                                        ]
+                                                    },
+                                                    "",
+                                                ]
+                                            },
+                                            UNKNOWN,
+                                            f"${dimension}",
+                                        ]
+                                    },
+                                    "count": {"$sum": 1},
+                                }
+                            }
+                        ]
+                        for dimension in DIMENSIONS
+                    }
+                },
+                {
+                    "$project": {
+                        "rows": {
+                            "$concatArrays": [
+                                {
+                                    "$map": {
+                                        "input": f"${dimension}",
+                                        "as": "row",
+                                        "in": {
+                                            "_id": {
+                                                "$concat": [
+                                                    f"{dimension}:",
+                                                    {"$toString": "$$row._id"},
+                                                ]
+                                            },
+                                            "dimension": dimension,
+                                            "key": {"$toString": "$$row._id"},
+                                            "count": "$$row.count",
+                                        },
+                                    }
+                                }
+                                for dimension in DIMENSIONS
+                            ]
+                        }
+                    }
+                },
+                {"$unwind": "$rows"},
+                {"$replaceRoot": {"newRoot": "$rows"}},
+                {"$out": "analytics_rollups"},
+            ]
+        )
+        .to_list(None)
+    )
+
+
+async def get_rollups(ttl: float) -> dict[str, Any]:
+    global _cache
+
+    if _cache is not None and _cache[0] > time.monotonic():
+        return _cache[1]
+
+    result: dict[str, Any] = {name: {} for name in DIMENSIONS.values()}
+
+    async for document in db.get_collection("analytics_rollups").find():
+        result[DIMENSIONS[document["dimension"]]][document["key"]] = document[
+            "count"
+        ]
+
+    result["total"] = sum(result["countries"].values())
+
+    _cache = (time.monotonic() + ttl, result)
+    return result
@@ -1,14 +1,33 @@
 from typing import Any
 
-from datetime import datetime
+import json
+from datetime import datetime, timedelta
+from contextlib import AsyncExitStack
 
 import aiohttp
+from bson import ObjectId
 from quart import Response, jsonify, request, current_app
+from bson.errors import InvalidId
+from flask.sansio.blueprints import BlueprintSetupState
 
 from backend.factory import db
+from backend.admission import (
+    PRIORITY_LOW,
+    PRIORITY_HIGH,
+    Overloaded,
+    admit,
+    limiters,
+)
 
 from . import analytics_bp
 
+FETCH_PROJECTION: dict[str, bool] = {
+    field: True for field in ("version", "time", "ip", "lat", "long", "cn", "cc")
+}
+
+# Nodes that have not checked in for more than seven full days are pruned.
+STALE_AFTER: timedelta = timedelta(days=8)
+
 
 def _mask_ip(ip: str) -> str:
     parts = ip.split(".")
@@ -17,32 +36,151 @@ def _mask_ip(ip: str) -> str:
     return "*"
 
 
+def _format_row(document: dict[str, Any], paginated: bool) -> dict[str, Any]:
+    time = document.get("time")
+    row = {
+        "version": document.get("version"),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S")
+        if isinstance(time, datetime)
+        else time,
+        "ip": _mask_ip(document.get("ip", "")),
+        "lat": document.get("lat"),
+        "long": document.get("long"),
+        "cn": document.get("cn"),
+        "cc": document.get("cc"),
+    }
+
+    if paginated:
+        row["id"] = str(document["_id"])
+
+    return row
+
+
+class _Rows:
+    """
+    A cursor's documents as ndjson lines, holding the Mongo slot in ``slot``
+    until the cursor is exhausted or the response is closed. Quart closes the
+    body even if it was never iterated, which a generator would not notice.
+    """
+
+    def __init__(self, cursor: Any, paginated: bool, slot: AsyncExitStack) -> None:
+        self._documents = cursor.__aiter__()
+        self._paginated = paginated
+        self._slot = slot
+
+    def __aiter__(self) -> "_Rows":
+        return self
+
+    async def __anext__(self) -> bytes:
+        try:
+            document = await self._documents.__anext__()
+
+        except BaseException:
+            await self.aclose()
+            raise
+
+        return json.dumps(_format_row(document, self._paginated)).encode() + b"\n"
+
+    async def aclose(self) -> None:
+        await self._slot.aclose()
+
+
+async def _known(ip: str) -> bool:
+    from .buffer import write_buffer
+
+    if ip in write_buffer:
+        return True
+
+    async with limiters["mongo"].slot(PRIORITY_LOW):
+        document = await db.get_collection("analytics").find_one(
+            {"ip": ip}, {"_id": True}
+        )
+
+    return document is not None
+
+
 @analytics_bp.route("/analytics/fetch", methods=["GET"])
 async def _analytics_fetch() -> tuple[Response, int]:
     if not current_app.config["ANALYTICS_ENABLED"]:
         return jsonify({"status": "error", "message": "Analytics is disabled"}), 400
 
-    try:
-        collection = db.get_collection("analytics")
+    limit_arg: str | None = request.args.get("limit", None)
+    cursor_arg: str | None = request.args.get("cursor", None)
+    country: str | None = request.args.get("cc", None)
+    version: str | None = request.args.get("version", None)
+    ndjson: bool = request.args.get("format") == "ndjson"
+
+    query: dict[str, Any] = {}
+
+    if country:
+        query["cc"] = country.upper()
+
+    if version:
+        query["version"] = version
+
+    limit: int = 0
+    paginated: bool = limit_arg is not None or cursor_arg is not None
 
-        result: list[dict[str, Any]] = []
-        async for document in collection.find():
-            time = document.get("time")
-            result.append(
+    if paginated:
+        max_limit: int = current_app.config.get("ANALYTICS_FETCH_MAX_LIMIT", 1000)
+
+        try:
+            limit = int(limit_arg) if limit_arg is not None else max_limit
+
+        except ValueError:
+            return jsonify({"status": "error", "message": "Invalid limit"}), 400
+
+        if not 0 < limit <= max_limit:
+            return jsonify(
                 {
-                    "version": document.get("version"),
-                    "time": time.strftime("%Y-%m-%d %H:%M:%S")
-                    if isinstance(time, datetime)
-                    else time,
-                    "ip": _mask_ip(document.get("ip", "")),
-                    "lat": document.get("lat"),
-                    "long": document.get("long"),
-                    "cn": document.get("cn"),
-                    "cc": document.get("cc"),
+                    "status": "error",
+                    "message": f"Invalid limit (must be between 1 and {max_limit})",
                 }
+            ), 400
+
+        if cursor_arg is not None:
+            try:
+                query["_id"] = {"$gt": ObjectId(cursor_arg)}
+
+            except InvalidId:
+                return jsonify({"status": "error", "message": "Invalid cursor"}), 400
+
+    try:
+        async with AsyncExitStack() as stack:
+            await stack.enter_async_context(limiters["mongo"].slot())
+
+            cursor = db.get_collection("analytics").find(
+                query, {**FETCH_PROJECTION, "_id": paginated}
             )
 
-        return jsonify({"status": "success", "result": result}), 200
+            if paginated:
+                cursor = cursor.sort("_id", 1).limit(limit)
+
+            # A streamed response reads the cursor after the route returns, so
+            # the slot goes with it rather than being released here.
+            if ndjson:
+                return Response(
+                    _Rows(cursor, paginated, stack.pop_all()),
+                    mimetype="application/x-ndjson",
+                ), 200
+
+            result: list[dict[str, Any]] = [
+                _format_row(document, paginated) async for document in cursor
+            ]
+
+        if not paginated:
+            return jsonify({"status": "success", "result": result}), 200
+
+        return jsonify(
+            {
+                "status": "success",
+                "result": result,
+                "next_cursor": result[-1]["id"] if len(result) == limit else None,
+            }
+        ), 200
+
+    except Overloaded:
+        raise
 
     except Exception:
         return jsonify(
@@ -50,88 +188,135 @@ async def _analytics_fetch() -> tuple[Response, int]:
         ), 400
 
 
+@analytics_bp.route("/analytics/aggregate", methods=["GET"])
+@admit("mongo", PRIORITY_HIGH)
+async def _analytics_aggregate() -> tuple[Response, int]:
+    if not current_app.config["ANALYTICS_ENABLED"]:
+        return jsonify({"status": "error", "message": "Analytics is disabled"}), 400
+
+    # Imported here, like the other analytics modules, so that workers with
+    # analytics disabled never load the Mongo driver or the GeoIP reader.
+    from .rollups import get_rollups
+
+    try:
+        result = await get_rollups(
+            current_app.config.get("ANALYTICS_AGGREGATE_TTL", 60)
+        )
+
+        return jsonify({"status": "success", "result": result}), 200
+
+    except Exception:
+        return jsonify(
+            {"status": "error", "message": "Failed to aggregate analytics"}
+        ), 400
+
+
 @analytics_bp.route("/analytics/submit", methods=["POST"])
 async def _analytics_submit() -> tuple[Response, int]:
     if not current_app.config["ANALYTICS_ENABLED"]:
         return jsonify({"status": "error", "message": "Analytics is disabled"}), 400
 
-    try:
-        collection = db.get_collection("analytics")
+    from .geo import GeoLookupError, resolve
+    from .buffer import write_buffer
 
+    try:
         ip: str | None = request.headers.get("CF-Connecting-IP", None)
         if not ip:
             ip = request.headers.get("X-Forwarded-For", request.remote_addr)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"https://ipinfo.io/{ip}/json") as res:
-                if res.status != 200:
-                    return (
-                        jsonify(
-                            {"status": "error", "message": "Failed to fetch IP data"}
-                        ),
-                        400,
-                    )
+        if not ip:
+            return jsonify({"status": "error", "message": "Invalid IP"}), 400
 
-                data: dict[str, Any] = await res.json()
+        try:
+            entry = await resolve(ip, locate=False)
 
-                if "bogon" in data:
-                    return jsonify({"status": "error", "message": "Invalid IP"}), 400
+        except (GeoLookupError, aiohttp.ClientError):
+            return (
+                jsonify({"status": "error", "message": "Failed to fetch IP data"}),
+                400,
+            )
+
+        if entry["bogon"]:
+            return jsonify({"status": "error", "message": "Invalid IP"}), 400
 
         ua: str | None = request.headers.get("User-Agent", None)
         if not ua or not ua[0:9] == "nerva-cli":
             return jsonify({"status": "error", "message": "Invalid User-Agent"}), 400
 
         version: str = ua[10:]
+        fields: dict[str, Any] = {"version": version, "time": datetime.now()}
 
-        if await collection.find_one({"ip": ip}) is not None:
-            await collection.update_one(
-                {"ip": ip},
-                {"$set": {"version": version, "time": datetime.now()}},
-            )
+        located: dict[str, Any] | None
 
+        try:
+            located = await resolve(ip, locate=True)
+
+        except (GeoLookupError, aiohttp.ClientError):
+            located = None
+
+        if located is not None and located["geo"] is not None:
+            write_buffer.add(ip, {**fields, **located["geo"]})
             return jsonify({"status": "success"}), 200
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"https://tools.keycdn.com/geo.json?host={ip}",
-                headers={"User-Agent": "keycdn-tools:https://map.nerva.one"},
-            ) as res:
-                if res.status != 200:
-                    return (
-                        jsonify(
-                            {"status": "error", "message": "Failed to fetch IP data"}
-                        ),
-                        400,
-                    )
-
-                geo: dict[str, Any] = (await res.json())["data"]["geo"]
-
-        if geo["ip"] != ip:
-            return jsonify({"status": "error", "message": "Invalid IP"}), 400
+        # Location is only needed to add a node; one already known keeps its
+        # stored location and is refreshed regardless, so it is not pruned.
+        if not await _known(ip):
+            message = (
+                "Invalid IP" if located is not None else "Failed to fetch IP data"
+            )
+            return jsonify({"status": "error", "message": message}), 400
 
-        await collection.insert_one(
-            {
-                "version": version,
-                "time": datetime.now(),
-                "ip": ip,
-                "lat": geo["latitude"],
-                "long": geo["longitude"],
-                "cn": geo["continent_code"],
-                "cc": geo["country_code"],
-            }
-        )
+        write_buffer.add(ip, fields)
 
         return jsonify({"status": "success"}), 200
 
+    except Overloaded:
+        raise
+
     except Exception:
         return jsonify(
             {"status": "error", "message": "Failed to submit analytics"}
         ), 400
 
 
+@analytics_bp.record_once
+def _configure(state: BlueprintSetupState) -> None:
+    if not state.app.config["ANALYTICS_ENABLED"]:
+        return
+
+    from .geo import geo_cache, configure_backend
+    from .buffer import write_buffer
+
+    geo_cache.configure(
+        size=state.app.config.get("GEO_CACHE_SIZE", 10_000),
+        ttl=state.app.config.get("GEO_CACHE_TTL", 604_800),
+    )
+    configure_backend(state.app.config)
+    write_buffer.configure(
+        max_size=state.app.config.get("ANALYTICS_FLUSH_SIZE", 500),
+        interval=state.app.config.get("ANALYTICS_FLUSH_INTERVAL", 5),
+    )
+
+
 async def prune_stale_analytics() -> None:
-    collection = db.get_collection("analytics")
+    from .rollups import DIMENSIONS, record_removals
 
-    async for document in collection.find():
-        if (datetime.now() - document["time"]).days > 7:
-            await collection.delete_one({"ip": document["ip"]})
+    collection = db.get_collection("analytics")
+    query: dict[str, Any] = {"time": {"$lt": datetime.now() - STALE_AFTER}}
+
+    stale = await collection.find(
+        query, {"_id": True, **{dimension: True for dimension in DIMENSIONS}}
+    ).to_list(None)
+    ids = [document["_id"] for document in stale]
+
+    # Still stale at deletion, so a node refreshed since it was selected is
+    # kept, and then left out of the removals counted.
+    await collection.delete_many({"_id": {"$in": ids}, **query})
+    kept = {
+        document["_id"]
+        async for document in collection.find({"_id": {"$in": ids}}, {"_id": True})
+    }
+
+    await record_removals(
+        document for document in stale if document["_id"] not in kept
+    )
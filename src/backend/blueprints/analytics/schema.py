@@ -0,0 +1,86 @@
+from typing import Any
+
+import logging
+from collections.abc import Callable, Awaitable
+
+from pymongo import IndexModel
+
+from backend.factory import db
+
+logger = logging.getLogger(__name__)
+
+
+async def _coerce_times(collection: Any) -> None:
+    # Older documents may carry string or numeric times, which neither sort nor
+    # range-match against datetimes. Anything that does not convert is treated
+    # as a fresh check-in rather than dropped.
+    result = await collection.update_many(
+        {"time": {"$not": {"$type": "date"}}},
+        [
+            {
+                "$set": {
+                    "time": {
+                        "$convert": {
+                            "input": "$time",
+                            "to": "date",
+                            "onError": "$$NOW",
+                            "onNull": "$$NOW",
+                        }
+                    }
+                }
+            }
+        ],
+    )
+
+    if result.modified_count:
+        logger.info(f"Converted {result.modified_count} analytics times to dates")
+
+
+async def _drop_duplicate_ips(collection: Any) -> None:
+    # The unique index on ip cannot be built while duplicates exist, so keep
+    # only the most recent document per node.
+    duplicates: list[Any] = []
+
+    async for group in collection.aggregate(
+        [
+            {"$sort": {"time": -1}},
+            {"$group": {"_id": "$ip", "ids": {"$push": "$_id"}}},
+            {"$match": {"ids.1": {"$exists": True}}},
+        ],
+        allowDiskUse=True,
+    ):
+        duplicates.extend(group["ids"][1:])
+
+    if duplicates:
+        await collection.delete_many({"_id": {"$in": duplicates}})
+        logger.info(f"Removed {len(duplicates)} duplicate analytics documents")
+
+
+# Applied in order, once per database. Append new steps; never reorder them.
+MIGRATIONS: list[Callable[[Any], Awaitable[None]]] = [
+    _coerce_times,
+    _drop_duplicate_ips,
+]
+
+INDEXES: list[IndexModel] = [
+    IndexModel("ip", unique=True, name="ip_unique"),
+    IndexModel("time", name="time"),
+    IndexModel([("cc", 1), ("_id", 1)], name="cc_id"),
+    IndexModel([("version", 1), ("_id", 1)], name="version_id"),
+]
+
+
+async def ensure_analytics_schema() -> None:
+    collection = db.get_collection("analytics")
+    migrations = db.get_collection("migrations")
+
+    state = await migrations.find_one({"_id": "analytics"}) or {}
+    applied: int = state.get("version", 0)
+
+    for version, migration in enumerate(MIGRATIONS[applied:], start=applied + 1):
+        await migration(collection)
+        await migrations.update_one(
+            {"_id": "analytics"}, {"$set": {"version": version}}, upsert=True
+        )
+
+    await collection.create_indexes(INDEXES)
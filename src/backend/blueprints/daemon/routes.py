@@ -1,13 +1,137 @@
 from typing import Any
 
+import json
+import math
+import base64
+import binascii
+from collections.abc import Callable
+
 from quart import Response, jsonify, request
 
+from backend.cache import cached
+from backend.chain import DEFAULT_WINDOW, chain_follower
 from backend.factory import daemon, daemon_legacy
+from backend.emission import generated_coins
+from backend.admission import (
+    PRIORITY_LOW,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    admit,
+    limiters,
+)
+from backend.ratelimit import rate_cost
 
 from . import daemon_bp
 
+# Header ranges at least this wide are queued behind cheaper daemon calls.
+WIDE_RANGE: int = 100
+
+# Most blocks /daemon/get_blocks_range returns, and fetches, per request.
+BLOCKS_PER_PAGE: int = 100
+
+
+# Most transactions /daemon/get_transaction_pool returns per page.
+MAX_POOL_PAGE: int = 1000
+
+POOL_SORTS: dict[str, Callable[[dict[str, Any]], float]] = {
+    "fee_per_byte": lambda tx: (
+        tx.get("fee", 0) / max(tx.get("weight") or tx.get("blob_size") or 1, 1)
+    ),
+    "receive_time": lambda tx: tx.get("receive_time", 0),
+}
+
+
+def _pool_cursor(sort: str, order: str, key: tuple[float, str]) -> str:
+    payload = json.dumps([sort, order, *key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _pool_after(cursor: str, sort: str, order: str) -> tuple[float, str] | None:
+    """
+    The (key, hash) pair a cursor from ``_pool_cursor`` resumes after, or None
+    if it is malformed or was issued for another sort or order.
+    """
+
+    try:
+        payload: Any = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+
+    except (binascii.Error, ValueError):
+        return None
+
+    if not isinstance(payload, list) or len(payload) != 4:
+        return None
+
+    cursor_sort, cursor_order, key, tx_hash = payload
+
+    if (
+        (cursor_sort, cursor_order) != (sort, order)
+        or isinstance(key, bool)
+        or not isinstance(key, (int, float))
+        or not math.isfinite(key)
+        or not isinstance(tx_hash, str)
+    ):
+        return None
+
+    return float(key), tx_hash
+
+
+def _requested_fields() -> set[str] | None:
+    fields: list[str] = [
+        field.strip()
+        for value in request.args.getlist("fields")
+        for field in value.split(",")
+        if field.strip()
+    ]
+    return set(fields) if fields else None
+
+
+def _project(
+    items: list[dict[str, Any]], fields: set[str] | None
+) -> list[dict[str, Any]]:
+    # Dropped before serialization, so unrequested blobs are never encoded.
+    if fields is None:
+        return items
+
+    return [{key: item[key] for key in fields if key in item} for item in items]
+
+
+def _range_width() -> int:
+    try:
+        return max(
+            int(request.args["end_height"]) - int(request.args["start_height"]), 0
+        )
+
+    except (KeyError, ValueError):
+        return 0
+
+
+def _range_priority() -> int:
+    return PRIORITY_LOW if _range_width() >= WIDE_RANGE else PRIORITY_NORMAL
+
+
+async def _range_cost() -> int:
+    return 1 + _range_width() // 100
+
+
+async def _blocks_cost() -> int:
+    return 1 + min(_range_width(), BLOCKS_PER_PAGE) // 10
+
+
+async def _transactions_cost() -> int:
+    return 1 + len(request.args.getlist("hashes")) // 10
+
+
+async def _decode_outputs_cost() -> int:
+    data: Any = await request.get_json(silent=True)
+    hashes: Any = data.get("hashes") if isinstance(data, dict) else None
+    return 5 + (len(hashes) if isinstance(hashes, list) else 0)
+
 
 @daemon_bp.route("/daemon/get_version", methods=["GET"])
+@cached(60)
+@admit("daemon", PRIORITY_HIGH)
 async def _daemon_get_version() -> tuple[Response, int]:
     data: dict[str, Any] = await daemon.get_version()
 
@@ -18,6 +142,8 @@ async def _daemon_get_version() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_info", methods=["GET"])
+@cached(5)
+@admit("daemon", PRIORITY_HIGH)
 async def _daemon_get_info() -> tuple[Response, int]:
     data: dict[str, Any] = await daemon.get_info()
 
@@ -28,6 +154,8 @@ async def _daemon_get_info() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/hard_fork_info", methods=["GET"])
+@cached(30)
+@admit("daemon", PRIORITY_HIGH)
 async def _daemon_hard_fork_info() -> tuple[Response, int]:
     data: dict[str, Any] = await daemon.hard_fork_info()
 
@@ -38,6 +166,8 @@ async def _daemon_hard_fork_info() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_block", methods=["GET"])
+@cached(60)
+@admit("daemon", PRIORITY_NORMAL)
 async def _daemon_get_block() -> tuple[Response, int]:
     block_hash: str | None = request.args.get("hash", None)
     height: str | None = request.args.get("height", None)
@@ -82,6 +212,8 @@ async def _daemon_get_block() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_block_count", methods=["GET"])
+@cached(5)
+@admit("daemon", PRIORITY_HIGH)
 async def _daemon_get_block_count() -> tuple[Response, int]:
     data: dict[str, Any] = await daemon.get_block_count()
 
@@ -92,6 +224,8 @@ async def _daemon_get_block_count() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_last_block_header", methods=["GET"])
+@cached(5)
+@admit("daemon", PRIORITY_HIGH)
 async def _daemon_get_last_block_header() -> tuple[Response, int]:
     data: dict[str, Any] = await daemon.get_last_block_header()
 
@@ -102,6 +236,8 @@ async def _daemon_get_last_block_header() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_block_header_by_hash", methods=["GET"])
+@cached(300)
+@admit("daemon", PRIORITY_NORMAL)
 async def _daemon_get_block_header_by_hash() -> tuple[Response, int]:
     block_hash: str | None = request.args.get("hash", None)
 
@@ -122,6 +258,8 @@ async def _daemon_get_block_header_by_hash() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_block_header_by_height", methods=["GET"])
+@cached(60)
+@admit("daemon", PRIORITY_NORMAL)
 async def _daemon_get_block_header_by_height() -> tuple[Response, int]:
     height: str | None = request.args.get("height", None)
 
@@ -146,6 +284,9 @@ async def _daemon_get_block_header_by_height() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_block_headers_range", methods=["GET"])
+@rate_cost(_range_cost)
+@cached(60)
+@admit("daemon", _range_priority)
 async def _daemon_get_block_headers_range() -> tuple[Response, int]:
     start_height: str | None = request.args.get("start_height", None)
     end_height: str | None = request.args.get("end_height", None)
@@ -190,7 +331,78 @@ async def _daemon_get_block_headers_range() -> tuple[Response, int]:
     return jsonify({"status": "success", "result": data["result"]}), 200
 
 
+@daemon_bp.route("/daemon/get_blocks_range", methods=["GET"])
+@rate_cost(_blocks_cost)
+@cached(60)
+@admit("daemon", PRIORITY_LOW)
+async def _daemon_get_blocks_range() -> tuple[Response, int]:
+    start_height: str | None = request.args.get("start_height", None)
+    end_height: str | None = request.args.get("end_height", None)
+
+    if not start_height or not end_height:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "error": "You must provide both a start height and an end height",
+                }
+            ),
+            400,
+        )
+
+    try:
+        start: int = int(start_height)
+        end: int = int(end_height)
+
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "error": "Invalid block height"}), 400
+
+    if start < 0 or end < start:
+        return (
+            jsonify(
+                {"status": "error", "error": "Invalid range (must be ascending)"}
+            ),
+            400,
+        )
+
+    # Wider ranges are served a page at a time; next_height resumes them.
+    last: int = min(end, start + BLOCKS_PER_PAGE - 1)
+
+    data: dict[str, Any] = await daemon_legacy.get_blocks_by_height_bin(
+        heights=list(range(start, last + 1))
+    )
+
+    if "error" in data:
+        return jsonify({"status": "error", "error": data["error"]}), 400
+
+    blocks: list[dict[str, Any]] = [
+        {
+            "height": height,
+            "blob": entry["block"].hex(),
+            "txs": [
+                (tx["blob"] if isinstance(tx, dict) else tx).hex()
+                for tx in entry.get("txs", [])
+            ],
+        }
+        for height, entry in zip(range(start, last + 1), data.get("blocks", []))
+    ]
+
+    return (
+        jsonify(
+            {
+                "status": "success",
+                "result": {
+                    "blocks": blocks,
+                    "next_height": last + 1 if last < end else None,
+                },
+            }
+        ),
+        200,
+    )
+
+
 @daemon_bp.route("/daemon/get_block_template", methods=["GET"])
+@admit("daemon", PRIORITY_NORMAL)
 async def _daemon_get_block_template() -> tuple[Response, int]:
     address: str | None = request.args.get("address", None)
     reserve: str | None = request.args.get("reserve", None)
@@ -211,6 +423,8 @@ async def _daemon_get_block_template() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_connections", methods=["GET"])
+@cached(10)
+@admit("daemon", PRIORITY_NORMAL)
 async def _daemon_get_connections() -> tuple[Response, int]:
     data: dict[str, Any] = await daemon.get_connections()
 
@@ -221,6 +435,8 @@ async def _daemon_get_connections() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_fee_estimate", methods=["GET"])
+@cached(30)
+@admit("daemon", PRIORITY_HIGH)
 async def _daemon_get_fee_estimate() -> tuple[Response, int]:
     grace_blocks: str | None = request.args.get("grace_blocks", None)
 
@@ -242,20 +458,64 @@ async def _daemon_get_fee_estimate() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_generated_coins", methods=["GET"])
+@cached(30)
 async def _daemon_get_generated_coins() -> tuple[Response, int]:
-    checkpoint_block_number: int = 3100000
-    checkpoint_total_coins: float = 18869659.7794
-    reward_per_block: float = 0.3
+    coins: float | None = await generated_coins()
+
+    if coins is None:
+        # Estimated from a checkpoint until the emission ledger has caught up.
+        checkpoint_block_number: int = 3100000
+        checkpoint_total_coins: float = 18869659.7794
+        reward_per_block: float = 0.3
+
+        async with limiters["daemon"].slot(PRIORITY_HIGH):
+            current_block_number: int = (await daemon.get_block_count())["result"][
+                "count"
+            ]
+
+        block_diff: int = current_block_number - checkpoint_block_number
+        coins = checkpoint_total_coins + (block_diff * reward_per_block)
+
+    return jsonify({"status": "success", "result": {"coins": coins}}), 200
+
 
-    current_block_number: int = (await daemon.get_block_count())["result"]["count"]
+@daemon_bp.route("/daemon/get_network_stats", methods=["GET"])
+async def _daemon_get_network_stats() -> tuple[Response, int]:
+    capacity: int = chain_follower.window.capacity
 
-    block_diff: int = current_block_number - checkpoint_block_number
-    generated_coins: float = checkpoint_total_coins + (block_diff * reward_per_block)
+    try:
+        window: int = int(request.args.get("window", DEFAULT_WINDOW))
+
+    except ValueError:
+        return jsonify({"status": "error", "error": "Invalid window"}), 400
+
+    if not 2 <= window <= capacity:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "error": f"Invalid window (must be between 2 and {capacity} blocks)",
+                }
+            ),
+            400,
+        )
 
-    return jsonify({"status": "success", "result": {"coins": generated_coins}}), 200
+    stats: dict[str, Any] | None = chain_follower.window.stats(window)
+
+    if stats is None:
+        return (
+            jsonify(
+                {"status": "error", "error": "Network statistics are not ready yet"}
+            ),
+            503,
+        )
+
+    return jsonify({"status": "success", "result": stats}), 200
 
 
 @daemon_bp.route("/daemon/get_bans", methods=["GET"])
+@cached(30)
+@admit("daemon", PRIORITY_NORMAL)
 async def _daemon_get_bans() -> tuple[Response, int]:
     data: dict[str, Any] = await daemon.get_bans()
 
@@ -266,28 +526,111 @@ async def _daemon_get_bans() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_transaction_pool", methods=["GET"])
+@rate_cost(5)
+@cached(5)
+@admit("daemon", PRIORITY_NORMAL)
 async def _daemon_get_transaction_pool() -> tuple[Response, int]:
+    fields: set[str] | None = _requested_fields()
+    sort: str | None = request.args.get("sort", None)
+    order: str = request.args.get("order", "desc")
+    cursor: str | None = request.args.get("cursor", None)
+    limit: str | None = request.args.get("limit", None)
+
+    if sort is not None and sort not in POOL_SORTS:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "error": f"Invalid sort (must be one of {', '.join(POOL_SORTS)})",
+                }
+            ),
+            400,
+        )
+
+    if order not in ("asc", "desc"):
+        return (
+            jsonify(
+                {"status": "error", "error": "Invalid order (must be asc or desc)"}
+            ),
+            400,
+        )
+
+    page_size: int | None = None
+    if limit is not None:
+        try:
+            page_size = int(limit)
+
+        except ValueError:
+            page_size = 0
+
+        if not 1 <= page_size <= MAX_POOL_PAGE:
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "error": f"Invalid limit (must be between 1 and {MAX_POOL_PAGE})",
+                    }
+                ),
+                400,
+            )
+
+    after: tuple[float, str] | None = None
+    if cursor is not None:
+        after = _pool_after(cursor, sort or "receive_time", order)
+
+        if after is None:
+            return jsonify({"status": "error", "error": "Invalid cursor"}), 400
+
     data: dict[str, Any] = await daemon_legacy.get_transaction_pool()
 
     if "error" in data:
         return jsonify({"status": "error", "error": data["error"]}), 400
 
-    return (
-        jsonify(
-            {
-                "status": "success",
-                "result": {
-                    "credits": data.get("credits", 0),
-                    "spent_key_images": data.get("spent_key_images", []),
-                    "transactions": data.get("transactions", []),
-                },
-            }
-        ),
-        200,
-    )
+    transactions: list[dict[str, Any]] = data.get("transactions", [])
+    next_cursor: str | None = None
+
+    # Pages are ordered by (key, hash), and a cursor names the last pair
+    # served (with the sort and order it belongs to), so transactions entering or leaving the pool between requests
+    # do not shift later pages.
+    if sort is not None or page_size is not None or after is not None:
+        sort = sort or "receive_time"
+        sort_key = POOL_SORTS[sort]
+        descending: bool = order == "desc"
+
+        ranked: list[tuple[tuple[float, str], dict[str, Any]]] = sorted(
+            (((sort_key(tx), tx.get("id_hash", "")), tx) for tx in transactions),
+            key=lambda item: item[0],
+            reverse=descending,
+        )
+
+        if after is not None:
+            ranked = [
+                item
+                for item in ranked
+                if (item[0] < after if descending else item[0] > after)
+            ]
+
+        if page_size is not None and len(ranked) > page_size:
+            ranked = ranked[:page_size]
+            next_cursor = _pool_cursor(sort, order, ranked[-1][0])
+
+        transactions = [tx for _, tx in ranked]
+
+    result: dict[str, Any] = {
+        "credits": data.get("credits", 0),
+        "transactions": _project(transactions, fields),
+        "next_cursor": next_cursor,
+    }
+
+    if fields is None or "spent_key_images" in fields:
+        result["spent_key_images"] = data.get("spent_key_images", [])
+
+    return jsonify({"status": "success", "result": result}), 200
 
 
 @daemon_bp.route("/daemon/get_transaction_pool_stats", methods=["GET"])
+@cached(5)
+@admit("daemon", PRIORITY_HIGH)
 async def _daemon_get_transaction_pool_stats() -> tuple[Response, int]:
     data: dict[str, Any] = await daemon_legacy.get_transaction_pool_stats()
 
@@ -306,6 +649,9 @@ async def _daemon_get_transaction_pool_stats() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_transactions", methods=["GET"])
+@rate_cost(_transactions_cost)
+@cached(10)
+@admit("daemon", PRIORITY_NORMAL)
 async def _daemon_get_transactions() -> tuple[Response, int]:
     hashes: list[str] = request.args.getlist("hashes")
     decode_as_json: bool = request.args.get("decode_as_json", False) == "true"
@@ -348,7 +694,7 @@ async def _daemon_get_transactions() -> tuple[Response, int]:
                 "result": {
                     "missed_tx": data.get("missed_tx", []),
                     "top_hash": data.get("top_hash", ""),
-                    "txs": data.get("txs", []),
+                    "txs": _project(data.get("txs", []), _requested_fields()),
                 },
             }
         ),
@@ -357,6 +703,8 @@ async def _daemon_get_transactions() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/decode_outputs", methods=["POST"])
+@rate_cost(_decode_outputs_cost)
+@admit("daemon", PRIORITY_LOW)
 async def _daemon_decode_outputs() -> tuple[Response, int]:
     data: dict[str, Any] = await request.get_json()
 
@@ -410,6 +758,8 @@ async def _daemon_decode_outputs() -> tuple[Response, int]:
 
 
 @daemon_bp.route("/daemon/get_transaction_pubkey", methods=["GET"])
+@cached(3600)
+@admit("daemon", PRIORITY_NORMAL)
 async def _daemon_get_transaction_pubkey() -> tuple[Response, int]:
     extra: str | None = request.args.get("extra")
 
@@ -6,6 +6,9 @@ from importlib.metadata import (
 from quart import Response, jsonify
 from quart_rate_limiter import rate_exempt
 
+from backend import metrics
+from backend.auth import admin_only
+
 from . import index_bp
 
 try:
@@ -24,3 +27,9 @@ async def _index() -> tuple[Response, int]:
             "status": "ok",
         }
     ), 200
+
+
+@index_bp.route("/metrics")
+@admin_only
+async def _metrics() -> tuple[Response, int]:
+    return jsonify({"status": "success", "result": metrics.collect()}), 200
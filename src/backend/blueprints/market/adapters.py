@@ -0,0 +1,194 @@
+from typing import Any
+
+from datetime import datetime
+from dataclasses import dataclass
+from collections.abc import Callable, Iterable, Awaitable
+
+import aiohttp
+
+from .stream import (
+    TickUpdate,
+    no_subscribe,
+    nonkyc_parse,
+    nonkyc_subscribe,
+    passthrough_parse,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Ticker:
+    """A pair's ticker in a single, exchange-independent schema."""
+
+    last_price: float
+    volume: float
+    high: float
+    low: float
+    bid: float | None = None
+    ask: float | None = None
+    last_trade: str | None = None
+    change_24h_pct: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ExchangeAdapter:
+    """
+    Everything the market routes need to know about one exchange.
+
+    ``fetch`` returns the exchange's REST markets keyed by pair, and
+    ``normalize`` turns one of those raw entries into a ``Ticker`` given the
+    pair's quote currency. The quote is the part of the pair after
+    ``separator``, or the entry's ``quote_field`` where the exchange names it,
+    and ``is_usd`` tells which quotes are priced in dollars. ``subscribe`` and
+    ``parse`` drive the optional websocket stream. Pairs are read from the
+    ``pairs_key`` config entry.
+    """
+
+    name: str
+    display_name: str
+    pairs_key: str
+    separator: str
+    fetch: Callable[[], Awaitable[dict[str, Any]]]
+    normalize: Callable[[dict[str, Any], str], Ticker]
+    is_usd: Callable[[str], bool]
+    quote_field: str | None = None
+    subscribe: Callable[[list[str]], list[dict[str, Any]]] = no_subscribe
+    parse: Callable[[Any], Iterable[TickUpdate]] = passthrough_parse("pair")
+
+    def quote(self, pair: str, data: dict[str, Any] | None = None) -> str:
+        if self.quote_field is not None and data is not None:
+            return str(data[self.quote_field])
+
+        return pair.split(self.separator)[1]
+
+
+def _usd_exact(quote: str) -> bool:
+    return quote in {"USDT", "USDC"}
+
+
+def _usd_prefix(quote: str) -> bool:
+    # startswith covers chain-suffixed variants like USDT0
+    return quote.startswith(("USDT", "USDC"))
+
+
+async def _fetch_nonkyc() -> dict[str, Any]:
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                "https://api.nonkyc.io/api/v2/market/getlist"
+            ) as res:
+                if res.status != 200:
+                    return {}
+                data = await res.json()
+
+        return {
+            m["symbol"].replace("/", "-"): m
+            for m in data
+            if m.get("isActive") and not m.get("apiExcluded")
+        }
+
+    except (aiohttp.ClientError, KeyError, TypeError):
+        return {}
+
+
+def _normalize_nonkyc(data: dict[str, Any], _: str) -> Ticker:
+    return Ticker(
+        last_price=float(data["lastPrice"]),
+        bid=float(data["bestBid"]),
+        ask=float(data["bestAsk"]),
+        volume=float(data["volumeSecondary"]),
+        high=float(data["highPrice"]),
+        low=float(data["lowPrice"]),
+        last_trade=datetime.fromtimestamp(data["lastTradeAt"] // 1000).isoformat(),
+    )
+
+
+async def _fetch_cexswap() -> dict[str, Any]:
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                "https://cexswap.cc/api/public/markets/summary"
+            ) as res:
+                if res.status != 200:
+                    return {}
+                payload = await res.json()
+
+        return {m["pair"]: m for m in payload.get("items", [])}
+
+    except (aiohttp.ClientError, KeyError, TypeError):
+        return {}
+
+
+def _normalize_cexswap(data: dict[str, Any], quote: str) -> Ticker:
+    return Ticker(
+        last_price=float(data["last"]),
+        volume=float(
+            data["volume24h_usd"] if _usd_exact(quote) else data["volume24h"]
+        ),
+        high=float(data["high24h"]),
+        low=float(data["low24h"]),
+        change_24h_pct=float(data["change24h_pct"]),
+    )
+
+
+async def _fetch_noirtrade() -> dict[str, Any]:
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get("https://noirtrade.com/api/v1/tickers") as res:
+                if res.status != 200:
+                    return {}
+                data = await res.json()
+
+        return {t["ticker_id"]: t for t in data}
+
+    except (aiohttp.ClientError, KeyError, TypeError):
+        return {}
+
+
+def _normalize_noirtrade(data: dict[str, Any], _: str) -> Ticker:
+    return Ticker(
+        last_price=float(data["last_price"]),
+        bid=float(data["bid"]),
+        ask=float(data["ask"]),
+        volume=float(data["target_volume"]),
+        high=float(data["high"]),
+        low=float(data["low"]),
+    )
+
+
+ADAPTERS: dict[str, ExchangeAdapter] = {
+    adapter.name: adapter
+    for adapter in (
+        ExchangeAdapter(
+            name="nonkyc",
+            display_name="NonKYC",
+            pairs_key="NONKYC_MARKET_PAIRS",
+            separator="-",
+            fetch=_fetch_nonkyc,
+            normalize=_normalize_nonkyc,
+            is_usd=_usd_exact,
+            subscribe=nonkyc_subscribe,
+            parse=nonkyc_parse,
+        ),
+        ExchangeAdapter(
+            name="cexswap",
+            display_name="CexSwap",
+            pairs_key="CEXSWAP_MARKET_PAIRS",
+            separator="-",
+            fetch=_fetch_cexswap,
+            normalize=_normalize_cexswap,
+            is_usd=_usd_exact,
+            quote_field="quote",
+            parse=passthrough_parse("pair"),
+        ),
+        ExchangeAdapter(
+            name="noirtrade",
+            display_name="NoirTrade",
+            pairs_key="NOIRTRADE_MARKET_PAIRS",
+            separator="_",
+            fetch=_fetch_noirtrade,
+            normalize=_normalize_noirtrade,
+            is_usd=_usd_prefix,
+            parse=passthrough_parse("ticker_id"),
+        ),
+    )
+}
@@ -1,13 +1,23 @@
 from typing import Any
 
-from datetime import datetime
+from dataclasses import asdict
+from collections.abc import Callable, Awaitable
 
-import aiohttp
-from quart import Response, jsonify, current_app
+from quart import Response, jsonify, request, current_app
+from flask.sansio.blueprints import BlueprintSetupState
+
+from backend.cache import cached
 
 from . import market_bp
+from .stream import get_markets
+from .adapters import ADAPTERS, Ticker, ExchangeAdapter
+
+Formatter = Callable[[Ticker], dict[str, Any]]
+
+Pipeline = list[tuple[str, str, Formatter, Formatter]]
 
-MarketData = dict[str, str | dict[str, Any]]
+_PRICE_FIELDS: tuple[str, ...] = ("last_price", "bid", "ask")
+_RANGE_FIELDS: tuple[str, ...] = ("high", "low")
 
 
 def _fmt_btc(value: float) -> str:
@@ -22,219 +32,116 @@ def _fmt_native(value: float, symbol: str, precision: int = 8) -> str:
     return f"{round(value, precision)} {symbol}"
 
 
-async def _fetch_nonkyc() -> dict[str, Any]:
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                "https://api.nonkyc.io/api/v2/market/getlist"
-            ) as res:
-                if res.status != 200:
-                    return {}
-                data = await res.json()
-
-        return {
-            m["symbol"].replace("/", "-"): m
-            for m in data
-            if m.get("isActive") and not m.get("apiExcluded")
-        }
-
-    except (aiohttp.ClientError, KeyError, TypeError):
-        return {}
-
-
-@market_bp.route("/market/nonkyc")
-async def _market_nonkyc() -> tuple[Response, int]:
-    pairs = current_app.config.get("NONKYC_MARKET_PAIRS", [])
-    markets = await _fetch_nonkyc()
-
-    result: dict[str, Any] = {}
-
-    for pair in pairs:
-        data = markets.get(pair)
-        if not data:
-            result[pair] = {"error": "pair not found"}
-            continue
-
-        quote = pair.split("-")[1]
-        last_trade = datetime.fromtimestamp(data["lastTradeAt"] // 1000).isoformat()
-
-        if quote == "BTC":
-            result[pair] = {
-                "last_price": _fmt_btc(float(data["lastPrice"])),
-                "bid": _fmt_btc(float(data["bestBid"])),
-                "ask": _fmt_btc(float(data["bestAsk"])),
-                "volume": f"{float(data['volumeSecondary'])} BTC",
-                "high": _fmt_btc(float(data["highPrice"])),
-                "low": _fmt_btc(float(data["lowPrice"])),
-                "last_trade": last_trade,
-            }
-
-        elif quote in {"USDT", "USDC"}:
-            result[pair] = {
-                "last_price": _fmt_usd(float(data["lastPrice"])),
-                "bid": _fmt_usd(float(data["bestBid"])),
-                "ask": _fmt_usd(float(data["bestAsk"])),
-                "volume": _fmt_usd(float(data["volumeSecondary"]), 2),
-                "high": _fmt_usd(float(data["highPrice"])),
-                "low": _fmt_usd(float(data["lowPrice"])),
-                "last_trade": last_trade,
-            }
-
-        else:
-            result[pair] = {
-                "last_price": _fmt_native(float(data["lastPrice"]), quote),
-                "bid": _fmt_native(float(data["bestBid"]), quote),
-                "ask": _fmt_native(float(data["bestAsk"]), quote),
-                "volume": f"{float(data['volumeSecondary'])} {quote}",
-                "high": _fmt_native(float(data["highPrice"]), quote),
-                "low": _fmt_native(float(data["lowPrice"]), quote),
-                "last_trade": last_trade,
-            }
-
-    return jsonify(
-        {
-            "status": "success",
-            "exchange": "NonKYC",
-            "pairs": pairs,
-            "result": result,
-        }
-    ), 200
-
-
-async def _fetch_cexswap() -> dict[str, Any]:
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                "https://cexswap.cc/api/public/markets/summary"
-            ) as res:
-                if res.status != 200:
-                    return {}
-                payload = await res.json()
-
-        return {m["pair"]: m for m in payload.get("items", [])}
-
-    except (aiohttp.ClientError, KeyError, TypeError):
-        return {}
+def _fmt_pct(value: float) -> str:
+    return f"{round(value, 2)}%"
 
 
-@market_bp.route("/market/cexswap")
-async def _market_cexswap() -> tuple[Response, int]:
-    pairs = current_app.config.get("CEXSWAP_MARKET_PAIRS", [])
-    markets = await _fetch_cexswap()
+def _compile_formatter(quote: str, usd: bool) -> Formatter:
+    price: Callable[[float], str]
+    volume: Callable[[float], str]
 
-    result: dict[str, Any] = {}
+    if quote == "BTC":
+        price = _fmt_btc
+        volume = lambda v: f"{v} BTC"  # noqa: E731
 
-    for pair in pairs:
-        data = markets.get(pair)
-        if not data:
-            result[pair] = {"error": "pair not found"}
-            continue
+    elif usd:
+        price = _fmt_usd
+        volume = lambda v: _fmt_usd(v, 2)  # noqa: E731
 
-        quote = data["quote"]
+    else:
+        price = lambda v: _fmt_native(v, quote)  # noqa: E731
+        volume = lambda v: f"{v} {quote}"  # noqa: E731
 
-        if quote == "BTC":
-            result[pair] = {
-                "last_price": _fmt_btc(float(data["last"])),
-                "volume": f"{float(data['volume24h'])} BTC",
-                "high": _fmt_btc(float(data["high24h"])),
-                "low": _fmt_btc(float(data["low24h"])),
-                "change_24h_pct": f"{round(float(data['change24h_pct']), 2)}%",
-            }
-
-        elif quote in {"USDT", "USDC"}:
-            result[pair] = {
-                "last_price": _fmt_usd(float(data["last"])),
-                "volume": _fmt_usd(float(data["volume24h_usd"]), 2),
-                "high": _fmt_usd(float(data["high24h"])),
-                "low": _fmt_usd(float(data["low24h"])),
-                "change_24h_pct": f"{round(float(data['change24h_pct']), 2)}%",
-            }
+    steps: list[tuple[str, Callable[[Any], str]]] = [
+        *((field, price) for field in _PRICE_FIELDS),
+        ("volume", volume),
+        *((field, price) for field in _RANGE_FIELDS),
+        ("last_trade", str),
+        ("change_24h_pct", _fmt_pct),
+    ]
 
-        else:
-            result[pair] = {
-                "last_price": _fmt_native(float(data["last"]), quote),
-                "volume": f"{float(data['volume24h'])} {quote}",
-                "high": _fmt_native(float(data["high24h"]), quote),
-                "low": _fmt_native(float(data["low24h"]), quote),
-                "change_24h_pct": f"{round(float(data['change24h_pct']), 2)}%",
-            }
-
-    return jsonify(
-        {
-            "status": "success",
-            "exchange": "CexSwap",
-            "pairs": pairs,
-            "result": result,
+    def format_ticker(ticker: Ticker) -> dict[str, Any]:
+        return {
+            field: fmt(value)
+            for field, fmt in steps
+            if (value := getattr(ticker, field)) is not None
         }
-    ), 200
-
-
-async def _fetch_noirtrade() -> dict[str, Any]:
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get("https://noirtrade.com/api/v1/tickers") as res:
-                if res.status != 200:
-                    return {}
-                data = await res.json()
 
-        return {t["ticker_id"]: t for t in data}
-
-    except (aiohttp.ClientError, KeyError, TypeError):
-        return {}
-
-
-@market_bp.route("/market/noirtrade")
-async def _market_noirtrade() -> tuple[Response, int]:
-    pairs = current_app.config.get("NOIRTRADE_MARKET_PAIRS", [])
-    markets = await _fetch_noirtrade()
-
-    result: dict[str, Any] = {}
-
-    for pair in pairs:
-        data = markets.get(pair)
-        if not data:
-            result[pair] = {"error": "pair not found"}
-            continue
-
-        quote = pair.split("_")[1]
-
-        if quote == "BTC":
-            result[pair] = {
-                "last_price": _fmt_btc(float(data["last_price"])),
-                "bid": _fmt_btc(float(data["bid"])),
-                "ask": _fmt_btc(float(data["ask"])),
-                "volume": f"{float(data['target_volume'])} BTC",
-                "high": _fmt_btc(float(data["high"])),
-                "low": _fmt_btc(float(data["low"])),
+    return format_ticker
+
+
+def _compile_raw_formatter(quote: str) -> Formatter:
+    def format_ticker(ticker: Ticker) -> dict[str, Any]:
+        result = {k: v for k, v in asdict(ticker).items() if v is not None}
+        result["quote"] = quote
+        return result
+
+    return format_ticker
+
+
+def _compile(adapter: ExchangeAdapter, quote: str) -> tuple[Formatter, Formatter]:
+    return (
+        _compile_formatter(quote, adapter.is_usd(quote)),
+        _compile_raw_formatter(quote),
+    )
+
+
+@market_bp.record
+def _compile_pipelines(state: BlueprintSetupState) -> None:
+    # Per exchange, the configured pairs with their display and raw formatters.
+    # Resolved when the blueprint is registered on each app, so requests only
+    # run them.
+    state.app.extensions["market_pipelines"] = {
+        adapter.name: [
+            (pair, quote, *_compile(adapter, quote))
+            for pair in state.app.config.get(adapter.pairs_key, [])
+            for quote in (adapter.quote(pair),)
+        ]
+        for adapter in ADAPTERS.values()
+    }
+
+
+def _market_route(
+    adapter: ExchangeAdapter,
+) -> Callable[[], Awaitable[tuple[Response, int]]]:
+    async def route() -> tuple[Response, int]:
+        pipeline: Pipeline = current_app.extensions["market_pipelines"].get(
+            adapter.name, []
+        )
+        raw: bool = request.args.get("format") == "raw"
+        markets = await get_markets(
+            adapter.name, adapter.fetch, [entry[0] for entry in pipeline]
+        )
+
+        result: dict[str, Any] = {}
+
+        for pair, quote, fmt, raw_fmt in pipeline:
+            data = markets.get(pair)
+            if not data:
+                result[pair] = {"error": "pair not found"}
+                continue
+
+            # Exchanges that name the quote may not match the pair's suffix.
+            named = adapter.quote(pair, data)
+            if named != quote:
+                quote = named
+                fmt, raw_fmt = _compile(adapter, quote)
+
+            ticker = adapter.normalize(data, quote)
+            result[pair] = raw_fmt(ticker) if raw else fmt(ticker)
+
+        return jsonify(
+            {
+                "status": "success",
+                "exchange": adapter.display_name,
+                "pairs": [entry[0] for entry in pipeline],
+                "result": result,
             }
+        ), 200
 
-        elif quote.startswith(
-            ("USDT", "USDC")
-        ):  # startswith covers chain-suffixed variants like USDT0
-            result[pair] = {
-                "last_price": _fmt_usd(float(data["last_price"])),
-                "bid": _fmt_usd(float(data["bid"])),
-                "ask": _fmt_usd(float(data["ask"])),
-                "volume": _fmt_usd(float(data["target_volume"]), 2),
-                "high": _fmt_usd(float(data["high"])),
-                "low": _fmt_usd(float(data["low"])),
-            }
+    route.__name__ = f"_market_{adapter.name}"
+    return route
 
-        else:
-            result[pair] = {
-                "last_price": _fmt_native(float(data["last_price"]), quote),
-                "bid": _fmt_native(float(data["bid"]), quote),
-                "ask": _fmt_native(float(data["ask"]), quote),
-                "volume": f"{float(data['target_volume'])} {quote}",
-                "high": _fmt_native(float(data["high"]), quote),
-                "low": _fmt_native(float(data["low"]), quote),
-            }
 
-    return jsonify(
-        {
-            "status": "success",
-            "exchange": "NoirTrade",
-            "pairs": pairs,
-            "result": result,
-        }
-    ), 200
+for _adapter in ADAPTERS.values():
+    market_bp.route(f"/market/{_adapter.name}")(cached(5)(_market_route(_adapter)))
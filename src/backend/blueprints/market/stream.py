@@ -0,0 +1,241 @@
+from typing import Any
+
+import json
+import time
+import random
+import asyncio
+import logging
+from collections.abc import Callable, Iterable, Awaitable
+
+import aiohttp
+
+from backend.admission import limiters
+
+logger = logging.getLogger(__name__)
+
+TickUpdate = tuple[str, dict[str, Any]]
+
+BACKOFF_MIN: float = 1.0
+BACKOFF_MAX: float = 60.0
+
+
+class TickerStream:
+    """
+    Keeps an exchange's tickers current from a websocket subscription.
+
+    The in-memory state starts from a REST snapshot and is then patched with
+    every tick the exchange pushes, so partial updates always land on a full
+    ticker. Dropped connections are retried with exponential backoff, and the
+    state is only served while it is connected and the stream itself has
+    pushed a tick recently (see ``live``); REST snapshots fill the state in but
+    do not make a silent stream count as live.
+    """
+
+    def __init__(
+        self,
+        *,
+        url: str,
+        fetch: Callable[[], Awaitable[dict[str, Any]]],
+        subscribe: Callable[[list[str]], list[dict[str, Any]]],
+        parse: Callable[[Any], Iterable[TickUpdate]],
+        max_age: float,
+    ) -> None:
+        self.url = url
+        self.max_age = max_age
+        self.tickers: dict[str, dict[str, Any]] = {}
+        self.connected: bool = False
+        # When the websocket last pushed a tick, not when the state last changed.
+        self.last_update: float = 0.0
+
+        self._fetch = fetch
+        self._subscribe = subscribe
+        self._parse = parse
+
+    @property
+    def live(self) -> bool:
+        return self.connected and time.monotonic() - self.last_update <= self.max_age
+
+    def apply(self, pair: str, fields: dict[str, Any]) -> None:
+        # Ticks for a pair no REST snapshot has seeded would leave a partial
+        # ticker, so they are dropped until one has.
+        ticker = self.tickers.get(pair)
+        if ticker is None:
+            return
+
+        ticker.update(fields)
+        self.last_update = time.monotonic()
+
+    def seed(self, markets: dict[str, Any]) -> None:
+        for pair, fields in markets.items():
+            self.tickers.setdefault(pair, {}).update(fields)
+
+    async def run(self, pairs: list[str]) -> None:
+        backoff = BACKOFF_MIN
+
+        while True:
+            try:
+                self.seed(await self._fetch())
+
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(self.url, heartbeat=30) as ws:
+                        for request in self._subscribe(pairs):
+                            await ws.send_json(request)
+
+                        self.connected = True
+                        backoff = BACKOFF_MIN
+
+                        async for message in ws:
+                            if message.type is not aiohttp.WSMsgType.TEXT:
+                                continue
+
+                            for pair, fields in self._parse(
+                                json.loads(message.data)
+                            ):
+                                self.apply(pair, fields)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.warning(f"Ticker stream {self.url} dropped: {e}")
+
+            except Exception as e:
+                # Anything else, a bad message or a failed REST seed, must not
+                # end the task: the stream would stay down until a restart.
+                logger.error(f"Ticker stream {self.url} failed: {e}")
+
+            finally:
+                self.connected = False
+
+            await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+            backoff = min(backoff * 2, BACKOFF_MAX)
+
+
+# NonKYC pushes tickers over a JSON-RPC style feed. The field names differ from
+# the REST market list, so they are mapped back onto it before being applied.
+_NONKYC_FIELDS: dict[str, str] = {
+    "last": "lastPrice",
+    "lastPrice": "lastPrice",
+    "bid": "bestBid",
+    "bestBid": "bestBid",
+    "ask": "bestAsk",
+    "bestAsk": "bestAsk",
+    "high": "highPrice",
+    "highPrice": "highPrice",
+    "low": "lowPrice",
+    "lowPrice": "lowPrice",
+    "volumeQuote": "volumeSecondary",
+    "volumeSecondary": "volumeSecondary",
+    "lastTradeAt": "lastTradeAt",
+}
+
+
+def nonkyc_subscribe(pairs: list[str]) -> list[dict[str, Any]]:
+    return [
+        {
+            "method": "subscribeTicker",
+            "params": {"symbol": pair.replace("-", "/")},
+            "id": i,
+        }
+        for i, pair in enumerate(pairs, start=1)
+    ]
+
+
+def nonkyc_parse(message: Any) -> Iterable[TickUpdate]:
+    if not isinstance(message, dict) or message.get("method") != "ticker":
+        return []
+
+    params = message.get("params") or {}
+    symbol = params.get("symbol")
+    if not isinstance(symbol, str):
+        return []
+
+    return [
+        (
+            symbol.replace("/", "-"),
+            {
+                _NONKYC_FIELDS[k]: v
+                for k, v in params.items()
+                if k in _NONKYC_FIELDS and v is not None
+            },
+        )
+    ]
+
+
+def passthrough_parse(key: str) -> Callable[[Any], Iterable[TickUpdate]]:
+    # For feeds that push tickers in the same shape as the exchange's REST
+    # payload, keyed on the same field the REST fetch indexes by.
+    def parse(message: Any) -> Iterable[TickUpdate]:
+        items = message if isinstance(message, list) else [message]
+        return [
+            (item[key], item)
+            for item in items
+            if isinstance(item, dict) and isinstance(item.get(key), str)
+        ]
+
+    return parse
+
+
+def no_subscribe(_: list[str]) -> list[dict[str, Any]]:
+    return []
+
+
+streams: dict[str, TickerStream] = {}
+
+_tasks: list[asyncio.Task[None]] = []
+
+
+async def get_markets(
+    name: str, fetch: Callable[[], Awaitable[dict[str, Any]]], pairs: list[str]
+) -> dict[str, Any]:
+    stream = streams.get(name)
+
+    # Served from the stream only when it holds every pair asked for.
+    if (
+        stream is not None
+        and stream.live
+        and all(pair in stream.tickers for pair in pairs)
+    ):
+        return stream.tickers
+
+    # Only REST reads count against the exchanges' admission limit; live
+    # stream reads never leave the process.
+    async with limiters["exchanges"].slot():
+        markets = await fetch()
+
+    # A REST read while the stream is quiet is still the freshest data we have.
+    if stream is not None and markets:
+        stream.seed(markets)
+
+    return markets
+
+
+def start_streams(config: dict[str, Any]) -> None:
+    from .adapters import ADAPTERS
+
+    max_age: float = config.get("MARKET_STREAM_MAX_AGE", 300)
+
+    for name, url in config.get("MARKET_STREAMS", {}).items():
+        adapter = ADAPTERS.get(name)
+        if adapter is None:
+            logger.warning(f"No ticker stream support for exchange {name}")
+            continue
+
+        stream = TickerStream(
+            url=url,
+            fetch=adapter.fetch,
+            subscribe=adapter.subscribe,
+            parse=adapter.parse,
+            max_age=max_age,
+        )
+        streams[name] = stream
+        _tasks.append(
+            asyncio.create_task(stream.run(config.get(adapter.pairs_key, [])))
+        )
+
+
+async def stop_streams() -> None:
+    for task in _tasks:
+        task.cancel()
+
+    await asyncio.gather(*_tasks, return_exceptions=True)
+
+    _tasks.clear()
+    streams.clear()
@@ -0,0 +1,287 @@
+from typing import Any, ParamSpec
+
+import math
+import time
+import zlib
+import random
+import struct
+import asyncio
+import logging
+from functools import wraps
+from collections import OrderedDict
+from dataclasses import dataclass
+from collections.abc import Callable, Awaitable
+
+from quart import Response, request, current_app
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+
+RouteResult = tuple[Response, int]
+
+# expires, compute time, status, flags, content type length
+_HEADER = struct.Struct("!ddHBB")
+
+_COMPRESSED: int = 1
+
+# Bodies at least this long are stored zlib-compressed.
+COMPRESS_MIN: int = 512
+
+# XFetch's beta: above 1 favours refreshing earlier, below 1 later.
+XFETCH_BETA: float = 1.0
+
+
+@dataclass(frozen=True, slots=True)
+class CacheEntry:
+    expires: float
+    delta: float
+    status: int
+    content_type: str
+    body: bytes
+
+    def dump(self) -> bytes:
+        body, flags = self.body, 0
+        if len(body) >= COMPRESS_MIN:
+            body, flags = zlib.compress(body), _COMPRESSED
+
+        content_type = self.content_type.encode()
+        header = _HEADER.pack(
+            self.expires, self.delta, self.status, flags, len(content_type)
+        )
+        return header + content_type + body
+
+    @classmethod
+    def load(cls, data: bytes) -> "CacheEntry":
+        expires, delta, status, flags, length = _HEADER.unpack_from(data)
+        offset = _HEADER.size + length
+        content_type = data[_HEADER.size : offset].decode()
+        body = data[offset:]
+
+        if flags & _COMPRESSED:
+            body = zlib.decompress(body)
+
+        return cls(expires, delta, status, content_type, body)
+
+    def stale(self, now: float) -> bool:
+        # XFetch: the closer an entry is to expiry, and the longer it took to
+        # compute, the likelier a hit is to refresh it early. Concurrent
+        # readers rarely agree on it, so expiry does not stampede the upstream.
+        return (
+            now - self.delta * XFETCH_BETA * math.log(random.random())
+            >= self.expires
+        )
+
+    def response(self) -> RouteResult:
+        return Response(
+            self.body, status=self.status, content_type=self.content_type
+        ), self.status
+
+
+class ResponseCache:
+    """
+    Caches successful route responses in two tiers: an in-process LRU in
+    front of Redis, which every worker shares.
+
+    A miss in one worker is served from Redis if another worker has already
+    computed the response. Within a worker, concurrent misses for the same key
+    wait on a single computation, and entries are refreshed probabilistically
+    just before they expire (XFetch) rather than all at once.
+    """
+
+    def __init__(self, size: int = 1024) -> None:
+        self.size = size
+        self.prefix: str = "nerva-api:cache:"
+        self.memory_hits: int = 0
+        self.redis_hits: int = 0
+        self.misses: int = 0
+        self.early_refreshes: int = 0
+
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future[CacheEntry | None]] = {}
+        self._redis: Redis | None = None
+
+    def configure(self, *, url: str, size: int) -> None:
+        self.size = size
+        self._redis = Redis.from_url(url)
+        self._entries.clear()
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> CacheEntry | None:
+        now = time.time()
+        entry = self._entries.get(key)
+
+        if entry is not None and entry.expires > now:
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return entry
+
+        self._entries.pop(key, None)
+
+        if self._redis is None:
+            return None
+
+        try:
+            data: bytes | None = await self._redis.get(self.prefix + key)
+
+        except RedisError as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+        if data is None:
+            return None
+
+        entry = CacheEntry.load(data)
+        if entry.expires <= now:
+            return None
+
+        self._remember(key, entry)
+        self.redis_hits += 1
+        return entry
+
+    async def put(self, key: str, entry: CacheEntry) -> None:
+        self._remember(key, entry)
+
+        if self._redis is None:
+            return
+
+        try:
+            await self._redis.set(
+                self.prefix + key,
+                entry.dump(),
+                px=max(1, int((entry.expires - time.time()) * 1000)),
+            )
+
+        except RedisError as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    async def fetch(
+        self, key: str, ttl: float, compute: Callable[[], Awaitable[RouteResult]]
+    ) -> RouteResult:
+        entry = await self.get(key)
+
+        if entry is not None:
+            # While one request refreshes an entry early, the rest keep serving
+            # it until it actually expires.
+            if key in self._inflight or not entry.stale(time.time()):
+                return entry.response()
+
+            self.early_refreshes += 1
+
+        else:
+            self.misses += 1
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            shared = await asyncio.shield(pending)
+            if shared is not None:
+                return shared.response()
+
+            return await compute()
+
+        future: asyncio.Future[CacheEntry | None] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._inflight[key] = future
+        fresh: CacheEntry | None = None
+
+        try:
+            started = time.time()
+            response, status = await compute()
+
+            # Only successes are shared; errors are recomputed per request.
+            if status == 200:
+                fresh = CacheEntry(
+                    expires=time.time() + ttl,
+                    delta=time.time() - started,
+                    status=status,
+                    content_type=response.content_type or "application/json",
+                    body=await response.get_data(as_text=False),
+                )
+                await self.put(key, fresh)
+
+            return response, status
+
+        finally:
+            del self._inflight[key]
+            future.set_result(fresh)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.memory_hits + self.redis_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "early_refreshes": self.early_refreshes,
+            "hit_rate": (
+                round((self.memory_hits + self.redis_hits) / lookups, 4)
+                if lookups
+                else 0.0
+            ),
+        }
+
+
+response_cache: ResponseCache = ResponseCache()
+
+
+def _cache_key() -> str:
+    args = "&".join(
+        f"{name}={value}"
+        for name, values in sorted(request.args.lists())
+        for value in values
+    )
+    return f"{request.path}?{args}"
+
+
+def cached(
+    ttl: float,
+) -> Callable[
+    [Callable[P, Awaitable[RouteResult]]], Callable[P, Awaitable[RouteResult]]
+]:
+    """
+    Serves the decorated GET route from ``response_cache`` for ``ttl`` seconds,
+    keyed by path and query string. ``RESPONSE_CACHE_TTLS`` overrides ``ttl``
+    by route rule, and a TTL of 0 disables caching for that route. Place it
+    above ``admit`` so hits never wait for an upstream slot.
+    """
+
+    def decorator(
+        func: Callable[P, Awaitable[RouteResult]],
+    ) -> Callable[P, Awaitable[RouteResult]]:
+        @wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> RouteResult:
+            overrides: dict[str, float] = current_app.config.get(
+                "RESPONSE_CACHE_TTLS", {}
+            )
+            rule = request.url_rule.rule if request.url_rule else ""
+            route_ttl = overrides.get(rule, ttl)
+
+            if route_ttl <= 0:
+                return await func(*args, **kwargs)
+
+            return await response_cache.fetch(
+                _cache_key(), route_ttl, lambda: func(*args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
+
+
+metrics.register("response_cache", response_cache.stats)
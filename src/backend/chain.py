@@ -0,0 +1,330 @@
+from typing import Any
+
+import array
+import asyncio
+import logging
+
+from backend import metrics
+from backend.admission import PRIORITY_LOW, limiters
+
+logger = logging.getLogger(__name__)
+
+# get_block_headers_range serves at most this many headers per call.
+HEADERS_PER_CALL: int = 1000
+
+# Window, in blocks, that network statistics cover when none is requested.
+DEFAULT_WINDOW: int = 720
+
+FIELDS: tuple[str, ...] = ("height", "timestamp", "difficulty", "reward", "size")
+
+# Fields whose running totals are kept, so any window's sum is O(1).
+TOTALS: tuple[str, ...] = ("difficulty", "reward", "size")
+
+
+class ChainError(Exception):
+    pass
+
+
+async def fetch_headers(start: int, end: int) -> list[dict[str, Any]]:
+    """Fetches the headers from ``start`` to ``end``, inclusive, in chunks."""
+
+    from backend.factory import daemon
+
+    headers: list[dict[str, Any]] = []
+
+    for first in range(start, end + 1, HEADERS_PER_CALL):
+        async with limiters["daemon"].slot(PRIORITY_LOW):
+            data: dict[str, Any] = await daemon.get_block_headers_range(
+                start_height=first, end_height=min(end, first + HEADERS_PER_CALL - 1)
+            )
+
+        if "error" in data:
+            raise ChainError(
+                f"Failed to fetch headers from {first}: {data['error']}"
+            )
+
+        headers.extend(data["result"]["headers"])
+
+    return headers
+
+
+def _percentile(values: list[int], q: float) -> int:
+    # Nearest rank on an already sorted list.
+    return values[min(len(values) - 1, max(0, round(q * (len(values) - 1))))]
+
+
+class HeaderWindow:
+    """
+    The most recent ``capacity`` block headers, kept as one typed ``array``
+    per field in a fixed-size ring, so a week of blocks costs a few hundred
+    kilobytes and no per-block objects.
+
+    Appending a block also extends a running total for each field in
+    ``TOTALS``, which makes the sum over any window a single subtraction.
+    Statistics are computed per window once per chain tip and cached until
+    the next block arrives.
+    """
+
+    def __init__(self, capacity: int = 10080) -> None:
+        self.capacity = capacity
+        self.length: int = 0
+
+        self._head: int = 0
+        self._columns: dict[str, array.array[int]] = {
+            field: array.array("Q", bytes(8 * capacity)) for field in FIELDS
+        }
+        self._totals: dict[str, array.array[int]] = {
+            field: array.array("Q", bytes(8 * capacity)) for field in TOTALS
+        }
+        self._hashes: list[str] = [""] * capacity
+        self._stats: dict[int, dict[str, Any]] = {}
+
+    def _slot(self, position: int) -> int:
+        # Ring index of the ``position``-th oldest header.
+        return (self._head + position) % self.capacity
+
+    @property
+    def last_height(self) -> int:
+        return self._columns["height"][self._slot(self.length - 1)]
+
+    @property
+    def last_hash(self) -> str:
+        return self._hashes[self._slot(self.length - 1)]
+
+    @property
+    def first_height(self) -> int:
+        return self.last_height - self.length + 1
+
+    def hash_at(self, height: int) -> str | None:
+        position = height - self.first_height
+        if not 0 <= position < self.length:
+            return None
+
+        return self._hashes[self._slot(position)]
+
+    def clear(self) -> None:
+        self._head = 0
+        self.length = 0
+        self._stats.clear()
+
+    def append(self, header: dict[str, Any]) -> None:
+        previous = self._slot(self.length - 1) if self.length else None
+
+        if self.length == self.capacity:
+            self._head = self._slot(1)
+        else:
+            self.length += 1
+
+        slot = self._slot(self.length - 1)
+        values = {
+            "height": header["height"],
+            "timestamp": header["timestamp"],
+            "difficulty": header["difficulty"],
+            "reward": header["reward"],
+            "size": header.get("block_size", 0),
+        }
+
+        for field, value in values.items():
+            self._columns[field][slot] = value
+
+        for field in TOTALS:
+            base = self._totals[field][previous] if previous is not None else 0
+            self._totals[field][slot] = base + values[field]
+
+        self._hashes[slot] = header["hash"]
+        self._stats.clear()
+
+    def pop(self) -> None:
+        self.length -= 1
+        self._stats.clear()
+
+    def column(self, field: str, count: int) -> list[int]:
+        """The ``count`` most recent values of ``field``, oldest first."""
+
+        values = self._columns[field]
+        start = self._slot(self.length - count)
+        end = start + count
+
+        if end <= self.capacity:
+            return values[start:end].tolist()
+
+        return values[start:].tolist() + values[: end - self.capacity].tolist()
+
+    def total(self, field: str, count: int) -> int:
+        """The sum of the ``count`` most recent values of ``field``."""
+
+        first = self._slot(self.length - count)
+        totals = self._totals[field]
+        return (
+            totals[self._slot(self.length - 1)]
+            - totals[first]
+            + self._columns[field][first]
+        )
+
+    def stats(self, window: int) -> dict[str, Any] | None:
+        count = min(window, self.length)
+        if count < 2:
+            return None
+
+        cached = self._stats.get(count)
+        if cached is not None:
+            return cached
+
+        heights = self.column("height", count)
+        timestamps = self.column("timestamp", count)
+        sizes = sorted(self.column("size", count))
+        intervals = sorted(b - a for a, b in zip(timestamps, timestamps[1:]))
+        span = max(timestamps[-1] - timestamps[0], 1)
+
+        # Hashrate is the work of every block after the first over the time
+        # it took to find them.
+        work = self.total("difficulty", count) - self.column("difficulty", count)[0]
+
+        stats: dict[str, Any] = {
+            "window": count,
+            "start_height": heights[0],
+            "end_height": heights[-1],
+            "hashrate": round(work / span),
+            "block_time": {
+                "mean": round(span / (count - 1), 3),
+                "median": _percentile(intervals, 0.5),
+                "p90": _percentile(intervals, 0.9),
+                "p99": _percentile(intervals, 0.99),
+            },
+            "difficulty": {
+                "mean": round(self.total("difficulty", count) / count),
+                "latest": self.column("difficulty", 1)[0],
+            },
+            "reward": {
+                "mean": round(self.total("reward", count) / count),
+                "total": self.total("reward", count),
+            },
+            "block_size": {
+                "mean": round(self.total("size", count) / count),
+                "median": _percentile(sizes, 0.5),
+                "p90": _percentile(sizes, 0.9),
+                "max": sizes[-1],
+            },
+        }
+
+        self._stats[count] = stats
+        return stats
+
+
+class ChainFollower:
+    """
+    Keeps ``window`` in step with the daemon's chain, fetching only the
+    headers added since the last poll.
+
+    When the daemon's chain no longer extends the last header held, the
+    daemon's headers are compared with the window's, walking back, to find the
+    last block both agree on. The window is rewound to it and the new branch
+    fetched in one go, so blocks orphaned by a reorganization drop out of the
+    statistics.
+
+    Every worker follows the chain into its own window, since each serves
+    statistics from memory.
+    """
+
+    def __init__(self) -> None:
+        self.window: HeaderWindow = HeaderWindow()
+        self.reorgs: int = 0
+
+        self._lock = asyncio.Lock()
+
+    def configure(self, *, capacity: int) -> None:
+        if capacity != self.window.capacity:
+            self.window = HeaderWindow(capacity)
+
+    async def poll(self) -> None:
+        # A slow initial sync must not overlap the next scheduled poll.
+        if self._lock.locked():
+            return
+
+        async with self._lock:
+            await self._follow()
+
+    async def _follow(self) -> None:
+        from backend.factory import daemon
+
+        async with limiters["daemon"].slot(PRIORITY_LOW):
+            data: dict[str, Any] = await daemon.get_last_block_header()
+
+        if "error" in data:
+            raise ChainError(f"Failed to fetch the chain tip: {data['error']}")
+
+        tip: dict[str, Any] = data["result"]["block_header"]
+        window = self.window
+
+        if window.length and window.last_hash == tip["hash"]:
+            return
+
+        oldest = max(0, tip["height"] - window.capacity + 1)
+        if window.length and window.last_height < oldest:
+            window.clear()
+
+        rewound = 0
+        headers: list[dict[str, Any]] = []
+
+        if window.length:
+            headers = await fetch_headers(window.last_height + 1, tip["height"])
+
+            if not headers or headers[0]["prev_hash"] != window.last_hash:
+                ancestor = await self._common_ancestor(tip["height"])
+
+                while window.length and (
+                    ancestor is None or window.last_height > ancestor
+                ):
+                    window.pop()
+                    rewound += 1
+
+                if window.length:
+                    headers = await fetch_headers(
+                        window.last_height + 1, tip["height"]
+                    )
+
+        if not window.length:
+            headers = await fetch_headers(oldest, tip["height"])
+
+        if rewound:
+            self.reorgs += 1
+            logger.warning(f"Chain reorganization: rewound {rewound} blocks")
+
+        for header in headers:
+            window.append(header)
+
+    async def _common_ancestor(self, height: int) -> int | None:
+        """
+        The height of the most recent block, at or below ``height``, that the
+        window and the daemon agree on, or ``None`` if they share none.
+        """
+
+        window = self.window
+        top = min(window.last_height, height)
+        step = 16
+
+        # Reorganizations are almost always shallow, so the search starts
+        # with a few blocks and widens, for O(depth) headers in all.
+        while top >= window.first_height:
+            bottom = max(window.first_height, top - step + 1)
+
+            for header in reversed(await fetch_headers(bottom, top)):
+                if window.hash_at(header["height"]) == header["hash"]:
+                    return int(header["height"])
+
+            top = bottom - 1
+            step = min(step * 2, HEADERS_PER_CALL)
+
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "height": self.window.last_height if self.window.length else None,
+            "headers": self.window.length,
+            "reorgs": self.reorgs,
+        }
+
+
+chain_follower: ChainFollower = ChainFollower()
+
+metrics.register("chain", chain_follower.stats)
@@ -25,6 +25,64 @@ To disable analytics tracking, set ANALYTICS_ENABLED to False.
 
 ANALYTICS_ENABLED = False
 
+# Analytics write buffer
+"""
+Submissions are buffered in memory and written to MongoDB in a single bulk
+upsert, with repeat check-ins from the same node collapsed into one write.
+
+ANALYTICS_FLUSH_INTERVAL is the longest a submission waits, in seconds.
+ANALYTICS_FLUSH_SIZE is the number of buffered nodes that triggers an early flush.
+The buffer is also flushed when the server shuts down.
+"""
+
+ANALYTICS_FLUSH_INTERVAL = 5
+ANALYTICS_FLUSH_SIZE = 500
+
+# Analytics fetch
+"""
+ANALYTICS_FETCH_MAX_LIMIT caps the page size clients can request from
+/analytics/fetch with the limit parameter. Requests without limit or cursor
+still return every node.
+"""
+
+ANALYTICS_FETCH_MAX_LIMIT = 1000
+
+# Analytics aggregates
+"""
+ANALYTICS_AGGREGATE_TTL is how long, in seconds, each worker serves the
+/analytics/aggregate counts from memory before re-reading the rollups.
+"""
+
+ANALYTICS_AGGREGATE_TTL = 60
+
+# Geolocation cache
+"""
+Submissions look up each node's IP with ipinfo.io (bogon check) and keycdn.com
+(geolocation). Both answers are cached per IP, first in process and then in the
+"geo_cache" MongoDB collection, so repeat nodes skip the outbound calls.
+
+GEO_CACHE_SIZE is the number of IPs each worker keeps in memory.
+GEO_CACHE_TTL is how many seconds a cached lookup is trusted, in both tiers.
+"""
+
+GEO_CACHE_SIZE = 10000
+GEO_CACHE_TTL = 604800
+
+# Geolocation backend
+"""
+GEOIP_BACKEND selects how submitting nodes are geolocated:
+
+- "http" queries ipinfo.io and keycdn.com, with results cached as above.
+- "maxmind" reads a local MaxMind-format database (e.g. GeoLite2 City) from
+  GEOIP_DATABASE through a memory-mapped reader, with no outbound traffic.
+  Requires the "geoip" extra (uv sync --extra geoip). The file is checked every
+  hour and reloaded in the background when it changes, so it can be updated in
+  place with geoipupdate.
+"""
+
+GEOIP_BACKEND = "http"
+GEOIP_DATABASE = "data/GeoLite2-City.mmdb"
+
 # Nerva Daemon
 """
 The DAEMON_RPC_HOST is the IP address or hostname of the Nerva daemon.
@@ -41,6 +99,23 @@ DAEMON_RPC_HOST = "localhost"
 DAEMON_RPC_PORT = 17566
 DAEMON_RPC_SSL = False
 
+# Daemon transport
+"""
+Every worker keeps one pool of up to DAEMON_RPC_MAX_CONNECTIONS keep-alive
+connections to the daemon and reuses them across requests.
+
+With DAEMON_RPC_BATCHING set to True, JSON-RPC calls made within
+DAEMON_RPC_BATCH_WINDOW seconds of each other are sent to the daemon as a
+single JSON-RPC batch of at most DAEMON_RPC_BATCH_SIZE calls. If the daemon
+does not accept batches, the worker logs a warning and goes back to sending
+calls one at a time.
+"""
+
+DAEMON_RPC_MAX_CONNECTIONS = 32
+DAEMON_RPC_BATCHING = False
+DAEMON_RPC_BATCH_WINDOW = 0.002
+DAEMON_RPC_BATCH_SIZE = 32
+
 # Database
 """
 The MONGODB_URI is the connection string for the MongoDB database. 
@@ -77,6 +152,22 @@ NONKYC_MARKET_PAIRS = ["XNV-USDT", "XNV-XMR"]
 CEXSWAP_MARKET_PAIRS = ["XNV-BTC", "XNV-XMR"]
 NOIRTRADE_MARKET_PAIRS = ["XNV_USDT0"]
 
+# Market streaming
+"""
+MARKET_STREAMS maps an exchange (nonkyc, cexswap, noirtrade) to a websocket URL.
+Each listed exchange keeps a live ticker subscription in the background instead
+of being polled over REST on every request, reconnecting with backoff when the
+feed drops. Exchanges that are not listed are polled as before.
+
+    MARKET_STREAMS = {"nonkyc": "wss://ws.nonkyc.io"}
+
+MARKET_STREAM_MAX_AGE is how many seconds streamed tickers are trusted without an
+update before requests fall back to the REST API again.
+"""
+
+MARKET_STREAMS: dict[str, str] = {}
+MARKET_STREAM_MAX_AGE = 300
+
 # Server
 """
 CORS_ALLOW_ORIGIN controls which browser origins may call the API.
@@ -88,7 +179,8 @@ CORS_ALLOW_ORIGIN = "*"
 # Redis
 """
 REDIS_URL is the connection string for the Redis (or Valkey) instance that backs
-the rate limiter, so limits survive restarts and are shared across workers.
+the rate limiter, so limits survive restarts and are shared across workers. It
+also holds the scheduler lease that elects one worker to run shared jobs.
 
 When running the Docker stack, point it at the bundled "redis" service:
 
@@ -101,11 +193,160 @@ For local development, run Redis/Valkey locally and use:
 
 REDIS_URL = "redis://localhost:6379/0"
 
+# Scheduler
+"""
+SCHEDULER_LEASE_TTL is how long, in seconds, the worker running shared jobs
+(such as the daily analytics prune) holds its Redis lease. The lease is renewed
+every third of this; if the worker dies, another takes over within this long.
+"""
+
+SCHEDULER_LEASE_TTL = 30
+
+# Network statistics
+"""
+Each worker keeps the headers of the last NETWORK_STATS_CAPACITY blocks (a week
+at one block a minute) in memory, checking the daemon for new blocks every
+NETWORK_STATS_INTERVAL seconds. /daemon/get_network_stats summarizes any
+window of up to NETWORK_STATS_CAPACITY of those blocks.
+"""
+
+NETWORK_STATS_CAPACITY = 10080
+NETWORK_STATS_INTERVAL = 10
+
+# Emission ledger
+"""
+/daemon/get_generated_coins sums the reward of every block, kept up to date in
+Redis by the scheduler leader every EMISSION_LEDGER_INTERVAL seconds. Block
+rewards include the fees their miners collected, so the sum counts those too.
+The first run adds up the whole chain, which takes a while; until it finishes,
+the route returns an estimate from a checkpoint instead.
+"""
+
+EMISSION_LEDGER_INTERVAL = 30
+
+# Warm-up
+"""
+Once serving, each worker checks Redis (and MongoDB, with analytics enabled),
+opens WARMUP_CONNECTIONS connections to the daemon and caches the responses of
+WARMUP_ROUTES. Until that succeeds, /ready answers 503; /v1/ stays a plain
+liveness check.
+
+Hypercorn's workers share one socket, so /ready only reports on whichever
+worker answers it: it tells a healthcheck that the API can serve, but cannot
+keep requests away from a worker that is still warming up.
+"""
+
+WARMUP_CONNECTIONS = 4
+WARMUP_ROUTES = [
+    "/v1/daemon/get_info",
+    "/v1/daemon/get_version",
+    "/v1/daemon/get_block_count",
+    "/v1/daemon/get_last_block_header",
+    "/v1/daemon/hard_fork_info",
+    "/v1/daemon/get_fee_estimate",
+]
+
+# Profiling
+"""
+With PROFILING_ENABLED, the /v1/admin/profiling routes let an operator profile
+a live worker. Every request must carry "Authorization: Bearer <ADMIN_TOKEN>";
+while either setting is unset, the routes answer 404.
+
+- POST /admin/profiling/memory/start starts tracing allocations, and
+  GET /admin/profiling/memory/diff reports what has grown since then
+  (?group_by=lineno|filename|traceback, ?limit, ?rebase=true to diff against
+  this snapshot next time). POST /admin/profiling/memory/stop ends tracing,
+  which slows every allocation down while it runs.
+- GET /admin/profiling/cpu?seconds=10 samples the event loop's stack and
+  returns collapsed stacks, for flamegraph.pl or speedscope.
+- GET /admin/profiling/loop?seconds=10&threshold=0.1 reports event loop lag
+  and every callback that held the loop for longer than threshold seconds.
+
+Captures last at most PROFILING_MAX_SECONDS. Event loop lag is also measured
+continuously, every PROFILING_LAG_INTERVAL seconds, shown in /v1/metrics and
+logged when it exceeds PROFILING_LAG_THRESHOLD seconds. Each worker profiles
+itself only, so run a single worker while profiling.
+
+ADMIN_TOKEN also guards /v1/metrics, whether or not profiling is enabled; while
+it is unset, that route answers 404 too.
+
+>>> curl -OJ -H "Authorization: Bearer $TOKEN" .../v1/admin/profiling/cpu
+"""
+
+PROFILING_ENABLED = False
+ADMIN_TOKEN = ""
+PROFILING_MAX_SECONDS = 60
+PROFILING_LAG_INTERVAL = 0.5
+PROFILING_LAG_THRESHOLD = 0.1
+
+# Admission control
+"""
+ADMISSION_LIMITS caps, per upstream ("daemon", "mongo" and "exchanges"), how
+many requests may be in flight at once ("concurrency"), how many more may wait
+for a slot ("queue_size") and how long, in seconds, each may wait ("timeout").
+Requests beyond that are rejected with a 503 and a Retry-After header. Cheap
+routes are admitted ahead of expensive ones while requests are queued. Omitted
+upstreams and keys keep their defaults, for example:
+
+    ADMISSION_LIMITS = {"daemon": {"concurrency": 16, "queue_size": 128}}
+"""
+
+ADMISSION_LIMITS: dict[str, dict[str, float]] = {}
+
+# Response cache
+"""
+Daemon and market responses are cached for a few seconds to a few minutes,
+depending on the route, in each worker's memory (up to RESPONSE_CACHE_SIZE
+responses) and in Redis, which all workers share. RESPONSE_CACHE_TTLS
+overrides a route's TTL, in seconds, by its rule; 0 disables caching for it:
+
+    RESPONSE_CACHE_TTLS = {"/v1/daemon/get_info": 2}
+"""
+
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTLS: dict[str, float] = {}
+
+# Access log
+"""
+ACCESS_LOG_ENABLED writes one JSON line per request to logs/access.log, with
+the route, status, latency and client. Logging happens off the event loop, but
+busy deployments should still sample: ACCESS_LOG_SAMPLE_RATE is the fraction
+of requests logged (0.0 to 1.0), and ACCESS_LOG_SAMPLE_RATES overrides it per
+route rule. Server errors are always logged. For example:
+
+    ACCESS_LOG_SAMPLE_RATES = {"/v1/daemon/get_info": 0.01}
+"""
+
+ACCESS_LOG_ENABLED = False
+ACCESS_LOG_SAMPLE_RATE = 1.0
+ACCESS_LOG_SAMPLE_RATES: dict[str, float] = {}
+
 # Rate limiting
 """
 RATE_LIMIT_COUNT requests are allowed per RATE_LIMIT_PERIOD seconds, per client
-IP and per category (daemon, market, analytics).
+IP and per route.
+
+Heavier routes cost more than one request: get_transaction_pool costs 5, wide
+get_block_headers_range calls and get_transactions with many hashes scale with
+their size, and decode_outputs costs 5 plus one per hash. RATE_LIMIT_COSTS
+overrides the cost of any route by its rule, for example:
+
+    RATE_LIMIT_COSTS = {"/v1/daemon/get_transaction_pool": 10}
 """
 
 RATE_LIMIT_COUNT = 120
 RATE_LIMIT_PERIOD = 60
+RATE_LIMIT_COSTS: dict[str, int] = {}
+
+# Rate limit leases
+"""
+To avoid a Redis round trip on every request, each worker leases
+RATE_LIMIT_LEASE_SIZE tokens at a time per client and route, spends them
+locally, and refunds whatever is left after RATE_LIMIT_LEASE_TTL seconds.
+Limits are never exceeded, but a client spread across N workers may be refused
+up to (N - 1) x RATE_LIMIT_LEASE_SIZE requests early until leases expire. Set
+RATE_LIMIT_LEASE_SIZE to 0 to check every request against Redis instead.
+"""
+
+RATE_LIMIT_LEASE_SIZE = 10
+RATE_LIMIT_LEASE_TTL = 5
@@ -0,0 +1,258 @@
+from typing import Any
+
+import asyncio
+import logging
+
+import httpx
+from nerva import DaemonRPC, DaemonHTTP
+
+from backend import epee, metrics
+
+logger = logging.getLogger(__name__)
+
+PendingCall = tuple[dict[str, Any], asyncio.Future[dict[str, Any]]]
+
+
+def _settle(
+    future: asyncio.Future[dict[str, Any]], outcome: dict[str, Any] | Exception
+) -> None:
+    # Callers cancelled while waiting have already given up on the reply.
+    if future.done():
+        return
+
+    if isinstance(outcome, Exception):
+        future.set_exception(outcome)
+    else:
+        future.set_result(outcome)
+
+
+class DaemonTransport:
+    """
+    One long-lived, pooled HTTP client for every call to the daemon, so
+    requests reuse keep-alive connections instead of opening one each.
+
+    With ``batching`` on, JSON-RPC calls made within ``batch_window`` seconds
+    of each other go out as a single JSON-RPC batch and the replies are
+    matched back to their callers by id. Daemons that do not accept batches
+    are detected on the first attempt, after which calls are sent one by one.
+    """
+
+    def __init__(self) -> None:
+        self.url: str = "http://localhost:17566"
+        self.auth: httpx.Auth | None = None
+        self.timeout: float | None = 10.0
+        self.max_connections: int = 32
+        self.batching: bool = False
+        self.batch_window: float = 0.002
+        self.batch_size: int = 32
+        self.requests: int = 0
+        self.batches: int = 0
+        self.batched_calls: int = 0
+
+        self._client: httpx.AsyncClient | None = None
+        self._pending: list[PendingCall] = []
+        self._flush: asyncio.TimerHandle | None = None
+        self._ids: int = 0
+        self._dispatches: set[asyncio.Task[None]] = set()
+
+    def configure(
+        self,
+        *,
+        url: str,
+        auth: httpx.Auth | None,
+        timeout: float | None,
+        max_connections: int,
+        batching: bool,
+        batch_window: float,
+        batch_size: int,
+    ) -> None:
+        self.url = url
+        self.auth = auth
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.batching = batching
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Built on first use so that it binds to the serving event loop.
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.url,
+                auth=self.auth,
+                timeout=self.timeout,
+                headers={"Content-Type": "application/json"},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def post(self, path: str, body: Any) -> Any:
+        self.requests += 1
+        response = await self.client.post(path, json=body)
+        return response.json()
+
+    async def post_binary(self, path: str, body: bytes) -> httpx.Response:
+        self.requests += 1
+        return await self.client.post(
+            path, content=body, headers={"Content-Type": "application/octet-stream"}
+        )
+
+    async def call(self, method: str, params: dict[str, Any]) -> dict[str, Any]:
+        payload = {"jsonrpc": "2.0", "id": 0, "method": method, "params": params}
+
+        if not self.batching:
+            result: dict[str, Any] = await self.post("/json_rpc", payload)
+            return result
+
+        future: asyncio.Future[dict[str, Any]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._pending.append((payload, future))
+
+        if len(self._pending) >= self.batch_size:
+            self._send()
+
+        elif self._flush is None:
+            self._flush = asyncio.get_running_loop().call_later(
+                self.batch_window, self._send
+            )
+
+        return await future
+
+    def _send(self) -> None:
+        if self._flush is not None:
+            self._flush.cancel()
+            self._flush = None
+
+        calls, self._pending = self._pending, []
+        if calls:
+            task = asyncio.create_task(self._dispatch(calls))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _single(
+        self, payload: dict[str, Any], future: asyncio.Future[dict[str, Any]]
+    ) -> None:
+        try:
+            _settle(future, await self.post("/json_rpc", payload))
+
+        except Exception as e:
+            _settle(future, e)
+
+    async def _dispatch(self, calls: list[PendingCall]) -> None:
+        if len(calls) == 1:
+            await self._single(*calls[0])
+            return
+
+        batch: list[dict[str, Any]] = []
+        waiting: dict[int, asyncio.Future[dict[str, Any]]] = {}
+
+        for payload, future in calls:
+            self._ids += 1
+            batch.append({**payload, "id": self._ids})
+            waiting[self._ids] = future
+
+        try:
+            replies = await self.post("/json_rpc", batch)
+
+        except httpx.HTTPError as e:
+            for future in waiting.values():
+                _settle(future, e)
+            return
+
+        except ValueError:
+            replies = None
+
+        if not isinstance(replies, list):
+            logger.warning("Daemon rejected a JSON-RPC batch; disabling batching")
+            self.batching = False
+
+            await asyncio.gather(
+                *(self._single(payload, future) for payload, future in calls)
+            )
+            return
+
+        self.batches += 1
+        self.batched_calls += len(calls)
+
+        for reply in replies:
+            if reply.get("id") in waiting:
+                _settle(waiting.pop(reply["id"]), {**reply, "id": 0})
+
+        for future in waiting.values():
+            _settle(
+                future, {"error": {"code": -32603, "message": "No reply in batch"}}
+            )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "batched_calls": self.batched_calls,
+            "batching": self.batching,
+        }
+
+
+daemon_transport: DaemonTransport = DaemonTransport()
+
+
+class PooledDaemonRPC(DaemonRPC):  # type: ignore[misc]
+    """A ``DaemonRPC`` whose JSON-RPC calls go through ``daemon_transport``."""
+
+    async def _request(
+        self, *, method: str, params: dict[str, Any]
+    ) -> dict[str, Any]:
+        return await daemon_transport.call(method, params)
+
+
+class PooledDaemonHTTP(DaemonHTTP):  # type: ignore[misc]
+    """A ``DaemonHTTP`` whose endpoint calls go through ``daemon_transport``."""
+
+    async def _request(
+        self, *, endpoint: str, params: dict[str, Any]
+    ) -> dict[str, Any]:
+        result: dict[str, Any] = await daemon_transport.post(f"/{endpoint}", params)
+        return result
+
+    async def _request_binary(
+        self, *, endpoint: str, params: dict[str, Any]
+    ) -> dict[str, Any]:
+        response = await daemon_transport.post_binary(
+            f"/{endpoint}", epee.dumps(params)
+        )
+
+        if response.status_code != 200:
+            return {
+                "error": {
+                    "code": response.status_code,
+                    "message": f"Daemon returned HTTP {response.status_code}",
+                }
+            }
+
+        data = epee.loads(response.content)
+        status = str(data.get("status", b"OK"), "utf-8")
+        if status != "OK":
+            return {"error": {"code": -1, "message": status}}
+
+        return data
+
+    async def get_blocks_by_height_bin(
+        self, *, heights: list[int]
+    ) -> dict[str, Any]:
+        # nerva sends the .bin endpoints JSON, which the daemon does not read.
+        return await self._request_binary(
+            endpoint="get_blocks_by_height.bin", params={"heights": heights}
+        )
+
+
+metrics.register("daemon_transport", daemon_transport.stats)
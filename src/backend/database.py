@@ -0,0 +1,31 @@
+from typing import Any
+
+
+class LazyDatabase:
+    """
+    Stands in for a Motor database, importing Motor and creating the client
+    only when it is first used, so workers with analytics disabled never load
+    the driver or connect to MongoDB.
+    """
+
+    def __init__(self, uri: str, name: str) -> None:
+        self._uri = uri
+        self._name = name
+        self._database: Any = None
+
+    @property
+    def database(self) -> Any:
+        if self._database is None:
+            import motor.motor_asyncio
+
+            self._database = motor.motor_asyncio.AsyncIOMotorClient(self._uri)[
+                self._name
+            ]
+
+        return self._database
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.database, name)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.database[name]
@@ -0,0 +1,212 @@
+from typing import Any
+
+import asyncio
+import logging
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, WatchError
+
+from backend import metrics
+from backend.chain import HEADERS_PER_CALL, fetch_headers
+from backend.admission import PRIORITY_LOW, limiters
+from backend.scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+# Atomic units per XNV.
+ATOMIC_UNITS: int = 10**12
+
+# Blocks kept with their reward, so a reorganization this deep can be undone
+# without rebuilding the ledger from genesis.
+REWIND_DEPTH: int = 1000
+
+
+class EmissionLedger:
+    """
+    The sum of the reward of every block up to ``height``, kept in Redis so
+    reads are a single lookup shared by every worker.
+
+    The elected scheduler leader maintains it: from genesis in chunks of
+    ``HEADERS_PER_CALL`` headers, each committed on its own so a restarted or
+    replaced leader resumes where the last one stopped, then a few blocks at a
+    time as they arrive. The rewards of the last ``REWIND_DEPTH`` blocks are
+    kept alongside, and a block the daemon's chain no longer builds on is
+    subtracted again. Totals are kept as exact integers of atomic units.
+
+    A header's reward is the miner's whole coinbase output, so the transaction
+    fees of each block are counted along with its emission. Fees move coins
+    that already exist, and the total overstates the supply by every fee paid
+    to date. The daemon only reports fees apart from emission through
+    get_coinbase_tx_sum, which restricted nodes refuse.
+    """
+
+    def __init__(self) -> None:
+        self.key: str = "nerva-api:emission"
+        self.rewinds: int = 0
+        self.height: int = -1
+        self.synced: bool = False
+
+        self._redis: Redis | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def recent_key(self) -> str:
+        return f"{self.key}:recent"
+
+    @property
+    def redis(self) -> Redis:
+        if self._redis is None:
+            raise RuntimeError("The emission ledger has not been configured")
+
+        return self._redis
+
+    def configure(self, *, url: str) -> None:
+        self._redis = Redis.from_url(url)
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def total(self) -> int | None:
+        """The emission in atomic units, or None until the backfill is done."""
+
+        total, synced = await self.redis.hmget(self.key, ["total", "synced"])  # type: ignore[misc]
+        if not synced:
+            return None
+
+        return int(total)
+
+    async def update(self) -> None:
+        # The backfill outlives a scheduling interval; runs must not overlap.
+        if self._lock.locked():
+            return
+
+        async with self._lock:
+            from backend.factory import daemon
+
+            async with limiters["daemon"].slot(PRIORITY_LOW):
+                data: dict[str, Any] = await daemon.get_last_block_header()
+
+            if "error" in data:
+                logger.error(f"Failed to fetch the chain tip: {data['error']}")
+                return
+
+            tip: dict[str, Any] = data["result"]["block_header"]
+
+            # Stop between chunks if another worker has taken over.
+            while scheduler.lease.held:
+                try:
+                    if not await self._step(tip):
+                        break
+
+                except WatchError:
+                    logger.warning("Emission ledger changed concurrently, retrying")
+
+    async def _step(self, tip: dict[str, Any]) -> bool:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            await pipe.watch(self.key, self.recent_key)
+
+            state: dict[bytes, bytes] = await pipe.hgetall(self.key)  # type: ignore[misc]
+            height = int(state.get(b"height", -1))
+            last_hash = state.get(b"hash", b"").decode()
+            total = int(state.get(b"total", 0))
+            self.height = height
+            self.synced = b"synced" in state
+
+            if height == tip["height"] and last_hash == tip["hash"]:
+                if not self.synced:
+                    pipe.multi()  # type: ignore[no-untyped-call]
+                    pipe.hset(self.key, "synced", "1")
+                    await pipe.execute()
+                    self.synced = True
+                    logger.info(f"Emission ledger synced at height {height}")
+
+                return False
+
+            first = height + 1
+            headers = (
+                await fetch_headers(
+                    first, min(tip["height"], first + HEADERS_PER_CALL - 1)
+                )
+                if first <= tip["height"]
+                else []
+            )
+
+            if height >= 0 and (not headers or headers[0]["prev_hash"] != last_hash):
+                await self._rewind(pipe, height, total)
+                return True
+
+            entries = [
+                f"{header['height']}:{header['hash']}:{header['prev_hash']}:{header['reward']}"
+                for header in headers
+            ]
+
+            pipe.multi()  # type: ignore[no-untyped-call]
+            pipe.hset(
+                self.key,
+                mapping={
+                    "height": headers[-1]["height"],
+                    "hash": headers[-1]["hash"],
+                    "total": total + sum(header["reward"] for header in headers),
+                },
+            )
+            pipe.rpush(self.recent_key, *entries[-REWIND_DEPTH:])
+            pipe.ltrim(self.recent_key, -REWIND_DEPTH, -1)
+            await pipe.execute()
+
+        self.height = headers[-1]["height"]
+        return True
+
+    async def _rewind(self, pipe: Any, height: int, total: int) -> None:
+        entry: bytes | None = await pipe.lindex(self.recent_key, -1)
+
+        pipe.multi()
+
+        if entry is None:
+            # Deeper than the rewards kept: start over from genesis.
+            logger.warning(
+                f"Reorganization below {height - REWIND_DEPTH}, rebuilding emission"
+            )
+            pipe.delete(self.key, self.recent_key)
+
+        else:
+            _, _, prev_hash, reward = entry.decode().split(":")
+            logger.warning(f"Reorganization: removing block {height} from emission")
+            pipe.hset(
+                self.key,
+                mapping={
+                    "height": height - 1,
+                    "hash": prev_hash,
+                    "total": total - int(reward),
+                },
+            )
+            pipe.rpop(self.recent_key)
+
+        await pipe.execute()
+        self.rewinds += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "height": self.height,
+            "synced": self.synced,
+            "rewinds": self.rewinds,
+        }
+
+
+emission_ledger: EmissionLedger = EmissionLedger()
+
+metrics.register("emission", emission_ledger.stats)
+
+
+async def generated_coins() -> float | None:
+    """The emission in XNV, fees included, or None if the ledger cannot answer yet."""
+
+    try:
+        total = await emission_ledger.total()
+
+    except RedisError as e:
+        logger.warning(f"Failed to read the emission ledger: {e}")
+        return None
+
+    return total / ATOMIC_UNITS if total is not None else None
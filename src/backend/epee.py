@@ -0,0 +1,229 @@
+from typing import Any
+
+import struct
+
+# Portable storage header: two signature words and the format version.
+SIGNATURE: bytes = b"\x01\x11\x01\x01\x01\x01\x02\x01\x01"
+
+TYPE_INT64: int = 1
+TYPE_INT32: int = 2
+TYPE_INT16: int = 3
+TYPE_INT8: int = 4
+TYPE_UINT64: int = 5
+TYPE_UINT32: int = 6
+TYPE_UINT16: int = 7
+TYPE_UINT8: int = 8
+TYPE_DOUBLE: int = 9
+TYPE_STRING: int = 10
+TYPE_BOOL: int = 11
+TYPE_OBJECT: int = 12
+TYPE_ARRAY: int = 13
+
+# Set on a type to mark an array of that type.
+ARRAY_FLAG: int = 0x80
+
+# struct codes of the fixed-size types, by type.
+_CODES: dict[int, str] = {
+    TYPE_INT64: "q",
+    TYPE_INT32: "i",
+    TYPE_INT16: "h",
+    TYPE_INT8: "b",
+    TYPE_UINT64: "Q",
+    TYPE_UINT32: "I",
+    TYPE_UINT16: "H",
+    TYPE_UINT8: "B",
+    TYPE_DOUBLE: "d",
+}
+
+_SCALARS: dict[int, struct.Struct] = {
+    kind: struct.Struct(f"<{code}") for kind, code in _CODES.items()
+}
+
+
+class EpeeError(ValueError):
+    pass
+
+
+def _varint(view: memoryview, offset: int) -> tuple[int, int]:
+    # The low two bits of the first byte give the width: 1, 2, 4 or 8 bytes.
+    size = 1 << (view[offset] & 0x03)
+    end = offset + size
+    if end > len(view):
+        raise EpeeError("Truncated varint")
+
+    return int.from_bytes(view[offset:end], "little") >> 2, end
+
+
+def _value(view: memoryview, offset: int, kind: int) -> tuple[Any, int]:
+    if kind & ARRAY_FLAG:
+        return _array(view, offset, kind & ~ARRAY_FLAG)
+
+    scalar = _SCALARS.get(kind)
+    if scalar is not None:
+        return scalar.unpack_from(view, offset)[0], offset + scalar.size
+
+    if kind == TYPE_STRING:
+        length, offset = _varint(view, offset)
+        end = offset + length
+        if end > len(view):
+            raise EpeeError("Truncated string")
+
+        return view[offset:end], end
+
+    if kind == TYPE_BOOL:
+        return view[offset] != 0, offset + 1
+
+    if kind == TYPE_OBJECT:
+        return _section(view, offset)
+
+    if kind == TYPE_ARRAY:
+        # An untyped array carries its element type as the next byte.
+        return _value(view, offset + 1, view[offset])
+
+    raise EpeeError(f"Unknown type {kind}")
+
+
+def _array(view: memoryview, offset: int, kind: int) -> tuple[list[Any], int]:
+    count, offset = _varint(view, offset)
+
+    code = _CODES.get(kind)
+    if code is not None:
+        # Fixed-size elements unpack in one call instead of one per element.
+        items = struct.Struct(f"<{count}{code}")
+        return list(items.unpack_from(view, offset)), offset + items.size
+
+    values: list[Any] = []
+    for _ in range(count):
+        value, offset = _value(view, offset, kind)
+        values.append(value)
+
+    return values, offset
+
+
+def _section(view: memoryview, offset: int) -> tuple[dict[str, Any], int]:
+    count, offset = _varint(view, offset)
+    section: dict[str, Any] = {}
+
+    for _ in range(count):
+        length = view[offset]
+        name = str(view[offset + 1 : offset + 1 + length], "utf-8")
+        offset += 1 + length
+
+        section[name], offset = _value(view, offset + 1, view[offset])
+
+    return section, offset
+
+
+def loads(data: bytes | bytearray | memoryview) -> dict[str, Any]:
+    """
+    Decodes an epee portable storage document, as returned by the daemon's
+    ``.bin`` endpoints.
+
+    String values are returned as ``memoryview`` slices of ``data`` rather
+    than copies, so large blobs cost nothing until they are used; call
+    ``.hex()`` or ``bytes()`` on them as needed.
+    """
+
+    view = memoryview(data)
+    if view[: len(SIGNATURE)] != SIGNATURE:
+        raise EpeeError("Not a portable storage document")
+
+    try:
+        section, _ = _section(view, len(SIGNATURE))
+
+    except (IndexError, struct.error) as e:
+        raise EpeeError("Truncated document") from e
+
+    return section
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    if value < 1 << 6:
+        out += (value << 2).to_bytes(1, "little")
+    elif value < 1 << 14:
+        out += (value << 2 | 1).to_bytes(2, "little")
+    elif value < 1 << 30:
+        out += (value << 2 | 2).to_bytes(4, "little")
+    elif value < 1 << 62:
+        out += (value << 2 | 3).to_bytes(8, "little")
+    else:
+        raise EpeeError(f"Varint out of range: {value}")
+
+
+def _kind(value: Any) -> int:
+    # bool before int, since bool is a subclass of int.
+    if isinstance(value, bool):
+        return TYPE_BOOL
+    if isinstance(value, int):
+        return TYPE_INT64 if value < 0 else TYPE_UINT64
+    if isinstance(value, float):
+        return TYPE_DOUBLE
+    if isinstance(value, str | bytes | bytearray | memoryview):
+        return TYPE_STRING
+    if isinstance(value, dict):
+        return TYPE_OBJECT
+
+    raise EpeeError(f"Cannot encode {type(value).__name__}")
+
+
+def _write_value(out: bytearray, kind: int, value: Any) -> None:
+    scalar = _SCALARS.get(kind)
+    if scalar is not None:
+        out += scalar.pack(value)
+
+    elif kind == TYPE_STRING:
+        blob = value.encode() if isinstance(value, str) else value
+        _write_varint(out, len(blob))
+        out += blob
+
+    elif kind == TYPE_BOOL:
+        out.append(1 if value else 0)
+
+    else:
+        _write_section(out, value)
+
+
+def _write_section(out: bytearray, section: dict[str, Any]) -> None:
+    # epee omits empty containers rather than typing an empty array.
+    entries = [
+        (name, value)
+        for name, value in section.items()
+        if not (isinstance(value, list) and not value)
+    ]
+    _write_varint(out, len(entries))
+
+    for name, value in entries:
+        key = name.encode()
+        out.append(len(key))
+        out += key
+
+        if not isinstance(value, list):
+            kind = _kind(value)
+            out.append(kind)
+            _write_value(out, kind, value)
+            continue
+
+        kind = _kind(value[0])
+        if kind == TYPE_UINT64 and any(item < 0 for item in value):
+            kind = TYPE_INT64
+
+        out.append(kind | ARRAY_FLAG)
+        _write_varint(out, len(value))
+
+        if kind in _CODES:
+            out += struct.pack(f"<{len(value)}{_CODES[kind]}", *value)
+        else:
+            for item in value:
+                _write_value(out, kind, item)
+
+
+def dumps(section: dict[str, Any]) -> bytes:
+    """
+    Encodes ``section`` as an epee portable storage document. Integers are
+    sent as 64-bit (unsigned unless negative), which the daemon converts to
+    the width of the field it reads them into.
+    """
+
+    out = bytearray(SIGNATURE)
+    _write_section(out, section)
+    return bytes(out)
@@ -1,57 +1,37 @@
 from typing import Any
 
-import sys
 import asyncio
 from datetime import timedelta
-from logging.config import dictConfig
 
-import schedule
-import motor.motor_asyncio
 from nerva import DaemonRPC, DaemonHTTP
 from quart import Quart, Response, jsonify, request
-from redis import Redis
 from quart_cors import cors
+from redis.asyncio import Redis
 from redis.exceptions import RedisError
-from quart_rate_limiter import RateLimiter, limit_blueprint
-from quart_rate_limiter.redis_store import RedisStore
+from quart_rate_limiter import limit_blueprint
+
+from backend import metrics
+from backend.logs import setup_logging, register_access_log
+from backend.cache import response_cache
+from backend.chain import chain_follower
+from backend.daemon import PooledDaemonRPC, PooledDaemonHTTP, daemon_transport
+from backend.warmup import ROUTES, warm_up
+from backend.database import LazyDatabase
+from backend.emission import emission_ledger
+from backend.admission import Overloaded, configure_admission
+from backend.profiling import loop_monitor
+from backend.ratelimit import CostRateLimiter, HybridRateLimiter
+from backend.scheduler import scheduler
 
 daemon: DaemonRPC
 daemon_legacy: DaemonHTTP
 
-db: motor.motor_asyncio.AsyncIOMotorDatabase[dict[str, Any]]
+db: LazyDatabase
 
 analytics_enabled: bool = False
 
 
-dictConfig(
-    {
-        "version": 1,
-        "formatters": {
-            "default": {
-                "format": "[%(asctime)s] %(levelname)s | %(module)s >>> %(message)s",
-                "datefmt": "%B %d, %Y %H:%M:%S %Z",
-            }
-        },
-        "handlers": {
-            "time-rotate": {
-                "class": "logging.handlers.TimedRotatingFileHandler",
-                "formatter": "default",
-                "filename": "logs/app.log",
-                "when": "midnight",
-                "interval": 1,
-                "backupCount": 7,
-                "encoding": "utf-8",
-            },
-        },
-        "root": {"level": "INFO", "handlers": ["time-rotate"]},
-    }
-)
-
-
-async def schedule_task() -> None:
-    while True:
-        schedule.run_pending()
-        await asyncio.sleep(1)
+setup_logging()
 
 
 async def prune_analytics() -> None:
@@ -63,9 +43,59 @@ async def prune_analytics() -> None:
     await prune_stale_analytics()
 
 
-def setup_schedule() -> None:
-    schedule.every().day.at("00:00").do(
-        lambda: asyncio.create_task(prune_analytics())
+async def migrate_analytics() -> None:
+    if not analytics_enabled:
+        return
+
+    from backend.blueprints.analytics.geo import geo_cache
+    from backend.blueprints.analytics.schema import ensure_analytics_schema
+
+    await ensure_analytics_schema()
+    await geo_cache.ensure_indexes()
+
+
+async def rebuild_analytics_rollups() -> None:
+    if not analytics_enabled:
+        return
+
+    from backend.blueprints.analytics.rollups import rebuild_rollups
+
+    await rebuild_rollups()
+
+
+async def reload_geoip() -> None:
+    if not analytics_enabled:
+        return
+
+    from backend.blueprints.analytics.geo import reload_backend
+
+    await reload_backend()
+
+
+def setup_schedule(config: dict[str, Any]) -> None:
+    # Jobs that write shared state run on the elected leader only; the GeoIP
+    # reader and the header window live in each worker, so every worker
+    # refreshes its own.
+    scheduler.daily("prune_analytics", "00:00", prune_analytics, leader=True)
+    # A new leader runs this at once, as a missed job; migrations and index
+    # builds are no-ops once applied, and a failed run is retried hourly.
+    scheduler.every(
+        "migrate_analytics", timedelta(hours=1), migrate_analytics, leader=True
+    )
+    scheduler.daily(
+        "rebuild_analytics_rollups", "12:00", rebuild_analytics_rollups, leader=True
+    )
+    scheduler.every("reload_geoip", timedelta(hours=1), reload_geoip)
+    scheduler.every(
+        "follow_chain",
+        timedelta(seconds=config.get("NETWORK_STATS_INTERVAL", 10)),
+        chain_follower.poll,
+    )
+    scheduler.every(
+        "update_emission",
+        timedelta(seconds=config.get("EMISSION_LEDGER_INTERVAL", 30)),
+        emission_ledger.update,
+        leader=True,
     )
 
 
@@ -80,41 +110,76 @@ def create_app() -> Quart:
     app = cors(app, allow_origin=app.config["CORS_ALLOW_ORIGIN"])
 
     # Fail fast if the rate-limiter's Redis backend is unreachable, rather than
-    # erroring on every request once the app is serving.
-    try:
-        with Redis.from_url(app.config["REDIS_URL"]) as probe:
-            probe.ping()
-    except (RedisError, TimeoutError):
-        print("Failed to connect to Redis. Exiting...")
-        sys.exit(1)
+    # erroring on every request once the app is serving. Registered first, so
+    # it runs before anything else that needs Redis.
+    @app.before_serving
+    async def _check_redis() -> None:
+        probe = Redis.from_url(app.config["REDIS_URL"])
+
+        try:
+            await probe.ping()  # type: ignore[misc]
+
+        except (RedisError, OSError) as e:
+            raise RuntimeError("Failed to connect to Redis") from e
+
+        finally:
+            await probe.aclose()
 
     # Back the rate limiter with Redis so limits survive restarts and are shared
     # across workers (the in-process MemoryStore default does neither).
-    RateLimiter(
-        app,
-        key_function=_rate_limit_key,
-        store=RedisStore(app.config["REDIS_URL"]),
+    # Workers lease blocks of tokens and spend them locally, unless leasing is
+    # turned off, in which case every request is checked against Redis.
+    lease_size: int = app.config.get("RATE_LIMIT_LEASE_SIZE", 10)
+
+    if lease_size > 0:
+        limiter = HybridRateLimiter(
+            app,
+            app.config["REDIS_URL"],
+            lease_size=lease_size,
+            lease_ttl=app.config.get("RATE_LIMIT_LEASE_TTL", 5),
+            key_function=_rate_limit_key,
+        )
+        metrics.register("rate_limiter", limiter.stats)
+
+    else:
+        CostRateLimiter(app, app.config["REDIS_URL"], key_function=_rate_limit_key)
+
+    configure_admission(app.config)
+
+    response_cache.configure(
+        url=app.config["REDIS_URL"],
+        size=app.config.get("RESPONSE_CACHE_SIZE", 1024),
     )
 
+    if app.config.get("ACCESS_LOG_ENABLED", False):
+        register_access_log(app)
+
     global analytics_enabled
     analytics_enabled = app.config["ANALYTICS_ENABLED"]
 
     global daemon, daemon_legacy
-    daemon = DaemonRPC(
+    daemon = PooledDaemonRPC(
         host=app.config["DAEMON_RPC_HOST"],
         port=app.config["DAEMON_RPC_PORT"],
         ssl=app.config["DAEMON_RPC_SSL"],
     )
-    daemon_legacy = DaemonHTTP(
+    daemon_legacy = PooledDaemonHTTP(
         host=app.config["DAEMON_RPC_HOST"],
         port=app.config["DAEMON_RPC_PORT"],
         ssl=app.config["DAEMON_RPC_SSL"],
     )
+    daemon_transport.configure(
+        url=daemon.url,
+        auth=daemon.auth,
+        timeout=daemon.timeout,
+        max_connections=app.config.get("DAEMON_RPC_MAX_CONNECTIONS", 32),
+        batching=app.config.get("DAEMON_RPC_BATCHING", False),
+        batch_window=app.config.get("DAEMON_RPC_BATCH_WINDOW", 0.002),
+        batch_size=app.config.get("DAEMON_RPC_BATCH_SIZE", 32),
+    )
 
     global db
-    db = motor.motor_asyncio.AsyncIOMotorClient(app.config["MONGODB_URI"])[
-        app.config["MONGODB_DB"]
-    ]
+    db = LazyDatabase(app.config["MONGODB_URI"], app.config["MONGODB_DB"])
 
     @app.errorhandler(400)
     async def _handle_bad_request(_: Exception) -> tuple[Response, int]:
@@ -136,6 +201,12 @@ def create_app() -> Quart:
     async def _handle_server_error(_: Exception) -> tuple[Response, int]:
         return jsonify({"error": "Internal server error"}), 500
 
+    @app.errorhandler(Overloaded)
+    async def _handle_overloaded(e: Overloaded) -> tuple[Response, int]:
+        response = jsonify({"error": "Service overloaded, try again later"})
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response, 503
+
     @app.errorhandler(asyncio.TimeoutError)
     async def _handle_timeout_error(_: Exception) -> tuple[Response, int]:
         return jsonify({"error": "Request to daemon timed out"}), 504
@@ -147,6 +218,7 @@ def create_app() -> Quart:
 
     from backend.blueprints import (
         api_bp,
+        admin_bp,
         index_bp,
         daemon_bp,
         market_bp,
@@ -156,6 +228,7 @@ def create_app() -> Quart:
     count: int = app.config["RATE_LIMIT_COUNT"]
     period: timedelta = timedelta(seconds=app.config["RATE_LIMIT_PERIOD"])
 
+    limit_blueprint(admin_bp, count, period)
     limit_blueprint(analytics_bp, count, period)
     limit_blueprint(daemon_bp, count, period)
     limit_blueprint(index_bp, count, period)
@@ -163,9 +236,81 @@ def create_app() -> Quart:
 
     app.register_blueprint(api_bp)
 
+    # Outside /v1 and unlimited, for the proxy's and orchestrator's probes.
+    @app.route("/ready", methods=["GET"])
+    async def _ready() -> tuple[Response, int]:
+        if not warm_up.ready:
+            return jsonify({"status": "warming up"}), 503
+
+        return jsonify({"status": "ready"}), 200
+
+    @app.before_serving
+    async def _prepare_analytics() -> None:
+        if not analytics_enabled:
+            return
+
+        from backend.blueprints.analytics.geo import reload_backend
+        from backend.blueprints.analytics.buffer import write_buffer
+
+        # Schema migrations run on the scheduler leader (migrate_analytics).
+        # Nothing here may keep the daemon and market routes from serving.
+        try:
+            await reload_backend(force=True)
+
+        except Exception as e:
+            app.logger.error(f"Failed to load the GeoIP database: {e}")
+
+        write_buffer.start()
+
+    @app.after_serving
+    async def _flush_analytics() -> None:
+        if not analytics_enabled:
+            return
+
+        from backend.blueprints.analytics.buffer import write_buffer
+
+        await write_buffer.stop()
+
     @app.before_serving
     async def _start_scheduler() -> None:
-        setup_schedule()
-        app.add_background_task(schedule_task)
+        scheduler.configure(
+            redis_url=app.config["REDIS_URL"],
+            lease_ttl=app.config.get("SCHEDULER_LEASE_TTL", 30),
+        )
+        emission_ledger.configure(url=app.config["REDIS_URL"])
+        chain_follower.configure(
+            capacity=app.config.get("NETWORK_STATS_CAPACITY", 10080)
+        )
+        setup_schedule(app.config)
+        scheduler.start()
+
+        from backend.blueprints.market.stream import start_streams
+
+        start_streams(app.config)
+
+        warm_up.start(
+            app,
+            connections=app.config.get("WARMUP_CONNECTIONS", 4),
+            routes=app.config.get("WARMUP_ROUTES", ROUTES),
+        )
+
+        if app.config.get("PROFILING_ENABLED", False):
+            loop_monitor.start(
+                interval=app.config.get("PROFILING_LAG_INTERVAL", 0.5),
+                threshold=app.config.get("PROFILING_LAG_THRESHOLD", 0.1),
+            )
+
+    @app.after_serving
+    async def _stop_scheduler() -> None:
+        await warm_up.stop()
+        await loop_monitor.stop()
+        await scheduler.stop()
+        await response_cache.close()
+        await daemon_transport.close()
+        await emission_ledger.close()
+
+        from backend.blueprints.market.stream import stop_streams
+
+        await stop_streams()
 
     return app
@@ -0,0 +1,116 @@
+from typing import Any
+
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+from quart import Quart, Response, g, request
+
+ACCESS_LOGGER: str = "backend.access"
+
+access_logger = logging.getLogger(ACCESS_LOGGER)
+
+_listener: QueueListener | None = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats access records, whose fields travel in ``record.access``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(
+            getattr(record, "access", {"message": record.getMessage()})
+        )
+
+
+def _rotating(filename: str, formatter: logging.Formatter) -> logging.Handler:
+    handler = TimedRotatingFileHandler(
+        filename, when="midnight", interval=1, backupCount=7, encoding="utf-8"
+    )
+    handler.setFormatter(formatter)
+    return handler
+
+
+def setup_logging() -> None:
+    """
+    Sends every record through an in-memory queue to a listener thread that
+    owns the log files, so writes and midnight rollovers never block the event
+    loop. Access records go to ``logs/access.log``, everything else to
+    ``logs/app.log``.
+    """
+
+    global _listener
+
+    if _listener is not None:
+        return
+
+    app_handler = _rotating(
+        "logs/app.log",
+        logging.Formatter(
+            "[%(asctime)s] %(levelname)s | %(module)s >>> %(message)s",
+            datefmt="%B %d, %Y %H:%M:%S %Z",
+        ),
+    )
+    app_handler.addFilter(lambda record: record.name != ACCESS_LOGGER)
+
+    access_handler = _rotating("logs/access.log", JSONFormatter())
+    access_handler.addFilter(lambda record: record.name == ACCESS_LOGGER)
+
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(records))
+
+    _listener = QueueListener(records, app_handler, access_handler)
+    _listener.start()
+
+    # Drain whatever is still queued when the process exits.
+    atexit.register(_listener.stop)
+
+
+def _sample_rate(app: Quart, route: str) -> float:
+    rates: dict[str, float] = app.config.get("ACCESS_LOG_SAMPLE_RATES", {})
+    default: float = app.config.get("ACCESS_LOG_SAMPLE_RATE", 1.0)
+    return rates.get(route, default)
+
+
+def register_access_log(app: Quart) -> None:
+    @app.before_request
+    async def _start_timer() -> None:
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    async def _log_access(response: Response) -> Response:
+        route = request.url_rule.rule if request.url_rule else request.path
+        rate = _sample_rate(app, route)
+
+        # Server errors are always logged; everything else is sampled.
+        if response.status_code < 500 and random.random() >= rate:
+            return response
+
+        started: float | None = getattr(g, "request_started", None)
+        fields: dict[str, Any] = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "method": request.method,
+            "route": route,
+            "path": request.path,
+            "query": request.query_string.decode(errors="replace"),
+            "status": response.status_code,
+            "latency_ms": (
+                round((time.perf_counter() - started) * 1000, 3)
+                if started is not None
+                else None
+            ),
+            "bytes": response.content_length,
+            "ip": request.headers.get("CF-Connecting-IP") or request.access_route[0],
+            "user_agent": request.headers.get("User-Agent"),
+            "sample_rate": rate if response.status_code < 500 else 1.0,
+        }
+
+        access_logger.info("access", extra={"access": fields})
+        return response
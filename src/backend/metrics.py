@@ -0,0 +1,15 @@
+from typing import Any
+
+from collections.abc import Callable
+
+Collector = Callable[[], dict[str, Any]]
+
+_collectors: dict[str, Collector] = {}
+
+
+def register(name: str, collector: Collector) -> None:
+    _collectors[name] = collector
+
+
+def collect() -> dict[str, Any]:
+    return {name: collector() for name, collector in _collectors.items()}
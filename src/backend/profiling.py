@@ -0,0 +1,311 @@
+from typing import Any
+
+import sys
+import time
+import asyncio
+import logging
+import threading
+import tracemalloc
+from types import FrameType
+from collections import Counter, deque
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+# Allocations made by the profiler itself, or by the import machinery, are
+# noise in every report.
+_IGNORED: list[tracemalloc.Filter] = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+GROUPINGS: tuple[str, ...] = ("lineno", "filename", "traceback")
+
+
+class ProfilingError(Exception):
+    pass
+
+
+def _percentile(values: list[float], q: float) -> float:
+    # Nearest rank on an already sorted list.
+    return values[min(len(values) - 1, max(0, round(q * (len(values) - 1))))]
+
+
+class AllocationTracer:
+    """
+    Traces allocations with ``tracemalloc`` between ``start`` and ``stop``,
+    reporting what has been allocated, and not yet freed, since a baseline
+    snapshot.
+
+    Tracing slows every allocation down and taking a snapshot pauses the
+    worker, so it is meant to run for minutes, not to be left on.
+    """
+
+    def __init__(self) -> None:
+        self._baseline: tracemalloc.Snapshot | None = None
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def start(self, *, frames: int) -> None:
+        if tracemalloc.is_tracing():
+            raise ProfilingError("Allocation tracing is already running")
+
+        tracemalloc.start(frames)
+        self._baseline = self._snapshot()
+
+    def stop(self) -> None:
+        if not tracemalloc.is_tracing():
+            raise ProfilingError("Allocation tracing is not running")
+
+        tracemalloc.stop()
+        self._baseline = None
+
+    def diff(self, *, group_by: str, limit: int, rebase: bool) -> str:
+        """
+        The ``limit`` allocation sites that grew the most since the baseline,
+        as text. With ``rebase``, the snapshot taken becomes the new baseline.
+        """
+
+        if self._baseline is None or not tracemalloc.is_tracing():
+            raise ProfilingError("Allocation tracing is not running")
+
+        snapshot = self._snapshot()
+        differences = snapshot.compare_to(self._baseline, group_by)
+        current, peak = tracemalloc.get_traced_memory()
+
+        lines = [
+            f"# Allocations since baseline, by {group_by}",
+            f"# Traced memory: {current} bytes (peak {peak} bytes)",
+            "",
+        ]
+
+        for difference in differences[:limit]:
+            if group_by != "traceback":
+                lines.append(str(difference))
+                continue
+
+            # Tracebacks are kept oldest frame first, but the allocation site,
+            # the most recent one, is what identifies them.
+            _, sizes = str(difference).split(": ", 1)
+            lines.append(f"{difference.traceback[-1]}: {sizes}")
+            lines.extend(difference.traceback.format(most_recent_first=True))
+            lines.append("")
+
+        if rebase:
+            self._baseline = snapshot
+
+        return "\n".join(lines) + "\n"
+
+    def stats(self) -> dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "traced_bytes": current,
+            "peak_bytes": peak,
+        }
+
+
+def _collapse(frame: FrameType | None) -> str:
+    # One stack as "module:function" names, outermost first.
+    names: list[str] = []
+
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """
+    A sampling CPU profiler for the event loop: a thread reads the loop
+    thread's stack every ``interval`` seconds and counts how often each
+    stack is seen.
+
+    Profiles are returned in the collapsed stack format ("frame;frame count"
+    per line) that flamegraph.pl and speedscope read. Time the loop spends
+    idle shows up as stacks ending in the selector.
+    """
+
+    def __init__(self) -> None:
+        self.running: bool = False
+        self.profiles: int = 0
+
+    async def profile(self, *, seconds: float, interval: float) -> str:
+        if self.running:
+            raise ProfilingError("A CPU profile is already being captured")
+
+        self.running = True
+
+        try:
+            counts = await asyncio.to_thread(
+                self._sample, threading.get_ident(), seconds, interval
+            )
+
+        finally:
+            self.running = False
+
+        self.profiles += 1
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+    @staticmethod
+    def _sample(thread_id: int, seconds: float, interval: float) -> Counter[str]:
+        counts: Counter[str] = Counter()
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                counts[_collapse(frame)] += 1
+
+            # Sleeping releases the GIL, so the loop runs between samples.
+            time.sleep(interval)
+
+        return counts
+
+    def stats(self) -> dict[str, Any]:
+        return {"running": self.running, "profiles": self.profiles}
+
+
+class _SlowCallbacks(logging.Handler):
+    # Collects the warnings asyncio's debug mode logs for slow callbacks.
+
+    def __init__(self) -> None:
+        super().__init__(logging.WARNING)
+        self.lines: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if isinstance(record.msg, str) and record.msg.startswith("Executing"):
+            stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+            self.lines.append(f"{stamp} {record.getMessage()}")
+
+
+class LoopMonitor:
+    """
+    Measures event loop lag: how much later than scheduled a sleep of
+    ``interval`` seconds wakes up, which is how long other callbacks held the
+    loop. Lags of ``threshold`` seconds or more are logged as stalls.
+
+    ``capture`` additionally turns on asyncio's debug mode for a while, which
+    names every callback that ran for longer than a threshold.
+    """
+
+    def __init__(self, capacity: int = 7200) -> None:
+        self.interval: float = 0.5
+        self.threshold: float = 0.1
+        self.stalls: int = 0
+        self.capturing: bool = False
+
+        # (loop time, lag) of the most recent samples.
+        self._samples: deque[tuple[float, float]] = deque(maxlen=capacity)
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self, *, interval: float, threshold: float) -> None:
+        self.interval = interval
+        self.threshold = threshold
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+
+            now = loop.time()
+            lag = max(0.0, now - expected)
+            self._samples.append((now, lag))
+
+            if lag >= self.threshold:
+                self.stalls += 1
+                logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms")
+
+    def _summary(self, since: float = 0.0) -> dict[str, Any]:
+        lags = sorted(lag for at, lag in self._samples if at >= since)
+        if not lags:
+            return {"samples": 0}
+
+        return {
+            "samples": len(lags),
+            "mean_ms": round(sum(lags) / len(lags) * 1000, 3),
+            "p50_ms": round(_percentile(lags, 0.5) * 1000, 3),
+            "p99_ms": round(_percentile(lags, 0.99) * 1000, 3),
+            "max_ms": round(lags[-1] * 1000, 3),
+        }
+
+    async def capture(self, *, seconds: float, threshold: float) -> str:
+        if self.capturing:
+            raise ProfilingError("Slow callbacks are already being captured")
+
+        loop = asyncio.get_running_loop()
+        handler = _SlowCallbacks()
+        asyncio_logger = logging.getLogger("asyncio")
+        debug, duration = loop.get_debug(), loop.slow_callback_duration
+
+        self.capturing = True
+        started = loop.time()
+        asyncio_logger.addHandler(handler)
+        loop.set_debug(True)
+        loop.slow_callback_duration = threshold
+
+        try:
+            await asyncio.sleep(seconds)
+
+        finally:
+            loop.set_debug(debug)
+            loop.slow_callback_duration = duration
+            asyncio_logger.removeHandler(handler)
+            self.capturing = False
+
+        summary = self._summary(since=started)
+        lines = [
+            f"# Event loop over {seconds:g} s",
+            "# Lag: "
+            + (
+                ", ".join(f"{key} {value}" for key, value in summary.items())
+                if self._task is not None
+                else "not monitored"
+            ),
+            f"# Callbacks that ran for {threshold * 1000:g} ms or more: "
+            f"{len(handler.lines)}",
+            "",
+            *handler.lines,
+        ]
+
+        return "\n".join(lines) + "\n"
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "stalls": self.stalls,
+            "lag": self._summary(),
+        }
+
+
+allocation_tracer: AllocationTracer = AllocationTracer()
+stack_sampler: StackSampler = StackSampler()
+loop_monitor: LoopMonitor = LoopMonitor()
+
+metrics.register(
+    "profiling",
+    lambda: {
+        "allocations": allocation_tracer.stats(),
+        "cpu": stack_sampler.stats(),
+        "event_loop": loop_monitor.stats(),
+    },
+)
@@ -0,0 +1,417 @@
+from typing import Any, TypeVar
+
+import math
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from collections.abc import Callable, Awaitable
+
+from quart import Quart, Response, g, request, current_app
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from quart_rate_limiter import RateLimit, RateLimiter, RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+QUART_RATE_LIMITER_COST_ATTRIBUTE = "_nerva_rate_limiter_cost"
+
+Cost = int | Callable[[], Awaitable[int]]
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Per limit: the limit, seconds until its quota is fully restored, and seconds
+# until it could admit the request (0 when it did).
+Quota = list[tuple[RateLimit, float, float]]
+
+# GCRA over every limit of a request at once, charging ``cost`` emission
+# intervals instead of one. Nothing is written unless all limits admit the
+# request. Returns the admitted flag followed by, per limit, the seconds until
+# its quota is fully restored and (when rejected) until it can admit the cost.
+_TAKE = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local tats = {}
+local result = {1}
+
+for i, key in ipairs(KEYS) do
+    local inverse = tonumber(ARGV[1 + i * 2])
+    local period = tonumber(ARGV[2 + i * 2])
+    local tat = math.max(tonumber(redis.call("GET", key) or now), now)
+    local new_tat = tat + cost * inverse
+    local allow_at = new_tat - period
+
+    if allow_at > now then
+        result[1] = 0
+        result[#result + 1] = tostring(tat - now)
+        result[#result + 1] = tostring(allow_at - now)
+    else
+        tats[i] = new_tat
+        result[#result + 1] = tostring(new_tat - now)
+        result[#result + 1] = "0"
+    end
+end
+
+if result[1] == 1 then
+    for i, key in ipairs(KEYS) do
+        redis.call("SET", key, tostring(tats[i]), "PX", math.ceil((tats[i] - now) * 1000))
+    end
+end
+
+return result
+"""
+
+# Leases blocks of tokens for a worker to spend locally. Per key it first
+# refunds the unspent tokens of the worker's previous lease, then grants up to
+# ``want`` tokens, but only if every key can grant at least ``need``. Returns
+# the admitted flag followed by, per key, the grant, the tokens still left in
+# Redis and the seconds until ``need`` tokens would be available.
+_LEASE = """
+local now = tonumber(ARGV[1])
+local tats = {}
+local inverses = {}
+local result = {1}
+
+for i, key in ipairs(KEYS) do
+    local base = 1 + (i - 1) * 5
+    local inverse = tonumber(ARGV[base + 1])
+    local period = tonumber(ARGV[base + 2])
+    local refund = tonumber(ARGV[base + 3])
+    local need = tonumber(ARGV[base + 4])
+    local want = tonumber(ARGV[base + 5])
+
+    local stored = tonumber(redis.call("GET", key) or now)
+    local tat = math.max(stored - refund * inverse, now)
+    local available = math.max(math.floor((period - (tat - now)) / inverse + 1e-9), 0)
+    local grant = math.min(want, available)
+
+    if grant < need then
+        result[1] = 0
+    end
+
+    tats[i] = tat
+    inverses[i] = inverse
+    result[#result + 1] = grant
+    result[#result + 1] = available - grant
+    result[#result + 1] = tostring(math.max(tat + need * inverse - period - now, 0))
+end
+
+for i, key in ipairs(KEYS) do
+    local tat = tats[i]
+
+    if result[1] == 1 then
+        tat = tat + result[2 + (i - 1) * 3] * inverses[i]
+    else
+        result[3 + (i - 1) * 3] = result[3 + (i - 1) * 3] + result[2 + (i - 1) * 3]
+        result[2 + (i - 1) * 3] = 0
+    end
+
+    if tat > now then
+        redis.call("SET", key, tostring(tat), "PX", math.ceil((tat - now) * 1000))
+    else
+        redis.call("DEL", key)
+    end
+end
+
+return result
+"""
+
+
+def rate_cost(cost: Cost) -> Callable[[F], F]:
+    """
+    Charges a route ``cost`` requests' worth of quota. ``cost`` may be a
+    coroutine function, evaluated per request, for routes whose work depends
+    on their arguments. Must be the decorator directly under the route.
+    """
+
+    def decorator(func: F) -> F:
+        setattr(func, QUART_RATE_LIMITER_COST_ATTRIBUTE, cost)
+        return func
+
+    return decorator
+
+
+class CostRateLimiter(RateLimiter):
+    """
+    A ``RateLimiter`` that charges each request a per-route cost against its
+    limits, checked and updated in one atomic Redis script.
+
+    Costs come from ``RATE_LIMIT_COSTS`` (keyed by route rule), then the
+    route's ``rate_cost``, then default to 1, and are capped at each limit's
+    count so that no request is impossible to admit. Quota headers are built
+    from the script's reply, so responses need no second Redis round trip.
+    """
+
+    def __init__(self, app: Quart, redis_url: str, **kwargs: Any) -> None:
+        self.redis_url = redis_url
+        self._redis: Redis | None = None
+        self._take: Any = None
+
+        super().__init__(app, **kwargs)
+
+    async def _before_serving(self) -> None:
+        self._redis = Redis.from_url(self.redis_url)
+        self._take = self._redis.register_script(_TAKE)
+
+    async def _after_serving(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def _cost(self, view_func: Callable[..., Any]) -> int:
+        overrides: dict[str, int] = current_app.config.get("RATE_LIMIT_COSTS", {})
+        rule = request.url_rule.rule if request.url_rule else None
+
+        if rule in overrides:
+            return overrides[rule]
+
+        cost: Cost = getattr(view_func, QUART_RATE_LIMITER_COST_ATTRIBUTE, 1)
+        return cost if isinstance(cost, int) else await cost()
+
+    async def _before_request(self) -> None:
+        if not current_app.config["QUART_RATE_LIMITER_ENABLED"]:
+            return
+
+        endpoint = request.endpoint
+        if endpoint is None or endpoint not in current_app.view_functions:
+            return
+
+        view_func = current_app.view_functions[endpoint]
+        blueprint = current_app.blueprints.get(request.blueprint or "")
+
+        rate_limits: list[RateLimit] = [
+            limit
+            for limit in self._get_limits_for_view_function(view_func, blueprint)
+            if not await self._should_skip(limit)
+        ]
+        if not rate_limits:
+            return
+
+        cost = max(
+            1, min([await self._cost(view_func)] + [r.count for r in rate_limits])
+        )
+        admitted, quota = await self._consume(endpoint, rate_limits, cost)
+
+        g.rate_limit = (cost, admitted, quota)
+
+        if not admitted:
+            retry_after = max(wait for _, _, wait in quota)
+            raise RateLimitExceeded(math.ceil(retry_after))
+
+    async def _consume(
+        self, endpoint: str, rate_limits: list[RateLimit], cost: int
+    ) -> tuple[bool, Quota]:
+        keys = [await self._create_key(endpoint, limit) for limit in rate_limits]
+        args: list[float] = [time.time(), cost]
+
+        for limit in rate_limits:
+            args += [limit.inverse, limit.period.total_seconds()]
+
+        reply: list[Any] = await self._take(keys=keys, args=args)
+
+        return bool(reply[0]), [
+            (limit, float(reply[1 + i * 2]), float(reply[2 + i * 2]))
+            for i, limit in enumerate(rate_limits)
+        ]
+
+    async def _after_request(self, response: Response) -> Response:
+        state: tuple[int, bool, Quota] | None = g.get("rate_limit")
+        if state is None:
+            return response
+
+        cost, admitted, quota = state
+
+        # Report the tightest limit, as the base limiter does.
+        limit, separation, _ = min(
+            quota, key=lambda entry: entry[0].period.total_seconds()
+        )
+        remaining = int((limit.period.total_seconds() - separation) / limit.inverse)
+
+        response.headers["RateLimit-Limit"] = str(limit.count)
+        response.headers["RateLimit-Remaining"] = str(max(remaining, 0))
+        response.headers["RateLimit-Reset"] = str(int(separation))
+        response.headers["RateLimit-Cost"] = str(cost)
+
+        if not admitted:
+            retry_after = max(wait for _, _, wait in quota)
+            response.headers["Retry-After"] = str(math.ceil(retry_after))
+
+        return response
+
+
+@dataclass(slots=True)
+class _Lease:
+    limit: RateLimit
+    tokens: int
+    remaining: int
+    expires: float
+
+
+class HybridRateLimiter(CostRateLimiter):
+    """
+    A ``CostRateLimiter`` that leases blocks of ``lease_size`` tokens per
+    client key from Redis and spends them in-process, so most requests make no
+    Redis round trip at all.
+
+    Leased tokens are debited from Redis up front, so the limiter never admits
+    more than a limit allows. The trade-off is that tokens sitting in one
+    worker's lease cannot be spent through another: a client spread across N
+    workers may be refused up to (N - 1) x ``lease_size`` tokens early, for at
+    most ``lease_ttl`` seconds, after which unspent tokens are refunded. Tokens
+    are also spent up to ``lease_ttl`` after they were leased, so over any
+    window a client is held to its limit over that window plus ``lease_ttl``.
+    ``RateLimit-Remaining`` is as of the last lease, not the current request.
+    """
+
+    def __init__(
+        self,
+        app: Quart,
+        redis_url: str,
+        *,
+        lease_size: int = 10,
+        lease_ttl: float = 5.0,
+        **kwargs: Any,
+    ) -> None:
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl
+        self.local_hits: int = 0
+        self.leases: int = 0
+
+        self._lease: Any = None
+        self._leases: dict[str, _Lease] = {}
+        self._sweeper: asyncio.Task[None] | None = None
+
+        super().__init__(app, redis_url, **kwargs)
+
+    async def _before_serving(self) -> None:
+        await super()._before_serving()
+        assert self._redis is not None
+
+        self._lease = self._redis.register_script(_LEASE)
+        self._sweeper = asyncio.create_task(self._sweep())
+
+    async def _after_serving(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+        await self._refund(list(self._leases))
+        await super()._after_serving()
+
+    async def _call(
+        self,
+        keys: list[str],
+        leases: list[_Lease | None],
+        limits: list[RateLimit],
+        need: int,
+        want: int,
+    ) -> list[Any]:
+        args: list[float] = [time.time()]
+
+        for lease, limit in zip(leases, limits):
+            args += [
+                limit.inverse,
+                limit.period.total_seconds(),
+                lease.tokens if lease is not None else 0,
+                need,
+                want,
+            ]
+
+        reply: list[Any] = await self._lease(keys=keys, args=args)
+        return reply
+
+    async def _refund(self, keys: list[str]) -> None:
+        leases = {key: self._leases.pop(key) for key in keys if key in self._leases}
+        if not leases:
+            return
+
+        try:
+            await self._call(
+                list(leases),
+                list(leases.values()),
+                [lease.limit for lease in leases.values()],
+                0,
+                0,
+            )
+
+        except RedisError as e:
+            logger.error(f"Failed to refund {len(leases)} rate limit leases: {e}")
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_ttl / 2)
+
+            now = time.monotonic()
+            await self._refund(
+                [key for key, lease in self._leases.items() if lease.expires <= now]
+            )
+
+    def _quota(self, lease: _Lease, wait: float) -> tuple[RateLimit, float, float]:
+        remaining = lease.remaining + lease.tokens
+        period = lease.limit.period.total_seconds()
+        return lease.limit, period - remaining * lease.limit.inverse, wait
+
+    async def _consume(
+        self, endpoint: str, rate_limits: list[RateLimit], cost: int
+    ) -> tuple[bool, Quota]:
+        keys = [await self._create_key(endpoint, limit) for limit in rate_limits]
+        now = time.monotonic()
+
+        # Expired leases are refunded with the next lease rather than spent, so
+        # tokens are never used more than lease_ttl after they were debited.
+        leased = all(
+            key in self._leases
+            and self._leases[key].expires > now
+            and self._leases[key].tokens >= cost
+            for key in keys
+        )
+
+        if leased:
+            self.local_hits += 1
+
+            for key in keys:
+                self._leases[key].tokens -= cost
+
+            return True, [self._quota(self._leases[key], 0.0) for key in keys]
+
+        # Lease afresh for every key, not only the short ones: the others'
+        # leftovers are refunded in the same call, and nothing read before the
+        # await is relied on after it, when the sweeper or a concurrent request
+        # may have taken those leases. They are taken out before awaiting, so
+        # the same leftover is never refunded twice.
+        leftovers = [self._leases.pop(key, None) for key in keys]
+        reply = await self._call(
+            keys, leftovers, rate_limits, cost, max(self.lease_size, cost)
+        )
+        self.leases += 1
+
+        admitted = bool(reply[0])
+        expires = time.monotonic() + self.lease_ttl
+        quota: Quota = []
+
+        for n, key in enumerate(keys):
+            grant, remaining = int(reply[1 + n * 3]), int(reply[2 + n * 3])
+            wait = float(reply[3 + n * 3])
+            lease = _Lease(rate_limits[n], grant, remaining, expires)
+
+            current = self._leases.get(key)
+            if current is not None:
+                # Another request leased for this key while we waited.
+                lease.tokens += current.tokens
+
+            self._leases[key] = lease
+
+            if admitted:
+                lease.tokens = max(lease.tokens - cost, 0)
+
+            quota.append(self._quota(lease, 0.0 if admitted else wait))
+
+        return admitted, quota
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "leases": self.leases,
+            "local_hits": self.local_hits,
+            "active_leases": len(self._leases),
+        }
@@ -0,0 +1,310 @@
+from typing import Any
+
+import time
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from collections.abc import Callable, Awaitable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+JobFunction = Callable[[], Awaitable[None]]
+
+# Only extend or release the lease if it still carries our token, so a worker
+# that stalled past its TTL cannot clobber the lease of its successor.
+_RENEW = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLease:
+    """
+    A Redis lease that elects one worker, across processes and hosts, to run
+    leader-only jobs.
+
+    The lease is a key holding a random token, set with ``NX`` and a TTL and
+    renewed well before it lapses. If the leader dies, the key expires and the
+    next worker to try takes over within ``ttl`` seconds.
+    """
+
+    def __init__(
+        self, key: str = "nerva-api:scheduler:leader", ttl: int = 30
+    ) -> None:
+        self.key = key
+        self.ttl = ttl
+        self.token: str = uuid.uuid4().hex
+        self.held: bool = False
+
+        self._redis: Redis | None = None
+        self._renew: Any = None
+        self._release: Any = None
+
+    def configure(self, *, url: str, ttl: int) -> None:
+        self.ttl = ttl
+        self._redis = Redis.from_url(url)
+        self._renew = self._redis.register_script(_RENEW)
+        self._release = self._redis.register_script(_RELEASE)
+
+    @property
+    def redis(self) -> Redis:
+        if self._redis is None:
+            raise RuntimeError("The leader lease has not been configured")
+
+        return self._redis
+
+    async def refresh(self) -> bool:
+        try:
+            if self.held:
+                self.held = bool(
+                    await self._renew(
+                        keys=[self.key], args=[self.token, self.ttl * 1000]
+                    )
+                )
+
+            if not self.held:
+                self.held = bool(
+                    await self.redis.set(
+                        self.key, self.token, nx=True, px=self.ttl * 1000
+                    )
+                )
+
+        except RedisError as e:
+            logger.error(f"Failed to refresh the scheduler lease: {e}")
+            self.held = False
+
+        return self.held
+
+    async def release(self) -> None:
+        if self.held:
+            try:
+                await self._release(keys=[self.key], args=[self.token])
+
+            except RedisError as e:
+                logger.error(f"Failed to release the scheduler lease: {e}")
+
+            self.held = False
+
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+class Job:
+    """
+    A periodic coroutine, run either every ``interval`` or daily at a local
+    ``HH:MM``. Interval jobs are aligned to the epoch, so every worker agrees
+    on when each run is due.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        function: JobFunction,
+        *,
+        interval: timedelta | None = None,
+        at: str | None = None,
+        leader: bool = False,
+    ) -> None:
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.at = at
+        self.leader = leader
+        self.next_run: float = self.following(time.time())
+        self.task: asyncio.Task[None] | None = None
+
+    def previous(self, now: float) -> float:
+        if self.interval is not None:
+            step = self.interval.total_seconds()
+            return now - now % step
+
+        assert self.at is not None
+        hour, minute = map(int, self.at.split(":"))
+        today = datetime.fromtimestamp(now).replace(
+            hour=hour, minute=minute, second=0, microsecond=0
+        )
+
+        if today.timestamp() > now:
+            today -= timedelta(days=1)
+
+        return today.timestamp()
+
+    def following(self, now: float) -> float:
+        if self.interval is not None:
+            return self.previous(now) + self.interval.total_seconds()
+
+        return (
+            datetime.fromtimestamp(self.previous(now)) + timedelta(days=1)
+        ).timestamp()
+
+
+class Scheduler:
+    """
+    Runs periodic jobs on the event loop, sleeping until the next one is due.
+
+    Per-worker jobs run in every process. Leader-only jobs run only in the
+    process holding ``lease``; the slot of each completed run is recorded in
+    Redis, so a worker that takes over leadership immediately runs any job
+    whose last slot was missed while the lease changed hands. A job whose
+    previous run has not finished skips its slot rather than overlapping it.
+    """
+
+    def __init__(self) -> None:
+        self.jobs: list[Job] = []
+        self.lease: LeaderLease = LeaderLease()
+        self.runs: int = 0
+        self.failures: int = 0
+        self.skipped: int = 0
+
+        self._task: asyncio.Task[None] | None = None
+        self._running: set[asyncio.Task[None]] = set()
+
+    @property
+    def runs_key(self) -> str:
+        return f"{self.lease.key}:runs"
+
+    def configure(self, *, redis_url: str, lease_ttl: int) -> None:
+        self.lease.configure(url=redis_url, ttl=lease_ttl)
+
+    def every(
+        self,
+        name: str,
+        interval: timedelta,
+        function: JobFunction,
+        *,
+        leader: bool = False,
+    ) -> None:
+        self.jobs.append(Job(name, function, interval=interval, leader=leader))
+
+    def daily(
+        self, name: str, at: str, function: JobFunction, *, leader: bool = False
+    ) -> None:
+        self.jobs.append(Job(name, function, at=at, leader=leader))
+
+    async def _execute(self, job: Job, slot: float) -> None:
+        try:
+            await job.function()
+            self.runs += 1
+
+        except Exception as e:
+            logger.error(f"Scheduled job {job.name} failed: {e}")
+            self.failures += 1
+            return
+
+        if job.leader:
+            try:
+                await self.lease.redis.hset(  # type: ignore[misc]
+                    self.runs_key, job.name, str(slot)
+                )
+
+            except RedisError as e:
+                logger.error(f"Failed to record run of {job.name}: {e}")
+
+    def _spawn(self, job: Job, slot: float) -> None:
+        if job.task is not None and not job.task.done():
+            logger.warning(f"Skipping job {job.name}, its last run is still going")
+            self.skipped += 1
+            return
+
+        job.task = asyncio.create_task(self._execute(job, slot))
+        self._running.add(job.task)
+        job.task.add_done_callback(self._running.discard)
+
+    async def _catch_up(self, now: float) -> None:
+        jobs = [job for job in self.jobs if job.leader]
+        if not jobs:
+            return
+
+        names = [job.name for job in jobs]
+
+        try:
+            slots: list[bytes | None] = await self.lease.redis.hmget(  # type: ignore[misc]
+                self.runs_key, names
+            )
+
+        except RedisError as e:
+            logger.error(f"Failed to read scheduled job history: {e}")
+            return
+
+        for job, slot in zip(jobs, slots):
+            previous = job.previous(now)
+            if slot is None or float(slot) < previous:
+                logger.info(f"Running missed job {job.name}")
+                self._spawn(job, previous)
+
+            # The latest slot is run now or already was, even if it is also the
+            # one just falling due.
+            job.next_run = max(job.next_run, job.following(now))
+
+    async def _run(self) -> None:
+        while True:
+            leader = self.lease.held
+            if await self.lease.refresh() and not leader:
+                logger.info("Acquired the scheduler lease")
+                await self._catch_up(time.time())
+
+            now = time.time()
+
+            for job in self.jobs:
+                if job.next_run > now:
+                    continue
+
+                slot, job.next_run = job.next_run, job.following(now)
+
+                if not job.leader or self.lease.held:
+                    self._spawn(job, slot)
+
+            # Wake for whichever comes first: the next job, or renewing the lease
+            # at a third of its TTL.
+            wake = min(
+                [job.next_run for job in self.jobs] + [now + self.lease.ttl / 3]
+            )
+            await asyncio.sleep(max(wake - time.time(), 0))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        for task in self._running:
+            task.cancel()
+
+        await asyncio.gather(*self._running, return_exceptions=True)
+        await self.lease.release()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "leader": self.lease.held,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "jobs": {
+                job.name: datetime.fromtimestamp(job.next_run).isoformat()
+                for job in self.jobs
+            },
+        }
+
+
+scheduler: Scheduler = Scheduler()
+
+metrics.register("scheduler", scheduler.stats)
@@ -0,0 +1,130 @@
+from typing import Any
+
+import time
+import asyncio
+import logging
+
+from quart import Quart
+from redis.asyncio import Redis
+
+from backend import metrics
+from backend.daemon import daemon_transport
+
+logger = logging.getLogger(__name__)
+
+# The most requested routes, whose responses are cached before a worker is
+# reported ready.
+ROUTES: list[str] = [
+    "/v1/daemon/get_info",
+    "/v1/daemon/get_version",
+    "/v1/daemon/get_block_count",
+    "/v1/daemon/get_last_block_header",
+    "/v1/daemon/hard_fork_info",
+    "/v1/daemon/get_fee_estimate",
+]
+
+
+class WarmUpError(Exception):
+    pass
+
+
+class WarmUp:
+    """
+    Readies a freshly started worker before it takes traffic: checks Redis
+    and, with analytics enabled, MongoDB, opens ``connections`` keep-alive
+    connections to the daemon and fills the response cache for ``routes``.
+
+    Runs in the background once the worker is serving, retrying with backoff
+    until it succeeds; ``ready`` stays False, and the readiness probe fails,
+    until then. Slower work, such as loading the chain headers behind network
+    statistics, is left to the scheduler and does not hold readiness back.
+    """
+
+    def __init__(self) -> None:
+        self.ready: bool = False
+        self.attempts: int = 0
+        self.duration: float | None = None
+
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self, app: Quart, *, connections: int, routes: list[str]) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(app, connections, routes))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, app: Quart, connections: int, routes: list[str]) -> None:
+        started = time.perf_counter()
+        delay: float = 1.0
+
+        while True:
+            self.attempts += 1
+
+            try:
+                await self._prime(app, connections, routes)
+                break
+
+            except Exception as e:
+                logger.warning(f"Warm-up failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+        self.duration = time.perf_counter() - started
+        self.ready = True
+        logger.info(f"Worker ready after {self.duration * 1000:.0f} ms of warm-up")
+
+    async def _prime(self, app: Quart, connections: int, routes: list[str]) -> None:
+        from backend.factory import db, analytics_enabled
+
+        redis = Redis.from_url(app.config["REDIS_URL"])
+        try:
+            await redis.ping()  # type: ignore[misc]
+
+        finally:
+            await redis.aclose()
+
+        if analytics_enabled:
+            await db.command("ping")
+
+        # Concurrent calls each need a connection of their own, so the pool
+        # ends up holding this many open ones. They are posted on the pool
+        # directly, since with batching on they would share a single request.
+        payload = {"jsonrpc": "2.0", "id": 0, "method": "get_version", "params": {}}
+        replies = await asyncio.gather(
+            *(
+                daemon_transport.post("/json_rpc", payload)
+                for _ in range(connections)
+            )
+        )
+        for reply in replies:
+            if "error" in reply:
+                raise WarmUpError(f"Daemon error: {reply['error']}")
+
+        await asyncio.gather(*(self._dispatch(app, route) for route in routes))
+
+    async def _dispatch(self, app: Quart, route: str) -> None:
+        # Runs the view as a request would, so its response lands in the
+        # response cache, but skips the rate limiter and access log.
+        async with app.test_request_context(route):
+            response = await app.make_response(await app.dispatch_request())
+
+        if response.status_code != 200:
+            raise WarmUpError(f"{route} returned {response.status_code}")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "duration_ms": (
+                round(self.duration * 1000, 3) if self.duration is not None else None
+            ),
+        }
+
+
+warm_up: WarmUp = WarmUp()
+
+metrics.register("warm_up", warm_up.stats)
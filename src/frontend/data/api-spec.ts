@@ -377,6 +377,33 @@ export const API_SPEC: ApiSpec = {
             { code: 400, reason: "A height is not a valid integer." },
           ],
         },
+        {
+          id: "daemon-get_blocks_range",
+          method: "GET",
+          path: "/daemon/get_blocks_range",
+          summary: "Raw blocks for a range of heights.",
+          description: "Returns the serialized block and transaction blobs, hex-encoded, for every block from <code>start_height</code> to <code>end_height</code>, inclusive. At most 100 blocks are returned per request; when the range is wider, <code>next_height</code> is the <code>start_height</code> of the next page.",
+          params: [
+            { name: "start_height", in: "query", type: "integer", required: true, desc: "First block height in the range." },
+            { name: "end_height", in: "query", type: "integer", required: true, desc: "Last block height in the range." },
+          ],
+          sample: { start_height: 3200000, end_height: 3200001 },
+          response: {
+            status: "success",
+            result: {
+              blocks: [
+                { height: 3200000, blob: "0c0cd3eb…", txs: [] },
+                { height: 3200001, blob: "0c0c8fec…", txs: ["02000102…"] },
+              ],
+              next_height: null,
+            },
+          },
+          errors: [
+            { code: 400, reason: "<code>start_height</code> or <code>end_height</code> missing." },
+            { code: 400, reason: "A height is not a valid integer." },
+            { code: 400, reason: "The range is descending or beyond the chain tip." },
+          ],
+        },
         {
           id: "daemon-get_block_template",
           method: "GET",
@@ -470,11 +497,40 @@ export const API_SPEC: ApiSpec = {
           path: "/daemon/get_generated_coins",
           summary: "Total XNV in circulation.",
           description:
-            "Returns the total number of coins generated so far, computed from a known checkpoint plus the per-block reward. <strong>Note:</strong> the result contains only a <code>coins</code> field — there is no <code>status</code> key.",
+            "Returns the total number of coins generated so far: the sum of the reward of every block, transaction fees included, updated as new blocks arrive. Shortly after a fresh deployment, while that sum is first being computed, an estimate from a known checkpoint is returned instead. <strong>Note:</strong> the result contains only a <code>coins</code> field — there is no <code>status</code> key.",
           params: [],
           sample: {},
           response: { status: "success", result: { coins: 18904459.7794 } },
         },
+        {
+          id: "daemon-get_network_stats",
+          method: "GET",
+          path: "/daemon/get_network_stats",
+          summary: "Hashrate, difficulty and block time statistics.",
+          description:
+            "Summarizes the most recent <code>window</code> blocks: estimated network hashrate (H/s), block interval mean and percentiles (seconds), difficulty, reward (atomic units) and block size (bytes). Up to a week of blocks can be covered. Returns 503 for a short while after the server starts, until the recent headers have been loaded.",
+          params: [
+            { name: "window", in: "query", type: "integer", required: false, desc: "Number of recent blocks to cover (default 720, at most 10080)." },
+          ],
+          sample: { window: 720 },
+          response: {
+            status: "success",
+            result: {
+              window: 720,
+              start_height: 3251524,
+              end_height: 3252243,
+              hashrate: 3049156,
+              block_time: { mean: 59.986, median: 42, p90: 137, p99: 271 },
+              difficulty: { mean: 182947382, latest: 180412296 },
+              reward: { mean: 300000000000, total: 216000000000000 },
+              block_size: { mean: 1874, median: 142, p90: 4318, max: 29544 },
+            },
+          },
+          errors: [
+            { code: 400, reason: "<code>window</code> is not an integer or is out of range." },
+            { code: 503, reason: "The recent headers have not been loaded yet." },
+          ],
+        },
         {
           id: "daemon-get_bans",
           method: "GET",
@@ -505,9 +561,16 @@ export const API_SPEC: ApiSpec = {
           method: "GET",
           path: "/daemon/get_transaction_pool",
           summary: "Full mempool contents.",
-          description: "Returns the transactions currently in the daemon's memory pool, along with spent key images.",
-          params: [],
-          sample: {},
+          description:
+            "Returns the transactions currently in the daemon's memory pool, along with spent key images. Use <code>fields</code> to return only the transaction fields you need, and <code>limit</code> to page through the pool: pass <code>next_cursor</code> from one page as <code>cursor</code> for the next, with the same <code>sort</code> and <code>order</code>.",
+          params: [
+            { name: "fields", in: "query", type: "string", required: false, desc: 'Comma-separated transaction fields to return, e.g. <code>id_hash,fee</code>. Spent key images are only included if <code>spent_key_images</code> is listed.' },
+            { name: "sort", in: "query", type: "string", required: false, desc: "<code>fee_per_byte</code> or <code>receive_time</code> (the default when paginating)." },
+            { name: "order", in: "query", type: "string", required: false, desc: "<code>desc</code> (default) or <code>asc</code>." },
+            { name: "limit", in: "query", type: "integer", required: false, desc: "Transactions per page, at most 1000." },
+            { name: "cursor", in: "query", type: "string", required: false, desc: "<code>next_cursor</code> of the previous page, an opaque string only valid with the same <code>sort</code> and <code>order</code>." },
+          ],
+          sample: { fields: "id_hash,fee,blob_size,receive_time", sort: "fee_per_byte", limit: 50 },
           response: {
             status: "success",
             result: {
@@ -526,8 +589,12 @@ export const API_SPEC: ApiSpec = {
                   receive_time: 1748684790,
                 },
               ],
+              next_cursor: null,
             },
           },
+          errors: [
+            { code: 400, reason: "<code>sort</code>, <code>order</code>, <code>limit</code> or <code>cursor</code> is invalid." },
+          ],
         },
         {
           id: "daemon-get_transaction_pool_stats",
@@ -569,6 +636,7 @@ export const API_SPEC: ApiSpec = {
             { name: "decode_as_json", in: "query", type: "boolean", required: false, desc: 'Set to <code>true</code> to include a decoded JSON form of each transaction.' },
             { name: "prune", in: "query", type: "boolean", required: false, desc: "Set to <code>true</code> to return the pruned representation." },
             { name: "split", in: "query", type: "boolean", required: false, desc: "Set to <code>true</code> to return pruned and prunable parts separately." },
+            { name: "fields", in: "query", type: "string", required: false, desc: 'Comma-separated fields to return for each transaction, e.g. <code>tx_hash,block_height</code>.' },
           ],
           sample: {
             hashes: [
@@ -676,7 +744,9 @@ export const API_SPEC: ApiSpec = {
           summary: "Ticker data from NonKYC.",
           description:
             "Returns last price, bid/ask, 24h high/low, volume and last-trade time for each configured pair on <a href=\"https://nonkyc.io\" target=\"_blank\" rel=\"noopener\">NonKYC</a>. Prices are formatted by quote currency — <code>sat</code> for BTC pairs, <code>$</code> for USDT/USDC pairs, native units otherwise.",
-          params: [],
+          params: [
+            { name: "format", in: "query", type: "string", required: false, desc: "Set to <code>raw</code> to get plain numbers plus the pair's <code>quote</code> currency instead of formatted strings." },
+          ],
           sample: {},
           response: {
             status: "success",
@@ -713,7 +783,9 @@ export const API_SPEC: ApiSpec = {
           summary: "Ticker data from CexSwap.",
           description:
             "Returns last price, 24h high/low, volume and 24h change for each configured pair on <a href=\"https://cexswap.cc\" target=\"_blank\" rel=\"noopener\">CexSwap</a>.",
-          params: [],
+          params: [
+            { name: "format", in: "query", type: "string", required: false, desc: "Set to <code>raw</code> to get plain numbers plus the pair's <code>quote</code> currency instead of formatted strings." },
+          ],
           sample: {},
           response: {
             status: "success",
@@ -744,7 +816,9 @@ export const API_SPEC: ApiSpec = {
           summary: "Ticker data from NoirTrade.",
           description:
             "Returns last price, bid/ask, 24h high/low and volume for each configured pair on <a href=\"https://noirtrade.com\" target=\"_blank\" rel=\"noopener\">NoirTrade</a>. NoirTrade pairs use an underscore separator (e.g. <code>XNV_USDT0</code>).",
-          params: [],
+          params: [
+            { name: "format", in: "query", type: "string", required: false, desc: "Set to <code>raw</code> to get plain numbers plus the pair's <code>quote</code> currency instead of formatted strings." },
+          ],
           sample: {},
           response: {
             status: "success",
@@ -778,8 +852,14 @@ export const API_SPEC: ApiSpec = {
           path: "/analytics/fetch",
           summary: "All collected node records.",
           description:
-            "Returns every stored node-telemetry record — one record per unique node, including version and approximate geolocation. IP addresses are masked in the response.",
-          params: [],
+            "Returns stored node-telemetry records — one record per unique node, including version and approximate geolocation. IP addresses are masked in the response. Without <code>limit</code> or <code>cursor</code> every record is returned; with either, records come back in pages of up to <code>limit</code>, each carrying an <code>id</code>, and <code>next_cursor</code> points at the following page (<code>null</code> on the last one). With <code>format=ndjson</code> records are streamed one JSON object per line instead.",
+          params: [
+            { name: "limit", in: "query", type: "integer", required: false, desc: "Page size, up to the server's maximum (1000 by default)." },
+            { name: "cursor", in: "query", type: "string", required: false, desc: "The <code>next_cursor</code> (or last <code>id</code>) of the previous page." },
+            { name: "cc", in: "query", type: "string", required: false, desc: "Only return nodes in this country (ISO 3166-1 alpha-2 code)." },
+            { name: "version", in: "query", type: "string", required: false, desc: "Only return nodes running this <code>nerva-cli</code> version." },
+            { name: "format", in: "query", type: "string", required: false, desc: "Set to <code>ndjson</code> to stream newline-delimited JSON records." },
+          ],
           sample: {},
           response: {
             status: "success",
@@ -795,7 +875,32 @@ export const API_SPEC: ApiSpec = {
               },
             ],
           },
-          errors: [{ code: 400, reason: "Analytics is disabled (<code>{ \"status\": \"error\", \"message\": \"Analytics is disabled\" }</code>)." }],
+          errors: [
+            { code: 400, reason: "Analytics is disabled (<code>{ \"status\": \"error\", \"message\": \"Analytics is disabled\" }</code>)." },
+            { code: 400, reason: "<code>limit</code> is out of range or <code>cursor</code> is malformed." },
+          ],
+        },
+        {
+          id: "analytics-aggregate",
+          method: "GET",
+          path: "/analytics/aggregate",
+          summary: "Node counts by country, continent and version.",
+          description:
+            "Returns how many known nodes fall under each country code, continent code and <code>nerva-cli</code> version, plus the total. Counts are maintained as nodes check in and are pruned, and may lag by up to a minute. Nodes without a value are counted under <code>unknown</code>.",
+          params: [],
+          sample: {},
+          response: {
+            status: "success",
+            result: {
+              countries: { DE: 12, US: 9 },
+              continents: { EU: 12, NA: 9 },
+              versions: { "0.2.2.0": 21 },
+              total: 21,
+            },
+          },
+          errors: [
+            { code: 400, reason: "Analytics is disabled (<code>{ \"status\": \"error\", \"message\": \"Analytics is disabled\" }</code>)." },
+          ],
         },
         {
           id: "analytics-submit",
@@ -0,0 +1,7 @@
+import backend.factory
+
+# Blueprint modules bind these at import time, which in the app happens inside
+# create_app once they are set. Tests replace whichever they use.
+backend.factory.db = None  # type: ignore[assignment]
+backend.factory.daemon = None  # type: ignore[assignment]
+backend.factory.daemon_legacy = None  # type: ignore[assignment]
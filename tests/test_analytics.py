@@ -0,0 +1,205 @@
+from typing import Any
+
+import asyncio
+from datetime import datetime, timedelta
+from collections.abc import Callable, AsyncIterator
+
+import pytest
+from quart import Quart
+
+from backend.admission import limiters
+from backend.blueprints.analytics import geo, routes, rollups, analytics_bp
+from backend.blueprints.analytics.buffer import write_buffer
+
+MONGO = limiters["mongo"]
+
+DOCUMENTS: list[dict[str, Any]] = [
+    {"version": "0.2.0", "ip": "203.0.113.1", "cc": "US"},
+    {"version": "0.2.0", "ip": "203.0.113.2", "cc": "DE"},
+]
+
+
+class Cursor:
+    def __init__(self, documents: list[dict[str, Any]]) -> None:
+        self.documents = documents
+        # Slots held while each document was read.
+        self.active: list[int] = []
+
+    def __aiter__(self) -> "Cursor":
+        return self
+
+    async def __anext__(self) -> dict[str, Any]:
+        if not self.documents:
+            raise StopAsyncIteration
+
+        self.active.append(MONGO.active)
+        return self.documents.pop(0)
+
+
+class Collection:
+    def __init__(self, cursor: Cursor) -> None:
+        self.cursor = cursor
+
+    def find(self, *args: Any) -> Cursor:
+        return self.cursor
+
+    async def find_one(self, *args: Any) -> None:
+        return None
+
+    async def replace_one(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+
+class Database:
+    def __init__(self, cursor: Cursor) -> None:
+        self.collection = Collection(cursor)
+
+    def get_collection(self, name: str) -> Collection:
+        return self.collection
+
+
+class Backend(geo.GeoBackend):
+    cached = True
+
+    def __init__(self) -> None:
+        self.active: list[int] = []
+
+    async def is_bogon(self, ip: str) -> bool:
+        self.active.append(MONGO.active)
+        return False
+
+    async def locate(self, ip: str) -> dict[str, Any] | None:
+        self.active.append(MONGO.active)
+        return {"lat": 0.0, "long": 0.0, "cn": "Nowhere", "cc": "ZZ"}
+
+
+@pytest.fixture
+def cursor(monkeypatch: pytest.MonkeyPatch) -> Cursor:
+    cursor = Cursor(list(DOCUMENTS))
+    database = Database(cursor)
+
+    monkeypatch.setattr(routes, "db", database)
+    monkeypatch.setattr(geo, "db", database)
+    return cursor
+
+
+def _app() -> Quart:
+    app = Quart(__name__)
+    app.config["ANALYTICS_ENABLED"] = True
+    app.register_blueprint(analytics_bp, url_prefix="/v1")
+    return app
+
+
+def test_stream_holds_the_slot_until_read(cursor: Cursor) -> None:
+    async def test() -> None:
+        client = _app().test_client()
+        response = await client.get("/v1/analytics/fetch?format=ndjson")
+
+        assert response.status_code == 200
+        assert len((await response.get_data()).splitlines()) == 2
+
+    asyncio.run(test())
+
+    assert cursor.active == [1, 1]
+    assert MONGO.active == 0
+
+
+def test_stream_releases_the_slot_unread(cursor: Cursor) -> None:
+    async def test() -> None:
+        rows = routes._Rows(cursor, False, routes.AsyncExitStack())
+        await rows._slot.enter_async_context(MONGO.slot())
+
+        assert MONGO.active == 1
+        await rows.aclose()
+
+    asyncio.run(test())
+
+    assert MONGO.active == 0
+
+
+def test_submit_looks_up_outside_the_slot(
+    cursor: Cursor, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    app = _app()
+    backend = Backend()
+    monkeypatch.setattr(geo, "geo_backend", backend)
+
+    async def test() -> None:
+        response = await app.test_client().post(
+            "/v1/analytics/submit",
+            headers={
+                "CF-Connecting-IP": "198.51.100.7",
+                "User-Agent": "nerva-cli/0.2",
+            },
+        )
+
+        assert response.status_code == 200
+
+    asyncio.run(test())
+
+    assert backend.active == [0, 0]
+    assert "198.51.100.7" in write_buffer
+
+
+class Found:
+    def __init__(self, documents: list[dict[str, Any]]) -> None:
+        self.documents = documents
+
+    async def to_list(self, length: int | None) -> list[dict[str, Any]]:
+        return self.documents
+
+    async def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        for document in self.documents:
+            yield document
+
+
+class Nodes:
+    def __init__(self, documents: list[dict[str, Any]]) -> None:
+        self.documents = documents
+        self.before_delete: Callable[[], None] = lambda: None
+
+    def get_collection(self, name: str) -> "Nodes":
+        return self
+
+    @staticmethod
+    def _matches(document: dict[str, Any], query: dict[str, Any]) -> bool:
+        return ("_id" not in query or document["_id"] in query["_id"]["$in"]) and (
+            "time" not in query or document["time"] < query["time"]["$lt"]
+        )
+
+    def find(self, query: dict[str, Any], projection: Any) -> Found:
+        return Found([dict(d) for d in self.documents if self._matches(d, query)])
+
+    async def delete_many(self, query: dict[str, Any]) -> None:
+        self.before_delete()
+        self.documents = [d for d in self.documents if not self._matches(d, query)]
+
+
+def test_prune_counts_only_the_nodes_it_deletes(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    stale = datetime.now() - timedelta(days=30)
+    nodes = Nodes(
+        [
+            {"_id": 1, "time": stale, "cc": "DE", "cn": "EU", "version": "a"},
+            {"_id": 2, "time": stale, "cc": "US", "cn": "NA", "version": "a"},
+            {"_id": 3, "time": datetime.now(), "cc": "FR", "cn": "EU"},
+        ]
+    )
+    removed: list[dict[str, Any]] = []
+
+    def refresh() -> None:
+        # Node 2 checks in between the prune's select and its delete.
+        nodes.documents[1]["time"] = datetime.now()
+
+    async def record_removals(documents: Any) -> None:
+        removed.extend(documents)
+
+    nodes.before_delete = refresh
+    monkeypatch.setattr(routes, "db", nodes)
+    monkeypatch.setattr(rollups, "record_removals", record_removals)
+
+    asyncio.run(routes.prune_stale_analytics())
+
+    assert [node["_id"] for node in nodes.documents] == [2, 3]
+    assert [node["_id"] for node in removed] == [1]
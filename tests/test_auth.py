@@ -0,0 +1,30 @@
+import asyncio
+
+from quart import Quart
+
+from backend.blueprints.index import index_bp
+
+
+def _status(token: str, authorization: str | None) -> int:
+    app = Quart(__name__)
+    app.config["ADMIN_TOKEN"] = token
+    app.register_blueprint(index_bp, url_prefix="/v1")
+
+    headers = {"Authorization": authorization} if authorization else {}
+
+    async def get() -> int:
+        response = await app.test_client().get("/v1/metrics", headers=headers)
+        return response.status_code
+
+    return asyncio.run(get())
+
+
+def test_metrics_need_the_admin_token() -> None:
+    assert _status("secret", "Bearer secret") == 200
+    assert _status("secret", "Bearer wrong") == 401
+    assert _status("secret", None) == 401
+
+
+def test_metrics_hidden_without_a_token() -> None:
+    assert _status("", "Bearer ") == 404
+    assert _status("", None) == 404
@@ -0,0 +1,137 @@
+from typing import Any
+
+import asyncio
+
+import pytest
+
+from backend.blueprints.analytics import buffer
+
+
+class SlowCollection:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.written: list[Any] = []
+
+    async def bulk_write(self, requests: list[Any], ordered: bool = True) -> None:
+        await asyncio.sleep(self.delay)
+        self.written.extend(requests)
+
+
+class Database:
+    def __init__(self, collection: SlowCollection) -> None:
+        self.collection = collection
+
+    def get_collection(self, name: str) -> SlowCollection:
+        return self.collection
+
+
+@pytest.fixture
+def collection(monkeypatch: pytest.MonkeyPatch) -> SlowCollection:
+    # Every node is already stored, unless a test says otherwise.
+    async def previous_keys(batch: dict[str, Any]) -> dict[str, Any]:
+        return {ip: {} for ip in batch}
+
+    async def record_upserts(previous: Any, batch: dict[str, Any]) -> None:
+        pass
+
+    collection = SlowCollection(delay=0.2)
+    monkeypatch.setattr(buffer, "db", Database(collection))
+    monkeypatch.setattr(buffer, "previous_keys", previous_keys)
+    monkeypatch.setattr(buffer, "record_upserts", record_upserts)
+    return collection
+
+
+def test_stop_during_flush_keeps_the_batch(collection: SlowCollection) -> None:
+    async def scenario() -> buffer.WriteBuffer:
+        write_buffer = buffer.WriteBuffer(max_size=2, interval=60)
+        write_buffer.start()
+
+        write_buffer.add("1.1.1.1", {"version": "a"})
+        write_buffer.add("2.2.2.2", {"version": "b"})
+
+        # Let the full buffer start its flush, then stop mid bulk_write.
+        await asyncio.sleep(0.05)
+        write_buffer.add("3.3.3.3", {"version": "c"})
+        await write_buffer.stop()
+
+        return write_buffer
+
+    write_buffer = asyncio.run(scenario())
+
+    assert len(collection.written) == 3
+    assert write_buffer.stats()["pending"] == 0
+    assert write_buffer.stats()["written"] == 3
+
+
+def test_flush_coalesces_submissions(collection: SlowCollection) -> None:
+    async def scenario() -> None:
+        write_buffer = buffer.WriteBuffer()
+        write_buffer.add("1.1.1.1", {"version": "a"})
+        write_buffer.add("1.1.1.1", {"version": "b"})
+        await write_buffer.flush()
+
+    asyncio.run(scenario())
+
+    assert len(collection.written) == 1
+    assert collection.written[0]._doc == {"$set": {"version": "b"}}
+
+
+def test_failed_flush_keeps_the_batch_and_the_loop(
+    collection: SlowCollection, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[int] = []
+
+    async def previous_keys(batch: dict[str, Any]) -> dict[str, Any]:
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise KeyError("cc")
+
+        return {ip: {} for ip in batch}
+
+    monkeypatch.setattr(buffer, "previous_keys", previous_keys)
+    collection.delay = 0
+
+    async def scenario() -> int:
+        write_buffer = buffer.WriteBuffer(max_size=100, interval=0.05)
+        write_buffer.start()
+
+        write_buffer.add("1.1.1.1", {"version": "a"})
+        await asyncio.sleep(0.08)
+
+        # The first flush failed; its batch is kept and the loop retries it.
+        assert "1.1.1.1" in write_buffer
+        await asyncio.sleep(0.1)
+
+        pending = write_buffer.stats()["pending"]
+        await write_buffer.stop()
+        return pending
+
+    assert asyncio.run(scenario()) == 0
+    assert len(calls) == 2
+    assert [request._doc for request in collection.written] == [
+        {"$set": {"version": "a"}}
+    ]
+
+
+def test_refresh_never_recreates_a_pruned_node(
+    collection: SlowCollection, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def previous_keys(batch: dict[str, Any]) -> dict[str, Any]:
+        return {"1.1.1.1": {}}
+
+    monkeypatch.setattr(buffer, "previous_keys", previous_keys)
+    collection.delay = 0
+
+    async def scenario() -> None:
+        write_buffer = buffer.WriteBuffer()
+        # Known, refreshed; pruned since, refreshed; new, with a location.
+        write_buffer.add("1.1.1.1", {"version": "a"})
+        write_buffer.add("2.2.2.2", {"version": "b"})
+        write_buffer.add("3.3.3.3", {"version": "c", "cc": "DE"})
+        await write_buffer.flush()
+
+    asyncio.run(scenario())
+
+    assert [
+        (request._filter["ip"], request._upsert) for request in collection.written
+    ] == [("1.1.1.1", False), ("3.3.3.3", True)]
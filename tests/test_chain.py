@@ -0,0 +1,110 @@
+from typing import Any
+
+import asyncio
+
+import pytest
+
+import backend.factory
+from backend.chain import ChainFollower
+
+
+def _chain(
+    length: int, fork: str = "a", base: list[dict[str, Any]] | None = None
+) -> list[dict[str, Any]]:
+    headers = list(base or [])
+
+    for height in range(len(headers), length):
+        headers.append(
+            {
+                "height": height,
+                "hash": f"{fork}{height}",
+                "prev_hash": headers[-1]["hash"] if headers else "",
+                "timestamp": 1_700_000_000 + height * 60,
+                "difficulty": 1000 + height,
+                "reward": 30,
+                "block_size": 200,
+            }
+        )
+
+    return headers
+
+
+class Daemon:
+    def __init__(self, headers: list[dict[str, Any]]) -> None:
+        self.headers = headers
+        self.fetched: int = 0
+
+    async def get_last_block_header(self) -> dict[str, Any]:
+        return {"result": {"block_header": self.headers[-1]}}
+
+    async def get_block_headers_range(
+        self, *, start_height: int, end_height: int
+    ) -> dict[str, Any]:
+        headers = self.headers[start_height : end_height + 1]
+        self.fetched += len(headers)
+        return {"result": {"headers": headers}}
+
+
+@pytest.fixture
+def follower() -> ChainFollower:
+    follower = ChainFollower()
+    follower.configure(capacity=100)
+    return follower
+
+
+def _follow(
+    monkeypatch: pytest.MonkeyPatch,
+    follower: ChainFollower,
+    headers: list[dict[str, Any]],
+) -> Daemon:
+    daemon = Daemon(headers)
+    monkeypatch.setattr(backend.factory, "daemon", daemon)
+    asyncio.run(follower.poll())
+    return daemon
+
+
+def _hashes(follower: ChainFollower) -> list[str]:
+    window = follower.window
+    return [
+        hash
+        for height in range(window.first_height, window.last_height + 1)
+        if (hash := window.hash_at(height)) is not None
+    ]
+
+
+def test_extends_the_window(
+    monkeypatch: pytest.MonkeyPatch, follower: ChainFollower
+) -> None:
+    chain = _chain(250)
+    _follow(monkeypatch, follower, chain[:200])
+    daemon = _follow(monkeypatch, follower, chain)
+
+    assert daemon.fetched == 50
+    assert _hashes(follower) == [header["hash"] for header in chain[150:]]
+    assert follower.reorgs == 0
+
+
+def test_rewinds_to_the_common_ancestor(
+    monkeypatch: pytest.MonkeyPatch, follower: ChainFollower
+) -> None:
+    chain = _chain(250)
+    fork = _chain(252, "b", chain[:245])
+
+    _follow(monkeypatch, follower, chain)
+    daemon = _follow(monkeypatch, follower, fork)
+
+    # The new tip's range, the search back to the fork and the new branch.
+    assert daemon.fetched == 2 + 16 + 7
+    assert _hashes(follower) == [header["hash"] for header in fork[152:]]
+    assert follower.reorgs == 1
+
+
+def test_refetches_a_window_with_no_common_ancestor(
+    monkeypatch: pytest.MonkeyPatch, follower: ChainFollower
+) -> None:
+    _follow(monkeypatch, follower, _chain(250))
+    fork = _chain(250, "b")
+    _follow(monkeypatch, follower, fork)
+
+    assert _hashes(follower) == [header["hash"] for header in fork[150:]]
+    assert follower.reorgs == 1
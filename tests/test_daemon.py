@@ -0,0 +1,115 @@
+from typing import Any
+
+import asyncio
+
+import pytest
+from quart import Quart
+
+from backend.blueprints.daemon import routes, daemon_bp
+
+POOL: list[dict[str, Any]] = [
+    {"id_hash": "a", "fee": 3000, "weight": 1000, "receive_time": 50},
+    {"id_hash": "b", "fee": 1000, "weight": 500, "receive_time": 10},
+    {"id_hash": "c", "fee": 6000, "weight": 2000, "receive_time": 40},
+    {"id_hash": "d", "fee": 500, "weight": 1000, "receive_time": 30},
+    {"id_hash": "e", "fee": 4000, "weight": 1000, "receive_time": 20},
+]
+
+
+class DaemonHTTP:
+    async def get_transaction_pool(self) -> dict[str, Any]:
+        return {"transactions": list(POOL), "spent_key_images": [], "credits": 0}
+
+
+@pytest.fixture
+def app(monkeypatch: pytest.MonkeyPatch) -> Quart:
+    monkeypatch.setattr(routes, "daemon_legacy", DaemonHTTP())
+
+    app = Quart(__name__)
+    app.config["RESPONSE_CACHE_TTLS"] = {"/v1/daemon/get_transaction_pool": 0}
+    app.register_blueprint(daemon_bp, url_prefix="/v1")
+    return app
+
+
+def _get(app: Quart, query: dict[str, Any]) -> tuple[int, Any]:
+    async def get() -> tuple[int, Any]:
+        response = await app.test_client().get(
+            "/v1/daemon/get_transaction_pool", query_string=query
+        )
+        return response.status_code, await response.get_json()
+
+    return asyncio.run(get())
+
+
+def _pages(app: Quart, **query: Any) -> list[list[str]]:
+    pages: list[list[str]] = []
+    cursor: str | None = None
+
+    while True:
+        status, body = _get(app, {**query, **({"cursor": cursor} if cursor else {})})
+        assert status == 200
+
+        result = body["result"]
+        pages.append([tx["id_hash"] for tx in result["transactions"]])
+
+        cursor = result["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize(
+    ("sort", "order", "expected"),
+    [
+        ("receive_time", "desc", [["a", "c"], ["d", "e"], ["b"]]),
+        ("receive_time", "asc", [["b", "e"], ["d", "c"], ["a"]]),
+        # a, c and e pay 3 per byte and rank by hash among themselves.
+        ("fee_per_byte", "desc", [["e", "c"], ["a", "b"], ["d"]]),
+        ("fee_per_byte", "asc", [["d", "b"], ["a", "c"], ["e"]]),
+    ],
+)
+def test_cursor_round_trips(
+    app: Quart, sort: str, order: str, expected: list[list[str]]
+) -> None:
+    pages = _pages(app, sort=sort, order=order, limit=2)
+
+    assert pages == expected
+
+
+def test_whole_pool_fits_one_page(app: Quart) -> None:
+    assert _pages(app, limit=5) == [["a", "c", "d", "e", "b"]]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        "bm90IGpzb24",  # not json
+        "WzEsMl0",  # [1,2]
+        "WyJyZWNlaXZlX3RpbWUiLCJkZXNjIiwieCIsImEiXQ",  # a string key
+        "WyJyZWNlaXZlX3RpbWUiLCJkZXNjIixOYU4sImEiXQ",  # NaN
+        "WyJyZWNlaXZlX3RpbWUiLCJkZXNjIiw0MCwxXQ",  # a number hash
+    ],
+)
+def test_malformed_cursor_is_rejected(app: Quart, cursor: str) -> None:
+    status, body = _get(app, {"limit": 2, "cursor": cursor})
+
+    assert status == 400
+    assert body == {"status": "error", "error": "Invalid cursor"}
+
+
+def test_cursor_is_bound_to_its_sort_and_order(app: Quart) -> None:
+    _, body = _get(app, {"limit": 2})
+    cursor = body["result"]["next_cursor"]
+
+    assert _get(app, {"limit": 2, "cursor": cursor})[0] == 200
+    assert _get(app, {"limit": 2, "cursor": cursor, "order": "asc"})[0] == 400
+    assert (
+        _get(app, {"limit": 2, "cursor": cursor, "sort": "fee_per_byte"})[0] == 400
+    )
+
+
+@pytest.mark.parametrize(
+    "query", [{"sort": "size"}, {"order": "up"}, {"limit": 0}, {"limit": "x"}]
+)
+def test_invalid_parameters_are_rejected(app: Quart, query: dict[str, Any]) -> None:
+    assert _get(app, query)[0] == 400
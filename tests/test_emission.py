@@ -0,0 +1,136 @@
+from typing import Any
+
+import asyncio
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+import backend.factory
+from backend import emission
+from backend.emission import EmissionLedger
+from backend.scheduler import scheduler
+
+
+def _chain(
+    length: int, fork: str = "a", base: list[dict[str, Any]] | None = None
+) -> list[dict[str, Any]]:
+    headers = list(base or [])
+
+    for height in range(len(headers), length):
+        headers.append(
+            {
+                "height": height,
+                "hash": f"{fork}{height}",
+                "prev_hash": headers[-1]["hash"] if headers else "",
+                "reward": 300 + height + (7 if fork != "a" else 0),
+            }
+        )
+
+    return headers
+
+
+class Daemon:
+    def __init__(self, headers: list[dict[str, Any]], calls: int = -1) -> None:
+        self.headers = headers
+        self.ranges: list[tuple[int, int]] = []
+
+        # Leadership is lost after this many header fetches.
+        self.calls = calls
+
+    async def get_last_block_header(self) -> dict[str, Any]:
+        return {"result": {"block_header": self.headers[-1]}}
+
+    async def get_block_headers_range(
+        self, *, start_height: int, end_height: int
+    ) -> dict[str, Any]:
+        self.ranges.append((start_height, end_height))
+
+        if len(self.ranges) == self.calls:
+            scheduler.lease.held = False
+
+        return {"result": {"headers": self.headers[start_height : end_height + 1]}}
+
+
+@pytest.fixture
+def ledger(monkeypatch: pytest.MonkeyPatch) -> EmissionLedger:
+    monkeypatch.setattr(emission, "HEADERS_PER_CALL", 10)
+    monkeypatch.setattr(emission, "REWIND_DEPTH", 20)
+    monkeypatch.setattr(scheduler.lease, "held", True)
+
+    ledger = EmissionLedger()
+    ledger._redis = FakeAsyncRedis()
+    return ledger
+
+
+def _update(
+    monkeypatch: pytest.MonkeyPatch, ledger: EmissionLedger, daemon: Daemon
+) -> Daemon:
+    monkeypatch.setattr(backend.factory, "daemon", daemon)
+    scheduler.lease.held = True
+    asyncio.run(ledger.update())
+    return daemon
+
+
+def _state(ledger: EmissionLedger) -> tuple[int | None, list[str]]:
+    async def read() -> tuple[int | None, list[bytes]]:
+        recent: list[bytes] = await ledger.redis.lrange(ledger.recent_key, 0, -1)  # type: ignore[misc]
+        return await ledger.total(), recent
+
+    total, recent = asyncio.run(read())
+    return total, [entry.decode().split(":")[1] for entry in recent]
+
+
+def test_backfills_in_chunks_and_extends(
+    monkeypatch: pytest.MonkeyPatch, ledger: EmissionLedger
+) -> None:
+    chain = _chain(45)
+
+    # Leadership moves on after two chunks, which stay committed.
+    _update(monkeypatch, ledger, Daemon(chain[:35], calls=2))
+    assert ledger.height == 19
+    assert _state(ledger)[0] is None
+
+    daemon = _update(monkeypatch, ledger, Daemon(chain[:35]))
+    assert daemon.ranges == [(20, 29), (30, 34)]
+    assert ledger.synced
+
+    daemon = _update(monkeypatch, ledger, Daemon(chain))
+    assert daemon.ranges == [(35, 44)]
+
+    total, recent = _state(ledger)
+    assert total == sum(header["reward"] for header in chain)
+    assert recent == [header["hash"] for header in chain[-20:]]
+    assert ledger.rewinds == 0
+
+
+def test_rewinds_a_shallow_reorganization(
+    monkeypatch: pytest.MonkeyPatch, ledger: EmissionLedger
+) -> None:
+    chain = _chain(40)
+    fork = _chain(42, "b", chain[:37])
+
+    _update(monkeypatch, ledger, Daemon(chain))
+    _update(monkeypatch, ledger, Daemon(fork))
+
+    total, recent = _state(ledger)
+    assert total == sum(header["reward"] for header in fork)
+    assert recent == [header["hash"] for header in fork[-20:]]
+    assert ledger.rewinds == 3
+
+
+def test_rebuilds_after_a_deep_reorganization(
+    monkeypatch: pytest.MonkeyPatch, ledger: EmissionLedger
+) -> None:
+    chain = _chain(40)
+    fork = _chain(40, "b", chain[:5])
+
+    _update(monkeypatch, ledger, Daemon(chain))
+    daemon = _update(monkeypatch, ledger, Daemon(fork))
+
+    # Every kept block is rewound before the ledger starts over from genesis.
+    assert ledger.rewinds == 21
+    assert daemon.ranges[-4:] == [(0, 9), (10, 19), (20, 29), (30, 39)]
+
+    total, recent = _state(ledger)
+    assert total == sum(header["reward"] for header in fork)
+    assert recent == [header["hash"] for header in fork[-20:]]
@@ -0,0 +1,129 @@
+from typing import Any
+
+import struct
+import asyncio
+import hashlib
+from pathlib import Path
+
+import httpx
+import pytest
+
+from backend import epee
+from backend.daemon import PooledDaemonHTTP, daemon_transport
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# Length and truncated SHA-256 of each block and transaction blob in
+# fixtures/get_blocks_by_height.bin, as printed by scripts/capture_blocks.py.
+BLOCKS: list[tuple[int, str, list[tuple[int, str]]]] = [
+    (80, "1b4a2eafaa30ce43", []),
+    (
+        120,
+        "68a56a0fd5db3032",
+        [(1500, "378572f574d9e1b1"), (2300, "2e57c503a067c73b")],
+    ),
+    (95, "b48cc009db52252e", [(700, "867d6b9968574889")]),
+]
+
+
+def _digest(blob: Any) -> str:
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def test_decodes_blocks_response() -> None:
+    data = epee.loads((FIXTURES / "get_blocks_by_height.bin").read_bytes())
+
+    assert bytes(data["status"]) == b"OK"
+    assert data["untrusted"] is False
+    assert data["credits"] == 0
+    assert len(data["blocks"]) == len(BLOCKS)
+
+    for entry, (size, digest, txs) in zip(data["blocks"], BLOCKS):
+        assert isinstance(entry["block"], memoryview)
+        assert (len(entry["block"]), _digest(entry["block"])) == (size, digest)
+        assert [(len(tx), _digest(tx)) for tx in entry.get("txs", [])] == txs
+
+
+def test_round_trip() -> None:
+    data = epee.loads((FIXTURES / "get_blocks_by_height.bin").read_bytes())
+    document = {
+        "blocks": [
+            {
+                "block": bytes(entry["block"]),
+                "txs": [bytes(tx) for tx in entry.get("txs", [])],
+            }
+            for entry in data["blocks"]
+        ],
+        "status": "OK",
+        "untrusted": False,
+        "signed": [-1, 2],
+        "ratio": 1.5,
+    }
+
+    decoded = epee.loads(epee.dumps(document))
+
+    assert [bytes(entry["block"]) for entry in decoded["blocks"]] == [
+        entry["block"] for entry in document["blocks"]
+    ]
+    assert [
+        [bytes(tx) for tx in entry.get("txs", [])] for entry in decoded["blocks"]
+    ] == [entry["txs"] for entry in document["blocks"]]
+    assert decoded["signed"] == [-1, 2]
+    assert decoded["ratio"] == 1.5
+
+
+def test_encodes_request_as_the_daemon_expects() -> None:
+    assert epee.dumps({"heights": [5, 6, 7]}) == (
+        epee.SIGNATURE
+        + b"\x04"
+        + b"\x07heights"
+        + bytes([epee.TYPE_UINT64 | epee.ARRAY_FLAG])
+        + b"\x0c"
+        + struct.pack("<3Q", 5, 6, 7)
+    )
+
+
+def test_rejects_truncated_documents() -> None:
+    document = (FIXTURES / "get_blocks_by_height.bin").read_bytes()
+
+    for end in range(len(epee.SIGNATURE), len(document) - 1, 97):
+        with pytest.raises(epee.EpeeError):
+            epee.loads(document[:end])
+
+    with pytest.raises(epee.EpeeError):
+        epee.loads(b"{}")
+
+
+@pytest.mark.parametrize(
+    ("fixture", "status_code", "expected"),
+    [
+        ("get_blocks_by_height.bin", 200, None),
+        ("get_blocks_by_height_busy.bin", 200, "BUSY"),
+        ("get_blocks_by_height.bin", 500, "Daemon returned HTTP 500"),
+    ],
+)
+def test_get_blocks_by_height_bin(
+    monkeypatch: pytest.MonkeyPatch,
+    fixture: str,
+    status_code: int,
+    expected: str | None,
+) -> None:
+    sent: list[bytes] = []
+
+    async def post_binary(path: str, body: bytes) -> httpx.Response:
+        assert path == "/get_blocks_by_height.bin"
+        sent.append(body)
+        return httpx.Response(status_code, content=(FIXTURES / fixture).read_bytes())
+
+    monkeypatch.setattr(daemon_transport, "post_binary", post_binary)
+
+    data = asyncio.run(
+        PooledDaemonHTTP().get_blocks_by_height_bin(heights=[1000, 1001, 1002])
+    )
+
+    assert epee.loads(sent[0]) == {"heights": [1000, 1001, 1002]}
+
+    if expected is None:
+        assert len(data["blocks"]) == len(BLOCKS)
+    else:
+        assert data["error"]["message"] == expected
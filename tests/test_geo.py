@@ -0,0 +1,135 @@
+from typing import Any
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+from backend.blueprints.analytics import geo
+
+
+class Collection:
+    def __init__(self, indexes: list[dict[str, Any]]) -> None:
+        self.indexes = indexes
+        self.created: list[tuple[Any, dict[str, Any]]] = []
+
+    async def list_indexes(self) -> AsyncIterator[dict[str, Any]]:
+        for index in self.indexes:
+            yield index
+
+    async def create_index(self, keys: Any, **options: Any) -> None:
+        self.created.append((keys, options))
+
+
+class Database:
+    def __init__(self, collection: Collection) -> None:
+        self.collection = collection
+        self.commands: list[tuple[Any, ...]] = []
+
+    def get_collection(self, name: str) -> Collection:
+        return self.collection
+
+    async def command(self, *args: Any, **kwargs: Any) -> None:
+        self.commands.append((*args, kwargs))
+
+
+def _ensure(
+    monkeypatch: pytest.MonkeyPatch, indexes: list[dict[str, Any]]
+) -> Database:
+    database = Database(Collection(indexes))
+    monkeypatch.setattr(geo, "db", database)
+    asyncio.run(geo.GeoCache(ttl=3600).ensure_indexes())
+    return database
+
+
+def test_incomplete_backend_cannot_be_created() -> None:
+    class Incomplete(geo.GeoBackend):
+        async def is_bogon(self, ip: str) -> bool:
+            return False
+
+    with pytest.raises(TypeError):
+        Incomplete()  # type: ignore[abstract]
+
+
+def test_creates_ttl_index(monkeypatch: pytest.MonkeyPatch) -> None:
+    database = _ensure(monkeypatch, [{"name": "_id_", "key": {"_id": 1}}])
+
+    assert database.collection.created == [
+        ("time", {"name": "time_ttl", "expireAfterSeconds": 3600})
+    ]
+    assert database.commands == []
+
+
+def test_changes_ttl_in_place(monkeypatch: pytest.MonkeyPatch) -> None:
+    database = _ensure(
+        monkeypatch,
+        [{"name": "time_1", "key": {"time": 1}, "expireAfterSeconds": 60}],
+    )
+
+    assert database.collection.created == []
+    assert database.commands == [
+        (
+            "collMod",
+            "geo_cache",
+            {"index": {"name": "time_1", "expireAfterSeconds": 3600}},
+        )
+    ]
+
+
+def test_leaves_matching_ttl_alone(monkeypatch: pytest.MonkeyPatch) -> None:
+    database = _ensure(
+        monkeypatch,
+        [{"name": "time_ttl", "key": {"time": 1}, "expireAfterSeconds": 3600}],
+    )
+
+    assert database.collection.created == []
+    assert database.commands == []
+
+
+class Unplaceable(geo.GeoBackend):
+    cached = True
+
+    def __init__(self) -> None:
+        self.located: int = 0
+
+    async def is_bogon(self, ip: str) -> bool:
+        return False
+
+    async def locate(self, ip: str) -> dict[str, Any] | None:
+        self.located += 1
+        return None
+
+
+class CacheCollection:
+    def __init__(self) -> None:
+        self.documents: dict[str, dict[str, Any]] = {}
+
+    async def find_one(self, query: dict[str, Any]) -> dict[str, Any] | None:
+        return self.documents.get(query["_id"])
+
+    async def replace_one(
+        self, query: dict[str, Any], document: dict[str, Any], upsert: bool
+    ) -> None:
+        self.documents[query["_id"]] = document
+
+
+def test_unplaceable_ip_is_looked_up_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    collection = CacheCollection()
+    backend = Unplaceable()
+
+    monkeypatch.setattr(geo, "db", Database(collection))  # type: ignore[arg-type]
+    monkeypatch.setattr(geo, "geo_backend", backend)
+    monkeypatch.setattr(geo, "geo_cache", geo.GeoCache())
+
+    async def scenario() -> list[geo.GeoEntry]:
+        first = await geo.resolve("198.51.100.9", locate=True)
+
+        # Also from Mongo alone, as a fresh worker would see it.
+        geo.geo_cache._entries.clear()
+        return [first, await geo.resolve("198.51.100.9", locate=True)]
+
+    entries = asyncio.run(scenario())
+
+    assert [entry["geo"] for entry in entries] == [None, None]
+    assert backend.located == 1
+    assert collection.documents["198.51.100.9"]["located"] is True
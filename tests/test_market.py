@@ -0,0 +1,262 @@
+from typing import Any
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from quart import Quart
+
+from backend.blueprints.market import routes, market_bp
+
+# Raw exchange payloads, and what the routes rendered for them before the
+# adapter registry, which the registry must keep rendering byte for byte.
+NONKYC: dict[str, Any] = {
+    "XNV-USDT": {
+        "lastPrice": "0.0123456",
+        "bestBid": "0.0120001",
+        "bestAsk": "0.0125",
+        "volumeSecondary": "1234.5678",
+        "highPrice": "0.013",
+        "lowPrice": "0.0119",
+        "lastTradeAt": 1760000000123,
+    },
+    "XNV-BTC": {
+        "lastPrice": "0.00000012",
+        "bestBid": "0.00000011",
+        "bestAsk": "0.00000013",
+        "volumeSecondary": "0.0456",
+        "highPrice": "0.00000014",
+        "lowPrice": "0.0000001",
+        "lastTradeAt": 1760000000999,
+    },
+    "XNV-USDT0": {
+        "lastPrice": "0.0123456",
+        "bestBid": "0.012",
+        "bestAsk": "0.0125",
+        "volumeSecondary": "99.5",
+        "highPrice": "0.013",
+        "lowPrice": "0.0119",
+        "lastTradeAt": 1760000000000,
+    },
+}
+CEXSWAP: dict[str, Any] = {
+    "XNV-USDT": {
+        "pair": "XNV-USDT",
+        "quote": "USDT",
+        "last": "0.0123456",
+        "volume24h": "5000",
+        "volume24h_usd": "61.7281",
+        "high24h": "0.013",
+        "low24h": "0.0119",
+        "change24h_pct": "-3.14159",
+    },
+    "XNV-BTC": {
+        "pair": "XNV-BTC",
+        "quote": "BTC",
+        "last": "0.00000012",
+        "volume24h": "0.0456",
+        "volume24h_usd": "5000",
+        "high24h": "0.00000014",
+        "low24h": "0.0000001",
+        "change24h_pct": "2.5",
+    },
+    "XNV-USDC": {
+        "pair": "XNV-USDC",
+        "quote": "USDC.e",
+        "last": "0.0123456",
+        "volume24h": "77.1",
+        "volume24h_usd": "0.95",
+        "high24h": "0.013",
+        "low24h": "0.0119",
+        "change24h_pct": "0",
+    },
+}
+NOIRTRADE: dict[str, Any] = {
+    "XNV_USDT0": {
+        "ticker_id": "XNV_USDT0",
+        "last_price": "0.0123456",
+        "bid": "0.012",
+        "ask": "0.0125",
+        "target_volume": "42.424242",
+        "high": "0.013",
+        "low": "0.0119",
+    },
+    "XNV_BTC": {
+        "ticker_id": "XNV_BTC",
+        "last_price": "0.00000012",
+        "bid": "0.00000011",
+        "ask": "0.00000013",
+        "target_volume": "0.01",
+        "high": "0.00000014",
+        "low": "0.0000001",
+    },
+    "XNV_LTC": {
+        "ticker_id": "XNV_LTC",
+        "last_price": "0.000123456789",
+        "bid": "0.0001",
+        "ask": "0.0002",
+        "target_volume": "3.5",
+        "high": "0.0003",
+        "low": "0.0001",
+    },
+}
+
+# Local time, as the route renders it; every fixture trade is in this second.
+LAST_TRADE: str = datetime.fromtimestamp(1_760_000_000).isoformat()
+
+NONKYC_EXPECTED: dict[str, Any] = {
+    "XNV-BTC": {
+        "ask": "13 sat",
+        "bid": "11 sat",
+        "high": "14 sat",
+        "last_price": "12 sat",
+        "last_trade": LAST_TRADE,
+        "low": "10 sat",
+        "volume": "0.0456 BTC",
+    },
+    "XNV-ETH": {"error": "pair not found"},
+    "XNV-USDT": {
+        "ask": "$0.0125",
+        "bid": "$0.012",
+        "high": "$0.013",
+        "last_price": "$0.0123",
+        "last_trade": LAST_TRADE,
+        "low": "$0.0119",
+        "volume": "$1234.57",
+    },
+    "XNV-USDT0": {
+        "ask": "0.0125 USDT0",
+        "bid": "0.012 USDT0",
+        "high": "0.013 USDT0",
+        "last_price": "0.0123456 USDT0",
+        "last_trade": LAST_TRADE,
+        "low": "0.0119 USDT0",
+        "volume": "99.5 USDT0",
+    },
+}
+
+CEXSWAP_EXPECTED: dict[str, Any] = {
+    "XNV-BTC": {
+        "change_24h_pct": "2.5%",
+        "high": "14 sat",
+        "last_price": "12 sat",
+        "low": "10 sat",
+        "volume": "0.0456 BTC",
+    },
+    "XNV-USDC": {
+        "change_24h_pct": "0.0%",
+        "high": "0.013 USDC.e",
+        "last_price": "0.0123456 USDC.e",
+        "low": "0.0119 USDC.e",
+        "volume": "77.1 USDC.e",
+    },
+    "XNV-USDT": {
+        "change_24h_pct": "-3.14%",
+        "high": "$0.013",
+        "last_price": "$0.0123",
+        "low": "$0.0119",
+        "volume": "$61.73",
+    },
+}
+
+NOIRTRADE_EXPECTED: dict[str, Any] = {
+    "XNV_BTC": {
+        "ask": "13 sat",
+        "bid": "11 sat",
+        "high": "14 sat",
+        "last_price": "12 sat",
+        "low": "10 sat",
+        "volume": "0.01 BTC",
+    },
+    "XNV_LTC": {
+        "ask": "0.0002 LTC",
+        "bid": "0.0001 LTC",
+        "high": "0.0003 LTC",
+        "last_price": "0.00012346 LTC",
+        "low": "0.0001 LTC",
+        "volume": "3.5 LTC",
+    },
+    "XNV_USDT0": {
+        "ask": "$0.0125",
+        "bid": "$0.012",
+        "high": "$0.013",
+        "last_price": "$0.0123",
+        "low": "$0.0119",
+        "volume": "$42.42",
+    },
+}
+
+PAYLOADS: dict[str, dict[str, Any]] = {
+    "nonkyc": NONKYC,
+    "cexswap": CEXSWAP,
+    "noirtrade": NOIRTRADE,
+}
+
+
+@pytest.fixture(autouse=True)
+def markets(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def get_markets(name: str, fetch: Any, pairs: list[str]) -> Any:
+        return PAYLOADS[name]
+
+    monkeypatch.setattr(routes, "get_markets", get_markets)
+
+
+def _app(**pairs: list[str]) -> Quart:
+    app = Quart(__name__)
+    app.config["RESPONSE_CACHE_TTLS"] = {
+        f"/v1/market/{name}": 0 for name in PAYLOADS
+    }
+    app.config.update(pairs)
+    app.register_blueprint(market_bp, url_prefix="/v1")
+    return app
+
+
+def _get(app: Quart, path: str) -> Any:
+    async def get() -> Any:
+        response = await app.test_client().get(path)
+        assert response.status_code == 200
+        return await response.get_json()
+
+    return asyncio.run(get())
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [
+        ("nonkyc", NONKYC_EXPECTED),
+        ("cexswap", CEXSWAP_EXPECTED),
+        ("noirtrade", NOIRTRADE_EXPECTED),
+    ],
+)
+def test_matches_baseline_output(name: str, expected: dict[str, Any]) -> None:
+    app = _app(
+        NONKYC_MARKET_PAIRS=[*NONKYC, "XNV-ETH"],
+        CEXSWAP_MARKET_PAIRS=list(CEXSWAP),
+        NOIRTRADE_MARKET_PAIRS=list(NOIRTRADE),
+    )
+
+    assert _get(app, f"/v1/market/{name}")["result"] == expected
+
+
+def test_raw_output() -> None:
+    app = _app(NOIRTRADE_MARKET_PAIRS=["XNV_BTC"])
+
+    assert _get(app, "/v1/market/noirtrade?format=raw")["result"] == {
+        "XNV_BTC": {
+            "last_price": 1.2e-07,
+            "bid": 1.1e-07,
+            "ask": 1.3e-07,
+            "volume": 0.01,
+            "high": 1.4e-07,
+            "low": 1e-07,
+            "quote": "BTC",
+        }
+    }
+
+
+def test_pipelines_are_per_app() -> None:
+    first = _app(NONKYC_MARKET_PAIRS=["XNV-BTC"])
+    second = _app(NONKYC_MARKET_PAIRS=["XNV-USDT"])
+
+    assert _get(first, "/v1/market/nonkyc")["pairs"] == ["XNV-BTC"]
+    assert _get(second, "/v1/market/nonkyc")["pairs"] == ["XNV-USDT"]
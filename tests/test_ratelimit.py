@@ -0,0 +1,191 @@
+from typing import Any
+
+import time
+import asyncio
+from datetime import timedelta
+
+import pytest
+from quart import Quart
+from fakeredis import FakeServer, FakeAsyncRedis
+from quart_rate_limiter import RateLimit
+
+from backend import ratelimit
+from backend.ratelimit import Quota, CostRateLimiter, HybridRateLimiter, _Lease
+
+MINUTE = RateLimit(100, timedelta(minutes=1))
+HOUR = RateLimit(1000, timedelta(hours=1))
+
+
+def _limiter(
+    granted: list[list[_Lease | None]], grant: int | None = None
+) -> HybridRateLimiter:
+    limiter = HybridRateLimiter(Quart(__name__), "redis://localhost", lease_size=10)
+
+    async def create_key(endpoint: str, limit: RateLimit) -> str:
+        return f"{endpoint}-{limit.period.total_seconds():g}"
+
+    async def call(
+        keys: list[str],
+        leases: list[_Lease | None],
+        limits: list[RateLimit],
+        need: int,
+        want: int,
+    ) -> list[Any]:
+        granted.append(leases)
+
+        # The sweeper refunds every lease while the script runs.
+        limiter._leases.clear()
+        await asyncio.sleep(0)
+
+        return [
+            1,
+            *[
+                value
+                for _ in keys
+                for value in (want if grant is None else grant, 50, 0)
+            ],
+        ]
+
+    limiter._create_key = create_key  # type: ignore[method-assign]
+    limiter._call = call  # type: ignore[method-assign]
+    return limiter
+
+
+def test_lease_taken_during_the_call() -> None:
+    granted: list[list[_Lease | None]] = []
+    limiter = _limiter(granted)
+
+    # Enough left on the hour, not on the minute.
+    limiter._leases["e-3600"] = _Lease(HOUR, 50, 0, time.monotonic() + 60)
+
+    admitted, quota = asyncio.run(limiter._consume("e", [MINUTE, HOUR], 3))
+
+    assert admitted
+    assert len(quota) == 2
+    assert [lease.tokens if lease else None for lease in granted[0]] == [None, 50]
+    assert {key: lease.tokens for key, lease in limiter._leases.items()} == {
+        "e-60": 7,
+        "e-3600": 7,
+    }
+
+
+def test_tokens_never_go_negative() -> None:
+    # A grant short of the cost, as when a limit was lowered mid-lease.
+    limiter = _limiter([], grant=2)
+
+    admitted, _ = asyncio.run(limiter._consume("e", [MINUTE], 5))
+
+    assert admitted
+    assert limiter._leases["e-60"].tokens == 0
+
+
+class Redis(FakeAsyncRedis):
+    # Every worker's client talks to the same fake server.
+    server = FakeServer()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "Redis":
+        return cls(server=cls.server)
+
+
+@pytest.fixture(autouse=True)
+def redis(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ratelimit, "Redis", Redis)
+    monkeypatch.setattr(Redis, "server", FakeServer())
+
+
+async def _serving(limiter: CostRateLimiter) -> CostRateLimiter:
+    async def create_key(endpoint: str, limit: RateLimit) -> str:
+        return f"{endpoint}-{limit.period.total_seconds():g}"
+
+    limiter._create_key = create_key  # type: ignore[method-assign]
+
+    await limiter._before_serving()
+    return limiter
+
+
+def test_take_charges_the_cost_on_every_limit() -> None:
+    short = RateLimit(10, timedelta(minutes=1))
+    long = RateLimit(20, timedelta(hours=1))
+
+    async def scenario() -> list[tuple[bool, Quota]]:
+        limiter = await _serving(
+            CostRateLimiter(Quart(__name__), "redis://localhost")
+        )
+
+        try:
+            return [
+                *[await limiter._consume("e", [short, long], 3) for _ in range(4)],
+                await limiter._consume("e", [long], 3),
+            ]
+
+        finally:
+            await limiter._after_serving()
+
+    results = asyncio.run(scenario())
+
+    assert [admitted for admitted, _ in results] == [True, True, True, False, True]
+
+    # Refused by the minute: two of its tokens, six seconds apart, must free up.
+    _, quota = results[3]
+    assert quota[0][2] == pytest.approx(12, abs=1)
+    assert quota[1][2] == 0
+
+    # The refusal charged neither limit: the hour has 12 of 20 spent.
+    _, quota = results[4]
+    assert quota[0][1] == pytest.approx(12 * 180, abs=1)
+
+
+def test_leases_until_the_limit_is_spent() -> None:
+    limit = RateLimit(10, timedelta(minutes=1))
+
+    async def scenario() -> tuple[list[bool], HybridRateLimiter]:
+        limiter = HybridRateLimiter(
+            Quart(__name__), "redis://localhost", lease_size=4
+        )
+        await _serving(limiter)
+
+        try:
+            return [
+                (await limiter._consume("e", [limit], 1))[0] for _ in range(11)
+            ], limiter
+
+        finally:
+            await limiter._after_serving()
+
+    admitted, limiter = asyncio.run(scenario())
+
+    assert admitted == [True] * 10 + [False]
+    # Grants of 4, 4 and the last 2, then a refused lease.
+    assert limiter.leases == 4
+    assert limiter.local_hits == 7
+
+
+def test_sweeper_refunds_unspent_leases() -> None:
+    limit = RateLimit(10, timedelta(minutes=1))
+
+    async def scenario() -> tuple[bool, bool]:
+        worker = HybridRateLimiter(
+            Quart(__name__), "redis://localhost", lease_size=5, lease_ttl=0.05
+        )
+        other = HybridRateLimiter(Quart(__name__), "redis://localhost", lease_size=1)
+        await _serving(worker)
+        await _serving(other)
+
+        try:
+            # Four tokens sit unspent in the first worker's lease.
+            await worker._consume("e", [limit], 1)
+            early, _ = await other._consume("e", [limit], 9)
+
+            await asyncio.sleep(0.1)
+            late, _ = await other._consume("e", [limit], 9)
+            return early, late
+
+        finally:
+            await worker._after_serving()
+            await other._after_serving()
+
+    early, late = asyncio.run(scenario())
+
+    assert not early
+    assert late
@@ -0,0 +1,89 @@
+import time
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from backend import scheduler as scheduler_module
+from backend.scheduler import Scheduler, JobFunction
+
+HOUR = timedelta(hours=1)
+
+
+@pytest.fixture
+def scheduler(monkeypatch: pytest.MonkeyPatch) -> Scheduler:
+    monkeypatch.setattr(scheduler_module, "Redis", FakeAsyncRedis)
+
+    scheduler = Scheduler()
+    scheduler.configure(redis_url="redis://localhost", lease_ttl=30)
+    return scheduler
+
+
+def test_new_leader_runs_missed_jobs_once(scheduler: Scheduler) -> None:
+    calls: list[str] = []
+
+    def job(name: str) -> JobFunction:
+        async def run() -> None:
+            calls.append(name)
+            await asyncio.sleep(0.01)
+
+        return run
+
+    scheduler.every("missed", HOUR, job("missed"), leader=True)
+    scheduler.every("done", HOUR, job("done"), leader=True)
+
+    async def scenario() -> dict[bytes, bytes]:
+        slot = scheduler.jobs[0].previous(time.time())
+
+        # The old leader ran "done" for the latest slot and "missed" only for
+        # the one before, and went away just as both fell due in this worker.
+        await scheduler.lease.redis.hset(  # type: ignore[misc]
+            scheduler.runs_key,
+            mapping={"missed": str(slot - 3600), "done": str(slot)},
+        )
+        for each in scheduler.jobs:
+            each.next_run = slot
+
+        scheduler.start()
+        await asyncio.sleep(0.1)
+        runs: dict[bytes, bytes] = await scheduler.lease.redis.hgetall(  # type: ignore[misc]
+            scheduler.runs_key
+        )
+
+        await scheduler.stop()
+        return runs
+
+    runs = asyncio.run(scenario())
+
+    assert calls == ["missed"]
+    assert runs[b"missed"] == runs[b"done"]
+
+
+def test_skips_a_job_still_running(scheduler: Scheduler) -> None:
+    started: list[float] = []
+    release = asyncio.Event()
+
+    async def job() -> None:
+        started.append(time.time())
+        await release.wait()
+
+    scheduler.every("job", HOUR, job)
+
+    async def scenario() -> None:
+        scheduler._spawn(scheduler.jobs[0], 0)
+        await asyncio.sleep(0)
+        scheduler._spawn(scheduler.jobs[0], 60)
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(*scheduler._running)
+
+        scheduler._spawn(scheduler.jobs[0], 120)
+        await asyncio.gather(*scheduler._running)
+
+    asyncio.run(scenario())
+
+    assert len(started) == 2
+    assert scheduler.skipped == 1
+    assert scheduler.runs == 2
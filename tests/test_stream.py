@@ -0,0 +1,197 @@
+from typing import Any
+
+import time
+import asyncio
+from collections.abc import Callable, Awaitable
+
+import pytest
+from aiohttp import web
+
+from backend.blueprints.market import stream
+from backend.blueprints.market.stream import (
+    TickerStream,
+    nonkyc_parse,
+    nonkyc_subscribe,
+)
+
+SEED: dict[str, Any] = {"XNV-USDT": {"lastPrice": "0.01", "bestBid": "0.009"}}
+
+TICK: dict[str, Any] = {
+    "method": "ticker",
+    "params": {"symbol": "XNV/USDT", "last": "0.02"},
+}
+
+
+class Exchange:
+    """
+    A local websocket feed: records subscriptions, pushes ``messages`` to every
+    client and then holds the connection open until the client leaves.
+    """
+
+    def __init__(self, messages: list[Any]) -> None:
+        self.messages = messages
+        self.subscriptions: list[Any] = []
+        self.connections: int = 0
+
+    async def handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+
+        self.subscriptions.append(await ws.receive_json())
+
+        for message in self.messages:
+            await ws.send_json(message)
+
+        async for _ in ws:
+            pass
+
+        return ws
+
+
+async def _serve(exchange: Exchange, test: Callable[[str], Awaitable[None]]) -> None:
+    app = web.Application()
+    app.router.add_get("/", exchange.handle)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+
+    port = runner.addresses[0][1]
+
+    try:
+        await test(f"ws://127.0.0.1:{port}/")
+
+    finally:
+        await runner.cleanup()
+
+
+async def _until(condition: Callable[[], bool]) -> None:
+    async def poll() -> None:
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), 5)
+
+
+def _stream(
+    url: str, fetch: Callable[[], Awaitable[dict[str, Any]]]
+) -> TickerStream:
+    return TickerStream(
+        url=url,
+        fetch=fetch,
+        subscribe=nonkyc_subscribe,
+        parse=nonkyc_parse,
+        max_age=60,
+    )
+
+
+async def _seed() -> dict[str, Any]:
+    return {pair: dict(fields) for pair, fields in SEED.items()}
+
+
+def test_ticks_patch_the_seed() -> None:
+    exchange = Exchange([TICK])
+
+    async def test(url: str) -> None:
+        ticker = _stream(url, _seed)
+        task = asyncio.create_task(ticker.run(["XNV-USDT"]))
+
+        try:
+            await _until(lambda: ticker.live)
+
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        assert ticker.tickers == {
+            "XNV-USDT": {"lastPrice": "0.02", "bestBid": "0.009"}
+        }
+        assert exchange.subscriptions == [
+            {"method": "subscribeTicker", "params": {"symbol": "XNV/USDT"}, "id": 1}
+        ]
+        assert not ticker.connected
+
+    asyncio.run(_serve(exchange, test))
+
+
+def test_seed_does_not_make_a_silent_stream_live() -> None:
+    ticker = _stream("ws://unused", _seed)
+    ticker.connected = True
+    ticker.last_update = time.monotonic() - 120
+
+    ticker.seed(SEED)
+
+    assert ticker.tickers == SEED
+    assert not ticker.live
+
+
+def test_failures_are_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(stream, "BACKOFF_MIN", 0.01)
+
+    # A REST seed that fails, then a connection whose first message the
+    # parser chokes on, then a healthy one.
+    exchange = Exchange([TICK])
+    fetches: list[int] = []
+    parsed: list[Any] = []
+
+    async def fetch() -> dict[str, Any]:
+        fetches.append(len(fetches))
+        if len(fetches) == 1:
+            raise RuntimeError("exchange down")
+
+        return await _seed()
+
+    def parse(message: Any) -> list[stream.TickUpdate]:
+        parsed.append(message)
+        if len(parsed) == 1:
+            raise TypeError("bad ticker")
+
+        return list(nonkyc_parse(message))
+
+    async def test(url: str) -> None:
+        ticker = _stream(url, fetch)
+        ticker._parse = parse
+        task = asyncio.create_task(ticker.run(["XNV-USDT"]))
+
+        try:
+            await _until(lambda: exchange.connections >= 2)
+            await _until(lambda: ticker.live)
+
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        assert len(fetches) == 3
+        assert exchange.connections == 2
+
+    asyncio.run(_serve(exchange, test))
+
+
+def test_unseeded_partial_ticker_falls_back_to_rest(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # The REST seed came back empty, then the feed pushed a partial tick.
+    ticker = _stream("ws://unused", _seed)
+    ticker.seed({})
+    ticker.connected = True
+    ticker.apply("XNV-USDT", {"lastPrice": "0.02"})
+
+    assert ticker.tickers == {}
+
+    monkeypatch.setitem(stream.streams, "nonkyc", ticker)
+    markets = asyncio.run(stream.get_markets("nonkyc", _seed, ["XNV-USDT"]))
+
+    assert markets == SEED
+    assert ticker.tickers == SEED
+
+    # Seeded now, so ticks land on the full ticker and it is served live.
+    ticker.apply("XNV-USDT", {"lastPrice": "0.03"})
+
+    async def unused() -> dict[str, Any]:
+        raise AssertionError("fetched over REST while live")
+
+    markets = asyncio.run(stream.get_markets("nonkyc", unused, ["XNV-USDT"]))
+
+    assert markets == {"XNV-USDT": {"lastPrice": "0.03", "bestBid": "0.009"}}
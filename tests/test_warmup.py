@@ -0,0 +1,72 @@
+from typing import Any
+
+import asyncio
+
+import pytest
+from quart import Quart
+from aiohttp import web
+
+from backend import warmup
+from backend.daemon import daemon_transport
+
+
+class Redis:
+    @classmethod
+    def from_url(cls, url: str) -> "Redis":
+        return cls()
+
+    async def ping(self) -> bool:
+        return True
+
+    async def aclose(self) -> None:
+        pass
+
+
+def test_opens_connections_with_batching_on(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(warmup, "Redis", Redis)
+    peers: set[Any] = set()
+    posts: list[Any] = []
+
+    async def json_rpc(request: web.Request) -> web.Response:
+        assert request.transport is not None
+        peers.add(request.transport.get_extra_info("peername"))
+        posts.append(await request.json())
+
+        # Slow enough that the calls overlap and each needs its own connection.
+        await asyncio.sleep(0.05)
+        return web.json_response({"jsonrpc": "2.0", "id": 0, "result": {}})
+
+    async def scenario() -> None:
+        daemon = web.Application()
+        daemon.router.add_post("/json_rpc", json_rpc)
+
+        runner = web.AppRunner(daemon)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+
+        daemon_transport.configure(
+            url=f"http://127.0.0.1:{runner.addresses[0][1]}",
+            auth=None,
+            timeout=5.0,
+            max_connections=8,
+            batching=True,
+            batch_window=0.01,
+            batch_size=32,
+        )
+
+        app = Quart(__name__)
+        app.config["REDIS_URL"] = "redis://unused"
+
+        try:
+            await warmup.WarmUp()._prime(app, 4, [])
+
+        finally:
+            await daemon_transport.close()
+            daemon_transport.batching = False
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+
+    assert len(posts) == 4
+    assert all(isinstance(post, dict) for post in posts)
+    assert len(peers) == 4